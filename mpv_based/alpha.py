@@ -1,13 +1,15 @@
 import os
 import tkinter as tk
-from tkinter import filedialog, messagebox, TclError
-import mpv
-import pysrt
+from tkinter import filedialog, messagebox
 import sys
 import logging
 import atexit
 from pathlib import Path
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from subtitle_core import (REPEAT_PRESETS, SUBTITLE_FILETYPES, MpvBackend, RepeatEngine, TkBridge, TkHost, format_srt,
+                           load_timeline)
+
 # Ensure mpv can be found by adding its path if necessary.
 # This is more robust than modifying os.environ directly for the whole session.
 # custom_path = r"C:\Program Files\mpv"
@@ -42,17 +44,12 @@ class MPVPlayerApp:
         master.minsize(800, 650)
 
         self.player = None
+        self.backend = None
+        self.engine = None
+        self.bridge = None
         self.video_path = None
-        self.subtitles = None
-        self.original_subtitles = None
-        self.temp_sub_path = None
-        self.subtitle_index = 0
-        self.repeat_counter = 0
-        self.is_repeating_active = False
+        self.timeline = None
         self.is_slider_dragging = False
-        self.is_handling_repeat = False
-        self.repeat_timer_id = None
-        self.resume_timer_id = None
 
         self._setup_fonts()
         self.create_widgets()
@@ -76,8 +73,6 @@ class MPVPlayerApp:
     def _initialize_mpv(self):
         try:
             logging.info("Initializing MPV instance...")
-            temp_dir = Path(sys.executable).parent if getattr(sys, 'frozen', False) else Path.cwd()
-            self.temp_sub_path = temp_dir / "temp_subs_mpv.srt"
 
             player_opts = {
                 'wid': str(self.video_frame.winfo_id()),
@@ -87,13 +82,21 @@ class MPVPlayerApp:
                 'hwdec': 'auto-safe',
                 'ytdl': False  # Explicitly disable ytdl for local files
             }
-            self.player = mpv.MPV(**player_opts)
+            self.backend = MpvBackend(**player_opts)
+            self.player = self.backend.player
             logging.info("MPV instance created successfully.")
 
-            self.player.observe_property('time-pos', self._on_time_pos_change)
-            self.player.observe_property('duration', self._on_duration_change)
-            self.player.observe_property('pause', self._on_pause_change)
-            self.player.observe_property('fullscreen', self._on_fullscreen_change)
+            # mpv calls observers and engine events on its own thread; the bridge carries them to Tk
+            self.bridge = TkBridge(self.master)
+            # Repeats are run by the shared engine; the observers below only update the UI
+            self.engine = RepeatEngine(self.backend, TkHost(self.master, self.bridge), REPEAT_PRESETS['alpha'],
+                                       repeats=lambda: self.repeat_count.get())
+            self.engine.add_listener(self)
+            for name, handler in (('time-pos', self._on_time_pos_change), ('duration', self._on_duration_change),
+                                  ('pause', self._on_pause_change), ('fullscreen', self._on_fullscreen_change)):
+                self.bridge.bind(name, handler)
+                self.player.observe_property(name, self.bridge.observer())
+            self.bridge.start()
 
             self.master.bind('<Key>', self.handle_keypress)
             self.master.focus_set()
@@ -166,6 +169,10 @@ class MPVPlayerApp:
             side=tk.LEFT)
         self.repeat_count = tk.Spinbox(repeat_frame, from_=1, to=10, width=5, justify=tk.CENTER, font=self.font_normal)
         self.repeat_count.pack(side=tk.LEFT, padx=0)
+        self.ab_loop_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(repeat_frame, text="A-B loop", variable=self.ab_loop_var, command=self.toggle_ab_loop,
+                       fg=self.TEXT_COLOR, bg=self.FRAME_COLOR, selectcolor=self.BUTTON_COLOR,
+                       activebackground=self.FRAME_COLOR, font=self.font_normal).pack(side=tk.LEFT, padx=(5, 0))
 
         advanced_frame = tk.LabelFrame(self.master, text="Subtitle Settings", fg=self.TEXT_COLOR, bg=self.FRAME_COLOR,
                                        padx=10, pady=10, font=self.font_label)
@@ -189,65 +196,28 @@ class MPVPlayerApp:
             self.progress_slider.set(int((value / self.player.duration) * 1000))
         self.time_label.config(text=self.sec_to_time_str(value))
 
-        if not (self.is_repeating_active and not self.player.pause and not self.is_handling_repeat):
-            return
-
-        if self.subtitles and 0 <= self.subtitle_index < len(self.subtitles):
-            current_cue = self.subtitles[self.subtitle_index]
-            current_time_ms = int(value * 1000)
-
-            if current_cue.start.ordinal <= current_time_ms < current_cue.end.ordinal:
-                time_until_end_ms = current_cue.end.ordinal - current_time_ms
-                delay_ms = max(1, time_until_end_ms)
-                self.is_handling_repeat = True  # Set lock *before* scheduling
-                self.repeat_timer_id = self.master.after(delay_ms, self.handle_repeat)
-
-    def handle_repeat(self):
-        self.repeat_timer_id = None
-        if not self.is_repeating_active or self.player.pause or not self.subtitles:
-            self.is_handling_repeat = False
-            return
-
-        try:
-            max_repeats = int(self.repeat_count.get())
-        except (ValueError, TclError):
-            max_repeats = 1  # Default to 1 if spinbox is invalid or destroyed
+    def on_repeat(self, index, count):
+        """Engine listener: cue `index` ended and is being played again."""
+        logging.info(f"Repeating subtitle #{index + 1} ({count}/{self.engine.repeat_count() - 1}). Seeking.")
 
-        if self.repeat_counter < max_repeats - 1:
-            self.repeat_counter += 1
-            current_cue = self.subtitles[self.subtitle_index]
-
-            # Seek to just before the subtitle starts for a small pre-roll
-            seek_time_ms = current_cue.start.ordinal
-            if self.subtitle_index > 0:
-                prev_cue_end = self.subtitles[self.subtitle_index - 1].end.ordinal
-                seek_time_ms = max(prev_cue_end + 1, seek_time_ms - 300)
-
-            self.player.pause = True
-            self.player.time_pos = seek_time_ms / 1000.0
-
-            # Briefly pause then resume to allow video to buffer and avoid stutter
-            self.resume_timer_id = self.master.after(100, self.resume_playback)
+    def on_resume(self, seek_latency_ms, timed_out):
+        if timed_out:
+            logging.warning(f"No seek confirmation from mpv after {seek_latency_ms:.0f} ms; resuming anyway.")
         else:
-            # Move to the next subtitle if one exists
-            if self.subtitle_index < len(self.subtitles) - 1:
-                self.subtitle_index += 1
-            # Reset counter for the next subtitle cycle and unlock
-            self.repeat_counter = 0
-            self.is_handling_repeat = False
-
-    def resume_playback(self):
-        self.resume_timer_id = None
-        if self.player and self.player.pause:
-            self.player.pause = False
-        self.is_handling_repeat = False
+            logging.info(f"Seek landed after {seek_latency_ms:.0f} ms; resuming.")
 
     def play_pause(self, *args):
         if not self.player or not self.video_path: return
-        self.reset_repeat_state()
-        self.player.pause = not self.player.pause
-        if not self.player.pause and self.player.time_pos:
-            self.update_subtitle_index(int(self.player.time_pos * 1000))
+        if self.engine.resume_timer_id is not None: return  # a repeat's seek-back is landing
+        self.engine.toggle()
+        self.master.focus_set()
+
+    def toggle_ab_loop(self):
+        """mpv loops each cue itself with ab-loop-a/b/count; Python only advances to the next cue."""
+        if not self.engine: return
+        native_loop = self.ab_loop_var.get()
+        self.engine.set_settings(REPEAT_PRESETS['alpha'].copy(native_loop=native_loop))
+        logging.info(f"mpv A-B loop repeat mode {'on' if native_loop else 'off'}.")
         self.master.focus_set()
 
     def start_session(self):
@@ -260,14 +230,14 @@ class MPVPlayerApp:
 
         subtitle_path = filedialog.askopenfilename(
             title="Select Subtitle File",
-            filetypes=(("SubRip files", "*.srt"), ("All files", "*.*"))
+            filetypes=(SUBTITLE_FILETYPES, ("All files", "*.*"))
         )
         if not subtitle_path: return
 
         self.video_path = Path(video_path)
         try:
-            self.player.loadfile(str(self.video_path), 'replace')
-            self.player.pause = True
+            self.backend.load_media(str(self.video_path))
+            self.engine.pause()
             self.master.title(f"Subtitle Repeater - {self.video_path.name}")
         except Exception as e:
             messagebox.showerror("Video Error", f"Could not load the video file.\nError: {e}")
@@ -281,70 +251,60 @@ class MPVPlayerApp:
         self.prev_subtitle_btn.config(state=tk.NORMAL)
         self.skip_subtitle_btn.config(state=tk.NORMAL)
         self.apply_settings_btn.config(state=tk.NORMAL)
-        self.is_repeating_active = True
         self.master.focus_set()
 
     def _load_and_process_subtitles(self, path):
-        encodings_to_try = ['utf-8', 'utf-8-sig', 'cp1252', 'iso-8859-1', 'cp1251']
-        for encoding in encodings_to_try:
-            try:
-                self.original_subtitles = pysrt.open(path, encoding=encoding)
-                logging.info(f"Successfully loaded subtitle with encoding: {encoding}")
-                self.process_subtitles()
-                return True
-            except Exception:
-                continue
-        messagebox.showerror("Subtitle Error", "Could not decode subtitle file. Please try converting it to UTF-8.")
-        return False
+        timeline = None
+        try:
+            timeline, encoding = load_timeline(path)
+            logging.info(f"Successfully loaded subtitle: {len(timeline)} cues ({'from cache' if encoding == 'cache' else f'encoding: {encoding}'})")
+        except Exception as e:
+            logging.error(f"Failed to load subtitle: {e}", exc_info=True)
+        if not timeline:
+            messagebox.showerror("Subtitle Error", "Could not decode subtitle file. Please try converting it to UTF-8.")
+            return False
+        self.timeline = timeline
+        self._apply_processed_subtitles_to_player()
+        self.process_subtitles()
+        return True
 
     def process_subtitles(self):
-        if not self.original_subtitles: return
-        self.reset_repeat_state()
-        processed_subs = self.original_subtitles.copy()
+        """Applies delay as the timeline offset and mpv's sub-delay; the cues and temp file are left alone."""
+        if not self.timeline: return
+        self.cancel_all_timers()
         try:
             delay_sec = float(self.sync_delay_entry.get())
-            if delay_sec != 0.0:
-                processed_subs.shift(seconds=delay_sec)
         except ValueError:
             messagebox.showerror("Error", "Invalid delay value. Please enter a number.")
             return
 
-        self.subtitles = processed_subs
-        self._apply_processed_subtitles_to_player()
-        if self.player.time_pos:
-            self.update_subtitle_index(int(self.player.time_pos * 1000))
+        self.timeline.offset_ms = int(round(delay_sec * 1000))
+        self.backend.set_subtitle_delay(self.timeline.offset_ms)
+        self.engine.set_timeline(self.timeline)
         self.master.focus_set()
 
     def _apply_processed_subtitles_to_player(self):
-        """Saves processed subtitles to a temp file and loads it into mpv, replacing any previous temp sub."""
-        if not self.subtitles or not self.temp_sub_path:
+        """Hands the processed subtitles to mpv in memory, replacing the track added before."""
+        if not self.timeline:
             return
         try:
-            # Save the modified subtitles to the temporary file
-            self.subtitles.save(str(self.temp_sub_path), encoding='utf-8')
-
-            # If a video is loaded, tell mpv to add the subtitle file.
-            # The 'replace' flag ensures we replace the previous temp subtitle track
-            # instead of adding a new one each time 'Apply' is clicked.
+            # The backend passes the text as a memory:// URL and removes the previous
+            # track itself, so re-applying never stacks tracks or touches the disk.
             if self.video_path:
-                self.player.sub_add(str(self.temp_sub_path), 'replace')
-                logging.info(f"Loaded/reloaded subtitles from {self.temp_sub_path}")
+                self.backend.load_subtitle_text(format_srt(self.timeline))
+                logging.info("Loaded/reloaded subtitles from memory.")
 
         except Exception as e:
-            logging.error(f"Failed to save or apply temporary subtitle file: {e}", exc_info=True)
-            messagebox.showerror("File Error", f"Could not create or load temporary subtitle file.\nError: {e}")
+            logging.error(f"Failed to apply processed subtitles: {e}", exc_info=True)
+            messagebox.showerror("Subtitle Error", f"Could not load the subtitles into mpv.\nError: {e}")
 
     def reset_app_state(self):
-        self.reset_repeat_state()
-        if self.player:
-            self.player.command('stop')
+        if self.engine:
+            self.engine.stop()
+            self.engine.set_timeline(None)
 
         self.video_path = None
-        self.subtitles = None
-        self.original_subtitles = None
-        self.subtitle_index = 0
-        self.repeat_counter = 0
-        self.is_repeating_active = False
+        self.timeline = None
 
         self.play_pause_btn.config(state=tk.DISABLED, text="Play")
         self.prev_subtitle_btn.config(state=tk.DISABLED)
@@ -366,7 +326,7 @@ class MPVPlayerApp:
         self.fullscreen_btn.config(text="Exit Fullscreen" if value else "Fullscreen")
 
     def on_slider_press(self, event):
-        self.reset_repeat_state()
+        self.cancel_all_timers()
         self.is_slider_dragging = True
 
     def on_slider_release(self, event):
@@ -374,52 +334,24 @@ class MPVPlayerApp:
         if self.player.duration:
             pos = self.progress_slider.get()
             seek_time_sec = self.player.duration * (pos / 1000.0)
-            self.player.time_pos = seek_time_sec
-            self.update_subtitle_index(int(seek_time_sec * 1000))
+            self.engine.seek(int(seek_time_sec * 1000))
         self.master.focus_set()
 
     def skip_subtitle(self, *args):
-        if not self.subtitles or self.subtitle_index >= len(self.subtitles) - 1: return
-        self.reset_repeat_state()
-        self.subtitle_index += 1
-        self.repeat_counter = 0
-        self.player.time_pos = self.subtitles[self.subtitle_index].start.ordinal / 1000.0
-        if self.player.pause: self.play_pause()
+        self.engine.skip(1)
         self.master.focus_set()
 
     def previous_subtitle(self, *args):
-        if not self.subtitles or self.subtitle_index <= 0: return
-        self.reset_repeat_state()
-        self.subtitle_index -= 1
-        self.repeat_counter = 0
-        self.player.time_pos = self.subtitles[self.subtitle_index].start.ordinal / 1000.0
-        if self.player.pause: self.play_pause()
+        self.engine.skip(-1)
         self.master.focus_set()
 
-    def update_subtitle_index(self, time_ms):
-        """More efficient single-pass search for the correct subtitle index."""
-        if not self.subtitles: return
-        self.reset_repeat_state()
-
-        # Find the first subtitle that starts *after* the current time
-        for i, cue in enumerate(self.subtitles):
-            if cue.start.ordinal > time_ms:
-                # We are between cue i-1 and cue i.
-                self.subtitle_index = max(0, i - 1)
-                self.repeat_counter = 0
-                return
-
-        # If no subtitle starts after time_ms, we are at or after the last one.
-        self.subtitle_index = len(self.subtitles) - 1
-        self.repeat_counter = 0
-
     def toggle_fullscreen(self, *args):
         if self.player:
             self.player.fullscreen = not self.player.fullscreen
         self.master.focus_set()
 
     def set_volume(self, value):
-        if self.player: self.player.volume = int(value)
+        if self.backend: self.backend.set_volume(value)
 
     def handle_keypress(self, event):
         if isinstance(event.widget, (tk.Entry, tk.Spinbox)): return
@@ -439,40 +371,26 @@ class MPVPlayerApp:
         h, m = divmod(m, 60)
         return f"{int(h):02}:{int(m):02}:{int(s):02}"
 
-    def reset_repeat_state(self):
-        self.cancel_all_timers()
-        self.is_handling_repeat = False
-
     def cancel_all_timers(self):
-        if self.repeat_timer_id:
-            self.master.after_cancel(self.repeat_timer_id)
-            self.repeat_timer_id = None
-        if self.resume_timer_id:
-            self.master.after_cancel(self.resume_timer_id)
-            self.resume_timer_id = None
+        if self.engine:
+            self.engine.cancel()
 
     def cleanup(self):
         """Cleanly terminate the player and remove temporary files."""
         logging.info("Starting cleanup...")
         if self.player:
             try:
-                self.player.terminate()
+                self.backend.release()
                 self.player = None
                 logging.info("MPV player terminated.")
             except Exception as e:
                 logging.error(f"Error terminating MPV: {e}")
 
-        if self.temp_sub_path and self.temp_sub_path.exists():
-            try:
-                self.temp_sub_path.unlink()
-                logging.info(f"Removed temp file: {self.temp_sub_path}")
-            except OSError as e:
-                logging.error(f"Error removing temp file on exit: {e}")
-
     def on_closing(self):
         """Handles the window close event."""
         logging.info("Window close event triggered.")
         self.cancel_all_timers()
+        if self.bridge: self.bridge.stop()
         self.master.destroy()
         logging.info("================== Application Closed ==================")
 
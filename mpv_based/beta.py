@@ -6,16 +6,14 @@ import threading
 import time
 
 # --- Third-party deps ---
-# pip install python-mpv pysubs2
+# pip install python-mpv
 try:
     import mpv
 except Exception as e:
     raise SystemExit("python-mpv is required. Install with: pip install python-mpv")
 
-try:
-    import pysubs2
-except Exception as e:
-    raise SystemExit("pysubs2 is required. Install with: pip install pysubs2")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from subtitle_core import SUBTITLE_FILETYPES, CueTimeline, TkBridge, load_timeline
 
 
 class SubtitleRepeaterPlayer:
@@ -26,13 +24,17 @@ class SubtitleRepeaterPlayer:
         self.root.minsize(800, 500)
 
         # State
-        self.sub_intervals = []  # list of dicts: {start: float, end: float}
+        self.timeline = CueTimeline()
         self.current_sub_idx = None
         self.repeats_done = 0
         self.repeat_count = tk.IntVar(value=1)  # 1 => no repeat
         self.is_fullscreen = False
         self.poll_interval_ms = 100
 
+        # mpv runs event callbacks on its own thread; the bridge carries them to Tk
+        self.bridge = TkBridge(self.root)
+        self.bridge.start()
+
         # --- UI ---
         self._build_ui()
         # Ensure video frame is realized before creating MPV (needs a valid window id)
@@ -108,9 +110,7 @@ class SubtitleRepeaterPlayer:
         # When a new file is loaded, clear subtitle repeat state
         @self.player.event_callback('file-loaded')
         def _on_file_loaded(_):
-            self.status.set("Loaded: " + (self.player.filename or "(unknown)"))
-            self.current_sub_idx = None
-            self.repeats_done = 0
+            self.bridge.call(self._on_file_loaded)
 
         # Ensure pausing works reliably
         self.player.pause = True
@@ -131,19 +131,19 @@ class SubtitleRepeaterPlayer:
         sub_path = filedialog.askopenfilename(
             title="Choose a subtitle",
             filetypes=[
-                ("Subtitle files", ".srt .ass .ssa .vtt"),
+                SUBTITLE_FILETYPES,
                 ("All files", "*.*"),
             ],
         )
         if not sub_path:
             # still load video, but no repeat-by-subtitle logic without subs
-            self.sub_intervals = []
+            self.timeline = CueTimeline()
         else:
             try:
                 self._load_sub_intervals(sub_path)
             except Exception as e:
                 messagebox.showerror("Subtitle Error", f"Failed to read subtitle file:\n{e}")
-                self.sub_intervals = []
+                self.timeline = CueTimeline()
 
         # Load into MPV
         self.player.command('loadfile', video_path, 'replace')
@@ -158,20 +158,13 @@ class SubtitleRepeaterPlayer:
         self.player.pause = False
 
     def _load_sub_intervals(self, sub_path):
-        subs = pysubs2.load(sub_path)
-        intervals = []
-        for ev in subs.events:
-            # times are in milliseconds
-            start = ev.start / 1000.0
-            end = ev.end / 1000.0
-            if end > start:
-                intervals.append({"start": start, "end": end})
-        # sort just in case
-        intervals.sort(key=lambda x: x["start"])
-        self.sub_intervals = intervals
+        # SRT, WebVTT and ASS/SSA all load into the same timeline; zero-length or inverted cues
+        # are dropped, as looping one would seek back instantly over and over
+        timeline, _ = load_timeline(sub_path)
+        self.timeline = timeline.without_empty()
         self.current_sub_idx = None
         self.repeats_done = 0
-        self.status.set(f"Loaded {len(intervals)} subtitles. Repeat set to {self.repeat_count.get()}x")
+        self.status.set(f"Loaded {len(self.timeline)} subtitles. Repeat set to {self.repeat_count.get()}x")
 
     def play(self):
         try:
@@ -200,6 +193,11 @@ class SubtitleRepeaterPlayer:
         self.root.attributes("-fullscreen", self.is_fullscreen)
         self.btn_full.configure(text="Exit Fullscreen" if self.is_fullscreen else "Fullscreen")
 
+    def _on_file_loaded(self):
+        self.status.set("Loaded: " + (self.player.filename or "(unknown)"))
+        self.current_sub_idx = None
+        self.repeats_done = 0
+
     def _escape_fullscreen(self, _evt=None):
         if self.is_fullscreen:
             self.toggle_fullscreen()
@@ -211,6 +209,7 @@ class SubtitleRepeaterPlayer:
                 self.player.command('quit')
         except Exception:
             pass
+        self.bridge.stop()
         self.root.destroy()
         sys.exit(0)
 
@@ -222,7 +221,7 @@ class SubtitleRepeaterPlayer:
         except Exception:
             t = None
 
-        if t is not None and not self.player.pause and self.sub_intervals:
+        if t is not None and not self.player.pause and self.timeline:
             self._maybe_repeat_at_subtitle_boundary(t)
 
         # Keep polling
@@ -245,8 +244,7 @@ class SubtitleRepeaterPlayer:
 
         # If repeat count is 1, do nothing (no repeat)
         repeat_target = max(1, int(self.repeat_count.get() or 1))
-        interval = self.sub_intervals[idx]
-        start, end = interval["start"], interval["end"]
+        start, end = self.timeline.start(idx) / 1000.0, self.timeline.end(idx) / 1000.0
 
         # If we've reached the end of the subtitle, and need to repeat
         # Add a small epsilon to avoid jitter near the exact boundary
@@ -266,34 +264,11 @@ class SubtitleRepeaterPlayer:
                 pass
 
     def _find_current_sub_idx(self, t_now: float):
-        # Fast path: if we have a current index, check it and neighbors
-        if self.current_sub_idx is not None:
-            i = self.current_sub_idx
-            if 0 <= i < len(self.sub_intervals):
-                interval = self.sub_intervals[i]
-                if interval["start"] - 0.05 <= t_now < interval["end"] + 0.05:
-                    return i
-                # try next
-                if i + 1 < len(self.sub_intervals):
-                    interval2 = self.sub_intervals[i + 1]
-                    if interval2["start"] - 0.05 <= t_now < interval2["end"] + 0.05:
-                        return i + 1
-                # try prev
-                if i - 1 >= 0:
-                    interval0 = self.sub_intervals[i - 1]
-                    if interval0["start"] - 0.05 <= t_now < interval0["end"] + 0.05:
-                        return i - 1
-        # Fallback: binary search
-        lo, hi = 0, len(self.sub_intervals) - 1
-        while lo <= hi:
-            mid = (lo + hi) // 2
-            st, en = self.sub_intervals[mid]["start"], self.sub_intervals[mid]["end"]
-            if t_now < st:
-                hi = mid - 1
-            elif t_now >= en:
-                lo = mid + 1
-            else:
-                return mid
+        # Shared timeline lookup (neighbour fast path, then bisect) with 50ms of slack on both edges
+        t_ms = int(t_now * 1000)
+        idx = self.timeline.index_at(t_ms - 50, hint=self.current_sub_idx, lead_ms=100)
+        if idx is not None and self.timeline.start(idx) - 50 <= t_ms < self.timeline.end(idx) + 50:
+            return idx
         return None
 
 
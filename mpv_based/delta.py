@@ -6,6 +6,9 @@ import time
 import os
 import sys
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from subtitle_core.srt import stream_srt
+
 
 class LanguageLearningPlayer:
     def __init__(self, root):
@@ -133,51 +136,25 @@ class LanguageLearningPlayer:
 
         self.subtitles = []
         try:
-            with open(self.subtitle_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-
-            # Simple SRT parser
+            # Streaming SRT parser
             if self.subtitle_path.endswith('.srt'):
-                self.parse_srt(content)
+                self.parse_srt(self.subtitle_path)
             else:
                 messagebox.showwarning("Warning", "Only SRT subtitles are fully supported")
 
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load subtitles: {str(e)}")
 
-    def parse_srt(self, content):
-        blocks = content.strip().split('\n\n')
-        for block in blocks:
-            lines = block.strip().split('\n')
-            if len(lines) >= 3:
-                try:
-                    time_line = lines[1]
-                    start_time, end_time = time_line.split(' --> ')
-
-                    start_ms = self.time_to_milliseconds(start_time.strip())
-                    end_ms = self.time_to_milliseconds(end_time.strip())
+    def parse_srt(self, path):
+        # The first cues are available immediately; the monitor thread sees the rest as they are parsed
+        subtitles = self.subtitles
 
-                    text = '\n'.join(lines[2:])
-
-                    self.subtitles.append({
-                        'start': start_ms,
-                        'end': end_ms,
-                        'text': text
-                    })
-                except:
-                    continue
+        def add_cues(cues):
+            subtitles.extend([{'start': start, 'end': end, 'text': text} for start, end, text in cues])
 
+        stream_srt(path, add_cues)
         self.status_label.config(text=f"Loaded {len(self.subtitles)} subtitles")
 
-    def time_to_milliseconds(self, time_str):
-        # Convert "HH:MM:SS,mmm" to milliseconds
-        time_part, ms_part = time_str.split(',')
-        hours, minutes, seconds = map(int, time_part.split(':'))
-        milliseconds = int(ms_part)
-
-        total_ms = (hours * 3600 + minutes * 60 + seconds) * 1000 + milliseconds
-        return total_ms
-
     def play(self):
         if not self.video_path:
             messagebox.showwarning("Warning", "Please select a video file first")
@@ -1,10 +1,12 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox, simpledialog
 import vlc
-import re
-from datetime import timedelta
 import platform
 import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from subtitle_core.srt import stream_srt
 
 
 class LanguageLearnerPlayer:
@@ -105,35 +107,23 @@ class LanguageLearnerPlayer:
     def load_subtitle(self, path):
         """Parses the SRT file and loads it into the player."""
         try:
-            with open(path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            # Streaming SRT parser: the first cues are ready at once, the rest are appended by a background thread
+            subtitles = self.subtitles = []
 
-            # Simple but effective SRT parser using regex
-            # Format: index\nstart --> end\ntext\n\n
-            subtitle_blocks = re.findall(
-                r'(\d+)\n(\d{2}:\d{2}:\d{2},\d{3}) --> (\d{2}:\d{2}:\d{2},\d{3})\n([\s\S]*?(?=\n\n|\Z))',
-                content
-            )
+            def add_cues(cues):
+                subtitles.extend([{'start': start, 'end': end, 'text': text} for start, end, text in cues])
 
-            self.subtitles = []
-            for block in subtitle_blocks:
-                start_time = self.srt_time_to_ms(block[1])
-                end_time = self.srt_time_to_ms(block[2])
-                text = block[3]
-                self.subtitles.append({'start': start_time, 'end': end_time, 'text': text})
+            _, loader_thread = stream_srt(path, add_cues)
 
             self.player.video_set_subtitle_file(path)
-            messagebox.showinfo("Success", f"{len(self.subtitles)} subtitles loaded successfully.")
+            if loader_thread:
+                messagebox.showinfo("Success", "Subtitles loaded; playback can start while the rest are parsed.")
+            else:
+                messagebox.showinfo("Success", f"{len(self.subtitles)} subtitles loaded successfully.")
         except Exception as e:
             messagebox.showerror("Subtitle Error", f"Failed to parse subtitle file: {e}")
             self.subtitles = []
 
-    def srt_time_to_ms(self, time_str):
-        """Converts an SRT time string (HH:MM:SS,ms) to milliseconds."""
-        h, m, s_ms = time_str.split(':')
-        s, ms = s_ms.split(',')
-        return int(timedelta(hours=int(h), minutes=int(m), seconds=int(s), milliseconds=int(ms)).total_seconds() * 1000)
-
     def play_pause(self):
         """Toggles play/pause state of the video."""
         if not self.video_loaded:
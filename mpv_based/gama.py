@@ -5,6 +5,11 @@ import threading
 import time
 import os
 import re
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from subtitle_core.bridge import TkBridge
+from subtitle_core.srt import stream_srt
 
 
 class SubtitleEntry:
@@ -28,6 +33,8 @@ class ForeignLanguageLearningPlayer:
         self.subtitles = []
         self.current_subtitle_index = 0
         self.repeat_count = tk.IntVar(value=1)
+        self.repeat_target = 1  # plain copy of repeat_count for the monitor thread
+        self.repeat_count.trace_add('write', self.on_repeat_count_change)
         self.current_repeats = 0
         self.is_playing = False
         self.is_fullscreen = False
@@ -36,6 +43,18 @@ class ForeignLanguageLearningPlayer:
 
         self.setup_ui()
 
+        # The monitor thread never touches Tk: it posts the latest status here instead
+        self.bridge = TkBridge(self.root)
+        self.bridge.bind('status', lambda key, text: self.status_label.config(text=text))
+        self.bridge.bind('play_button', lambda key, text: self.play_button.config(text=text))
+        self.bridge.start()
+
+    def on_repeat_count_change(self, *args):
+        try:
+            self.repeat_target = self.repeat_count.get()
+        except tk.TclError:
+            pass  # the spinbox is being edited
+
     def setup_ui(self):
         # Main container
         main_frame = ttk.Frame(self.root)
@@ -127,35 +146,18 @@ class ForeignLanguageLearningPlayer:
         self.file_info_label.config(text=f"Video: {video_name} | Subtitle: {subtitle_name}")
 
     def load_subtitles(self):
-        """Load and parse SRT subtitle file"""
-        self.subtitles = []
+        """Load and parse SRT subtitle file. The first cues are ready at once, the rest fill in on a thread."""
+        subtitles = self.subtitles = []
         try:
-            with open(self.subtitle_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-
-            # Simple SRT parser
-            subtitle_blocks = re.split(r'\n\s*\n', content.strip())
-
-            for block in subtitle_blocks:
-                lines = block.strip().split('\n')
-                if len(lines) >= 3:
-                    # Parse time format: 00:00:20,000 --> 00:00:24,400
-                    time_line = lines[1]
-                    time_match = re.match(r'(\d{2}):(\d{2}):(\d{2}),(\d{3})\s*-->\s*(\d{2}):(\d{2}):(\d{2}),(\d{3})',
-                                          time_line)
-
-                    if time_match:
-                        start_h, start_m, start_s, start_ms, end_h, end_m, end_s, end_ms = map(int, time_match.groups())
-                        start_time = start_h * 3600 + start_m * 60 + start_s + start_ms / 1000
-                        end_time = end_h * 3600 + end_m * 60 + end_s + end_ms / 1000
-
-                        # Clean subtitle text
-                        text = '\n'.join(lines[2:])
-                        # Remove HTML tags if any
-                        text = re.sub(r'<[^>]+>', '', text)
-                        self.subtitles.append(SubtitleEntry(start_time, end_time, text.strip()))
+            def add_cues(cues):
+                # Remove HTML tags if any; the batch is built first so the list grows in one step
+                entries = [SubtitleEntry(start / 1000, end / 1000, re.sub(r'<[^>]+>', '', text).strip())
+                           for start, end, text in cues]
+                subtitles.extend(entries)
 
-            self.status_label.config(text=f"Loaded {len(self.subtitles)} subtitles. Ready to play!")
+            _, loader_thread = stream_srt(self.subtitle_file, add_cues)
+            more = " (loading the rest in background)" if loader_thread else ""
+            self.status_label.config(text=f"Loaded {len(self.subtitles)} subtitles{more}. Ready to play!")
 
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load subtitle file: {str(e)}")
@@ -223,12 +225,10 @@ class ForeignLanguageLearningPlayer:
                     if current_time >= current_subtitle.end_time:
                         self.current_repeats += 1
 
-                        if self.current_repeats < self.repeat_count.get():
+                        if self.current_repeats < self.repeat_target:
                             # Repeat current subtitle
                             self.player.seek(current_subtitle.start_time, reference='absolute')
-                            self.root.after(0, lambda: self.status_label.config(
-                                text=f"Subtitle {self.current_subtitle_index + 1}/{len(self.subtitles)} - Repeat {self.current_repeats + 1}/{self.repeat_count.get()}"
-                            ))
+                            self.bridge.put('status', f"Subtitle {self.current_subtitle_index + 1}/{len(self.subtitles)} - Repeat {self.current_repeats + 1}/{self.repeat_target}")
                         else:
                             # Move to next subtitle
                             self.current_repeats = 0
@@ -237,15 +237,13 @@ class ForeignLanguageLearningPlayer:
                             if self.current_subtitle_index < len(self.subtitles):
                                 next_subtitle = self.subtitles[self.current_subtitle_index]
                                 self.player.seek(next_subtitle.start_time, reference='absolute')
-                                self.root.after(0, lambda: self.status_label.config(
-                                    text=f"Subtitle {self.current_subtitle_index + 1}/{len(self.subtitles)} - Repeat 1/{self.repeat_count.get()}"
-                                ))
+                                self.bridge.put('status', f"Subtitle {self.current_subtitle_index + 1}/{len(self.subtitles)} - Repeat 1/{self.repeat_target}")
                             else:
                                 # End of subtitles
                                 self.is_playing = False
                                 self.player.pause = True
-                                self.root.after(0, lambda: self.play_button.config(text="Play"))
-                                self.root.after(0, lambda: self.status_label.config(text="Finished all subtitles."))
+                                self.bridge.put('play_button', "Play")
+                                self.bridge.put('status', "Finished all subtitles.")
 
                 time.sleep(0.1)
 
@@ -340,6 +338,7 @@ class ForeignLanguageLearningPlayer:
     def on_closing(self):
         """Handle window close event"""
         self.stop_position_thread = True
+        self.bridge.stop()
 
         if self.position_update_thread and self.position_update_thread.is_alive():
             self.position_update_thread.join(timeout=1)
@@ -1,11 +1,13 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox
-import vlc
-import pysrt
 import os
 import sys
 import logging
 
+from subtitle_core import (REPEAT_PRESETS, SUBTITLE_FILETYPES, CuePrefetcher, RepeatEngine, SeekPlanner, TkHost,
+                           ViewModel, VlcBackend, format_srt, load_timeline)
+from subtitle_core.viewmodel import LABEL_HZ, SLIDER_HZ
+
 # --- Setup Logging ---
 log_file_path = os.path.join(os.path.expanduser("~"), "subtitle_repeater.log")
 logging.basicConfig(
@@ -53,17 +55,10 @@ class VLCPlayerApp:
         # --- State Variables ---
         self.video_path = None
         self.subtitle_path = None
-        self.subtitles = None
-        self.original_subtitles = None
-        self.temp_sub_path = None
-        self.subtitle_index = 0
-        self.repeat_counter = 0
-        self.is_paused = True
-        self.is_repeating_active = False
+        self.timeline = None
         self.is_fullscreen = False
         self.is_slider_dragging = False
-        self.repeat_timer_id = None
-        self.resume_timer_id = None
+        self.media_length_ms = 0  # asked from libVLC until known, then kept for the media
 
         try:
             logging.info("Initializing VLC instance...")
@@ -75,9 +70,15 @@ class VLCPlayerApp:
                     os.environ['VLC_PLUGIN_PATH'] = plugin_path
                     logging.info(f"VLC_PLUGIN_PATH set to: {plugin_path}")
 
-            self.vlc_instance = vlc.Instance(vlc_args)
-            self.player = self.vlc_instance.media_player_new()
+            self.backend = VlcBackend(vlc_args)
+            self.player = self.backend.player
             logging.info("VLC instance and player created successfully.")
+            # Repeats (clock, cue-end timer, seek-back and resume) are run by the shared engine
+            self.engine = RepeatEngine(self.backend, TkHost(self.master), REPEAT_PRESETS['player'],
+                                       repeats=lambda: self.repeat_count.get())
+            self.engine.add_listener(self)
+            # Keeps the upcoming cue's bytes in the page cache so seek-backs do not wait on the disk
+            self.prefetcher = CuePrefetcher(self.engine)
         except Exception as e:
             logging.error(f"Failed to initialize VLC: {e}", exc_info=True)
             messagebox.showerror("VLC Error", f"Could not initialize VLC. Is it installed?\nError: {e}")
@@ -88,15 +89,13 @@ class VLCPlayerApp:
         self.master.bind('<Key>', self.handle_keypress)
         self.master.focus_set()
 
-        try:
-            temp_dir = os.path.dirname(sys.executable) if getattr(sys, 'frozen', False) else os.getcwd()
-            self.temp_sub_path = os.path.join(temp_dir, "temp_subs.srt")
-        except Exception as e:
-            logging.error(f"Could not determine temp directory: {e}", exc_info=True)
-            messagebox.showerror("Startup Error", "Could not create a path for temporary files.")
-            master.destroy()
-            return
-
+        # Widgets are only reconfigured when what they show changed, at most LABEL_HZ / SLIDER_HZ.
+        # The UI ticks at LABEL_HZ; SLIDER_HZ only caps the slider's pushes.
+        self.view = ViewModel()
+        self.view.add('progress', self.progress_slider.set, SLIDER_HZ)
+        self.view.add('time', lambda text: self.time_label.config(text=text), LABEL_HZ)
+        self.view.add('duration', lambda text: self.duration_label.config(text=text), LABEL_HZ)
+        self.view.add('fullscreen', lambda text: self.fullscreen_btn.config(text=text), LABEL_HZ)
         self.master.after(100, self.update_ui)
 
     def create_widgets(self):
@@ -202,114 +201,66 @@ class VLCPlayerApp:
 
     def on_slider_release(self, event):
         self.is_slider_dragging = False
+        self.view.invalidate('progress')
         self.seek()
         self.master.focus_set()
 
     def seek(self):
         self.cancel_all_timers()
-        if not self.player.get_media() or self.player.get_length() <= 0:
+        if not self.backend.has_media() or self.backend.duration_ms() <= 0:
             return
         pos = self.progress_slider.get()
-        time_ms = int(self.player.get_length() * (pos / 1000.0))
-        self.player.set_time(max(0, time_ms))
-        self.update_subtitle_index_on_seek(time_ms)
+        time_ms = max(0, int(self.backend.duration_ms() * (pos / 1000.0)))
+        self.engine.seek(time_ms)
         logging.info(f"Seek to {self.ms_to_time_str(time_ms)} ({pos / 10}%)")
 
     def update_ui(self):
+        """
+        Display only; repeats are driven by the engine. The position comes from the engine's
+        clock and the length is cached per media, so a tick makes no libVLC calls once playing
+        and only touches Tk for fields the view model finds changed.
+        """
         try:
-            if self.player.get_media() and self.player.get_length() > 0:
-                current_time = self.player.get_time()
+            if not self.media_length_ms and self.video_path and self.backend.has_media():
+                self.media_length_ms = max(0, self.backend.duration_ms())  # 0 until libVLC has parsed it
+            length = self.media_length_ms
+            if length > 0:
+                current_time = self.engine.now_ms()
                 if not self.is_slider_dragging:
-                    self.progress_slider.set(int(self.player.get_position() * 1000))
-                self.time_label.config(text=self.ms_to_time_str(current_time))
-                self.duration_label.config(text=self.ms_to_time_str(self.player.get_length()))
-
-                if self.is_fullscreen != self.master.attributes('-fullscreen'):
-                    self.is_fullscreen = self.master.attributes('-fullscreen')
-                    self.update_fullscreen_button()
-
-                if self.is_repeating_active and not self.is_paused and self.repeat_timer_id is None and self.resume_timer_id is None:
-                    if self.subtitles and 0 <= self.subtitle_index < len(self.subtitles):
-                        current_cue = self.subtitles[self.subtitle_index]
-                        if current_cue.start.ordinal <= current_time < current_cue.end.ordinal:
-                            time_until_end = current_cue.end.ordinal - current_time
-                            self.repeat_timer_id = self.master.after(int(time_until_end), self.handle_repeat)
-
-            self.master.after(480, self.update_ui)
+                    self.view.set('progress', min(1000, int(current_time * 1000 / length)))
+                self.view.set('time', self.ms_to_time_str(current_time))
+                self.view.set('duration', self.ms_to_time_str(length))
+            self.view.flush()
+
+            self.master.after(1000 // LABEL_HZ, self.update_ui)
+            self.view.record_calls()
         except tk.TclError:
             logging.info("TclError caught, likely window closed. Shutting down UI loop.")
         except Exception as e:
             logging.error(f"Unexpected error in UI update loop: {e}", exc_info=True)
 
-    def handle_repeat(self):
-        """
-        Handles repeating a subtitle. Seeks back, waits 1 second, then resumes.
-        Tries to start 0.5s early if there's no collision with the previous subtitle.
-        """
-        self.repeat_timer_id = None
-        if self.is_paused or not self.is_repeating_active or not self.subtitles:
-            return
+    def on_repeat(self, index, count):
+        """Engine listener: cue `index` ended and is being played again."""
+        logging.info(f"Cue end at {self.engine.now_ms() - self.timeline.end(index):+d} ms "
+                     f"(clock drift at last VLC update: {self.engine.clock.drift_ms:+.0f} ms)")
+        logging.info(f"Repeating subtitle #{index + 1} (Rep {count}/{self.engine.repeat_count() - 1}). "
+                     f"Seeking to {self.ms_to_time_str(self.engine.seek_target(index))}.")
 
-        try:
-            max_repeats = int(self.repeat_count.get())
-        except (ValueError, tk.TclError):
-            max_repeats = 1
-
-        if self.repeat_counter < max_repeats - 1:
-            self.repeat_counter += 1
-            current_cue = self.subtitles[self.subtitle_index]
-
-            # --- IMPROVED: Calculate smart seek time ---
-            base_start_time = current_cue.start.ordinal
-            seek_time = base_start_time
-            early_start_time = base_start_time - 500  # 0.5 seconds early
-
-            can_start_early = True
-            if self.subtitle_index > 0:
-                previous_cue = self.subtitles[self.subtitle_index - 1]
-                if early_start_time <= previous_cue.end.ordinal:
-                    can_start_early = False
-                    logging.info(
-                        f"Early start for sub #{self.subtitle_index + 1} collides with previous. Using normal start time.")
-
-            if can_start_early:
-                seek_time = early_start_time
-                logging.info(f"Using early start time for sub #{self.subtitle_index + 1}")
-
-            final_seek_time = max(0, seek_time)
-            # --- END IMPROVEMENT ---
-
-            logging.info(
-                f"Repeating subtitle #{self.subtitle_index + 1} (Rep {self.repeat_counter}/{max_repeats - 1}). Seeking to {self.ms_to_time_str(final_seek_time)}.")
-
-            # 1. Pause the video for a smooth seek.
-            self.player.set_pause(1)
-            # 2. Seek to the calculated time.
-            self.player.set_time(int(final_seek_time))
-
-            # 3. Schedule the video to play again after a 1-second delay.
-            def delayed_resume():
-                self.resume_timer_id = None
-                if self.player and not self.is_paused:
-                    logging.info("Resuming play after 1s delay.")
-                    self.player.play()
-
-            self.resume_timer_id = self.master.after(1500, delayed_resume)
-
-        else:  # Done repeating, advance to the next subtitle.
-            if self.subtitle_index < len(self.subtitles) - 1:
-                self.subtitle_index += 1
-                self.repeat_counter = 0
-                logging.info(f"Advancing to subtitle #{self.subtitle_index + 1}")
+    def on_resume(self, seek_latency_ms, timed_out):
+        if timed_out:
+            logging.warning(f"No seek confirmation from VLC after {seek_latency_ms:.0f} ms; resuming anyway.")
+        else:
+            logging.info(f"Seek landed after {seek_latency_ms:.0f} ms; resuming.")
+
+    def on_index_change(self, index):
+        logging.info(f"Now on subtitle #{index + 1}")
+
+    def on_end(self):
+        self.play_pause_btn.config(text="Play")
 
     def cancel_all_timers(self):
         """Cancels any pending repeat or resume actions."""
-        if self.repeat_timer_id:
-            self.master.after_cancel(self.repeat_timer_id)
-            self.repeat_timer_id = None
-        if self.resume_timer_id:
-            self.master.after_cancel(self.resume_timer_id)
-            self.resume_timer_id = None
+        self.engine.cancel()
 
     def load_video(self, *args):
         self.cancel_all_timers()
@@ -320,19 +271,17 @@ class VLCPlayerApp:
         self.video_path = path
         logging.info(f"Loading video: {self.video_path}")
         try:
-            media = self.vlc_instance.media_new_path(self.video_path)
-            self.player.set_media(media)
+            self.prefetcher.attach(self.video_path)
+            self.media_length_ms = 0
+            self.backend.load_media(self.video_path)
+            # Repeats seek straight onto a keyframe when one falls inside the pre-roll window
+            self.engine.planner = SeekPlanner.for_video(self.video_path)
+            self._probe_keyframes()
 
             def embed_video():
-                video_widget_id = self.video_frame.winfo_id()
-                if sys.platform == "win32":
-                    self.player.set_hwnd(video_widget_id)
-                elif sys.platform == "darwin":
-                    self.player.set_nsobject(video_widget_id)
-                else:
-                    self.player.set_xwindow(video_widget_id)
+                self.backend.attach_window(self.video_frame.winfo_id())
 
-                if self.subtitles: self._apply_processed_subtitles_to_player()
+                if self.timeline: self._apply_processed_subtitles_to_player()
                 self.play_pause()
                 self.master.focus_set()
 
@@ -344,130 +293,125 @@ class VLCPlayerApp:
 
     def load_subtitle(self, *args):
         path = filedialog.askopenfilename(title="Select Subtitle File",
-                                          filetypes=(("SubRip files", "*.srt"), ("All files", "*.*")))
+                                          filetypes=(SUBTITLE_FILETYPES, ("All files", "*.*")))
         if not path: return
 
         self.subtitle_path = path
         logging.info(f"Loading subtitle: {self.subtitle_path}")
-        encodings_to_try = ['utf-8', 'utf-8-sig', 'cp1252', 'iso-8859-1', 'cp1251']
-        loaded_subs = None
-        for encoding in encodings_to_try:
-            try:
-                loaded_subs = pysrt.open(self.subtitle_path, encoding=encoding)
-                logging.info(f"Successfully loaded subtitle with encoding: {encoding}")
-                break
-            except Exception as e:
-                logging.debug(f"Failed to load subtitle with encoding {encoding}: {e}")
-                continue
-
-        if loaded_subs:
-            self.original_subtitles = loaded_subs
+        timeline = None
+        error = None
+        try:
+            # Served from the binary cache when valid; otherwise read, decoded and parsed once
+            timeline, encoding = load_timeline(self.subtitle_path)
+            logging.info(f"Successfully loaded subtitle: {len(timeline)} cues ({'from cache' if encoding == 'cache' else f'encoding: {encoding}'})")
+        except Exception as e:
+            error = e
+            logging.error(f"Failed to load subtitle: {e}", exc_info=True)
+
+        if timeline:
+            self.timeline = timeline
             self.apply_settings_btn.config(state=tk.NORMAL)
-            self.process_subtitles()
+            if self._apply_processed_subtitles_to_player():
+                self.process_subtitles()
         else:
-            logging.error("Could not decode subtitle file with any common encodings.")
-            messagebox.showerror("Subtitle Error", "Could not decode subtitle file. Please try converting it to UTF-8.")
+            # Decoding always succeeds (detect_encoding falls back), so this is a parse error or an empty file
+            reason = f"Error: {error}" if error else "The file contains no cues."
+            logging.error(f"Could not parse subtitle file or it has no cues. {reason}")
+            messagebox.showerror("Subtitle Error", f"Could not parse the subtitle file, or it has no cues.\n{reason}")
         self.master.focus_set()
 
     def process_subtitles(self):
-        if not self.original_subtitles:
-            logging.warning("process_subtitles called with no original subtitles loaded.")
+        """
+        Applies the delay setting. The delay is only stored as the timeline offset and
+        handed to VLC's native SPU delay, so no cues are copied and no file is rewritten.
+        """
+        if not self.timeline:
+            logging.warning("process_subtitles called with no subtitles loaded.")
             messagebox.showwarning("Warning", "No subtitles loaded to process.")
             return
 
         self.cancel_all_timers()
         logging.info("Processing subtitles with new settings...")
-        processed_subs = self.original_subtitles.copy()
         info_message = "Settings applied."
 
         try:
             delay_sec = float(self.sync_delay_entry.get())
-            if delay_sec != 0.0:
-                processed_subs.shift(seconds=delay_sec)
-                logging.info(f"Shifted all cues by {delay_sec} seconds (relative to original).")
-                info_message = f"Subtitles shifted by {delay_sec} seconds."
         except ValueError:
             logging.error(f"Invalid delay value entered: '{self.sync_delay_entry.get()}'")
             messagebox.showerror("Error", "Invalid delay value. Please enter a number.")
             return
 
-        self.subtitles = processed_subs
-        if self._apply_processed_subtitles_to_player():
-            messagebox.showinfo("Settings Applied", info_message)
+        self.timeline.offset_ms = int(round(delay_sec * 1000))
+        self._apply_subtitle_delay_to_player()
+        if delay_sec != 0.0:
+            logging.info(f"Shifted all cues by {delay_sec} seconds (relative to original).")
+            info_message = f"Subtitles shifted by {delay_sec} seconds."
+        messagebox.showinfo("Settings Applied", info_message)
 
-        self.is_repeating_active = True
         self.skip_subtitle_btn.config(state=tk.NORMAL)
         self.prev_subtitle_btn.config(state=tk.NORMAL)
-        self.update_subtitle_index_on_seek(self.player.get_time())
+        self.engine.set_timeline(self.timeline)
+        self.prefetcher.configure()
+        self._probe_keyframes()
         self.master.focus_set()
 
+    def _probe_keyframes(self):
+        """Has ffprobe read only the repeats' seek windows of the video, not the whole file."""
+        if self.video_path:
+            self.engine.probe_keyframes(self.video_path,
+                                        on_probed=lambda count: logging.info(f"Probed {count} keyframes."))
+
     def _apply_processed_subtitles_to_player(self):
-        if not self.subtitles or not self.temp_sub_path: return False
+        """Hands VLC the cues as SRT text; it is written to tmpfs once per content, not on every apply."""
+        if not self.timeline: return False
         try:
-            self.subtitles.save(self.temp_sub_path, encoding='utf-8')
-            if self.player.get_media():
-                if self.player.video_set_subtitle_file(self.temp_sub_path) == 0:
-                    logging.info(f"Processed subtitles set from temporary file: {self.temp_sub_path}")
+            if self.backend.has_media():
+                if self.backend.load_subtitle_text(format_srt(self.timeline)):
+                    logging.info("Processed subtitles set.")
                 else:
-                    logging.warning(f"VLC failed to set subtitle file: {self.temp_sub_path}. Trying slave method.")
-                    self.player.add_slave(vlc.MediaSlaveType.subtitle, self.temp_sub_path, True)
+                    logging.warning("VLC failed to set the processed subtitles.")
+                self._apply_subtitle_delay_to_player()
             return True
         except Exception as e:
-            logging.error(f"Failed to save or set temporary subtitle file: {e}", exc_info=True)
-            messagebox.showerror("File Error", f"Could not create temporary subtitle file.\nError: {e}")
+            logging.error(f"Failed to set processed subtitles: {e}", exc_info=True)
+            messagebox.showerror("File Error", f"Could not hand the subtitles to VLC.\nError: {e}")
             return False
 
+    def _apply_subtitle_delay_to_player(self):
+        """Shifts VLC's subtitle track by the timeline offset via its SPU delay (microseconds)."""
+        if not self.timeline or not self.backend.has_media(): return
+        if not self.backend.set_subtitle_delay(self.timeline.offset_ms):
+            logging.warning(f"VLC rejected subtitle delay of {self.timeline.offset_ms} ms.")
+
     def play_pause(self, *args):
-        if self.resume_timer_id is not None:
-            logging.info("Ignoring play/pause command during 1s repeat delay.")
+        if self.engine.resume_timer_id is not None:
+            logging.info("Ignoring play/pause command while a repeat seek is landing.")
             return
-        if not self.player.get_media():
+        if not self.backend.has_media():
             self.load_video()
             return
 
-        self.cancel_all_timers()
-        if self.player.is_playing():
-            self.player.pause()
-            self.play_pause_btn.config(text="Play")
-            self.is_paused = True
-        else:
-            if self.is_paused: self.update_subtitle_index_on_seek(self.player.get_time())
-            self.player.play()
-            self.play_pause_btn.config(text="Pause")
-            self.is_paused = False
+        self.engine.toggle()
+        self.play_pause_btn.config(text="Play" if self.engine.paused else "Pause")
         self.master.focus_set()
 
     def stop(self, *args):
-        self.cancel_all_timers()
-        self.player.stop()
+        self.engine.stop()
         self.play_pause_btn.config(text="Play")
-        self.is_paused = True
-        self.progress_slider.set(0)
-        self.time_label.config(text="00:00:00")
-        self.subtitle_index = 0
-        self.repeat_counter = 0
+        self.view.set('progress', 0)
+        self.view.set('time', "00:00:00")
         self.master.focus_set()
 
     def skip_subtitle(self, *args):
-        if not self.subtitles or self.subtitle_index >= len(self.subtitles) - 1: return
-        self.cancel_all_timers()
-        self.subtitle_index += 1
-        self.repeat_counter = 0
-        next_cue = self.subtitles[self.subtitle_index]
-        self.player.set_time(max(0, int(next_cue.start.ordinal)))
-        if self.is_paused: self.play_pause()
-        logging.info(f"Skipped to subtitle #{self.subtitle_index + 1}")
+        self.engine.skip(1)
+        self.play_pause_btn.config(text="Play" if self.engine.paused else "Pause")
+        logging.info(f"Skipped to subtitle #{self.engine.index + 1}")
         self.master.focus_set()
 
     def previous_subtitle(self, *args):
-        if not self.subtitles or self.subtitle_index <= 0: return
-        self.cancel_all_timers()
-        self.subtitle_index -= 1
-        self.repeat_counter = 0
-        prev_cue = self.subtitles[self.subtitle_index]
-        self.player.set_time(max(0, int(prev_cue.start.ordinal)))
-        if self.is_paused: self.play_pause()
-        logging.info(f"Went back to subtitle #{self.subtitle_index + 1}")
+        self.engine.skip(-1)
+        self.play_pause_btn.config(text="Play" if self.engine.paused else "Pause")
+        logging.info(f"Went back to subtitle #{self.engine.index + 1}")
         self.master.focus_set()
 
     def toggle_fullscreen(self, *args):
@@ -477,26 +421,11 @@ class VLCPlayerApp:
         self.master.focus_set()
 
     def update_fullscreen_button(self):
-        self.fullscreen_btn.config(text="Exit Fullscreen" if self.is_fullscreen else "Fullscreen")
+        # Fullscreen only changes through toggle_fullscreen(), so Tk need not be polled for it
+        self.view.set('fullscreen', "Exit Fullscreen" if self.is_fullscreen else "Fullscreen")
 
     def set_volume(self, value):
-        if self.player: self.player.audio_set_volume(int(value))
-
-    def update_subtitle_index_on_seek(self, time_ms):
-        if not self.subtitles: return
-        self.cancel_all_timers()
-        for i, cue in enumerate(self.subtitles):
-            if cue.start.ordinal <= time_ms < cue.end.ordinal:
-                self.subtitle_index = i
-                self.repeat_counter = 0
-                return
-        for i, cue in enumerate(self.subtitles):
-            if cue.start.ordinal > time_ms:
-                self.subtitle_index = i
-                self.repeat_counter = 0
-                return
-        self.subtitle_index = len(self.subtitles) - 1 if self.subtitles else 0
-        self.repeat_counter = 0
+        if self.player: self.backend.set_volume(value)
 
     def ms_to_time_str(self, ms):
         if ms < 0: ms = 0
@@ -528,16 +457,11 @@ if __name__ == "__main__":
 
     def on_closing():
         logging.info("Window closed by user. Stopping player.")
+        if hasattr(app, 'view'):
+            logging.info(f"UI made {app.view.tcl_calls} Tcl calls ({app.view.calls_per_minute():.0f}/min).")
         if app.player:
-            app.player.stop()
-            app.player.release()
-        # Clean up temp file
-        if app.temp_sub_path and os.path.exists(app.temp_sub_path):
-            try:
-                os.remove(app.temp_sub_path)
-                logging.info(f"Removed temporary subtitle file: {app.temp_sub_path}")
-            except OSError as e:
-                logging.error(f"Error removing temp file on exit: {e}")
+            app.prefetcher.close()
+            app.backend.release()
         root.destroy()
         logging.info("================== Application Closed ==================")
 
@@ -1,11 +1,13 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox
 import vlc
-import pysrt
 import os
 import sys
 import logging
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from subtitle_core import SUBTITLE_FILETYPES, load_timeline
+
 
 os.add_dll_directory(r"C:\Program Files\VideoLAN\VLC")
 
@@ -37,8 +39,7 @@ class VLCPlayerApp:
         # --- State Variables ---
         self.video_path = None
         self.subtitle_path = None
-        self.subtitles = None
-        self.original_subtitles = None
+        self.timeline = None
         self.subtitle_index = 0
         self.repeat_counter = 0
         self.is_paused = True
@@ -49,7 +50,7 @@ class VLCPlayerApp:
         self.resume_timer_id = None
         self.last_current_time_str = ""
         self.last_duration_time_str = ""
-        self.currently_displayed_subtitle_index = None
+        self.currently_displayed_subtitle_indices = None
 
         try:
             logging.info("Initializing VLC instance...")
@@ -207,10 +208,9 @@ class VLCPlayerApp:
                     '-fullscreen'); self.update_fullscreen_button()
                 self.update_tkinter_subtitle(current_time)
                 if self.is_repeating_active and not self.is_paused and self.repeat_timer_id is None:
-                    if self.subtitles and self.subtitle_index < len(self.subtitles):
-                        current_cue = self.subtitles[self.subtitle_index]
-                        if current_cue.start.ordinal <= current_time < current_cue.end.ordinal:
-                            time_until_end = int(current_cue.end.ordinal) - current_time
+                    if self.timeline and self.subtitle_index < len(self.timeline):
+                        if self.timeline.contains(self.subtitle_index, current_time):
+                            time_until_end = self.timeline.end(self.subtitle_index) - current_time
                             self.repeat_timer_id = self.master.after(time_until_end, self.handle_repeat)
             self.master.after(20, self.update_ui)
         except tk.TclError:
@@ -219,14 +219,12 @@ class VLCPlayerApp:
             logging.error(f"Unexpected error in UI loop: {e}", exc_info=True)
 
     def update_tkinter_subtitle(self, current_time_ms):
-        if not self.subtitles: return
-        active_index = None
-        for i, cue in enumerate(self.subtitles):
-            if cue.start.ordinal <= current_time_ms < cue.end.ordinal: active_index = i; break
-        if active_index != self.currently_displayed_subtitle_index:
-            new_text = self.subtitles[active_index].text if active_index is not None else ""
+        if not self.timeline: return
+        active_indices = tuple(self.timeline.active_at(current_time_ms))
+        if active_indices != self.currently_displayed_subtitle_indices:
+            new_text = "\n".join(self.timeline.texts[i] for i in active_indices)
             self.subtitle_display_label.config(text=new_text)
-            self.currently_displayed_subtitle_index = active_index
+            self.currently_displayed_subtitle_indices = active_indices
 
     def handle_repeat(self):
         self.repeat_timer_id = None
@@ -236,16 +234,15 @@ class VLCPlayerApp:
         except (ValueError, tk.TclError):
             max_repeats = 1
 
-        if not self.subtitles or self.subtitle_index >= len(self.subtitles): return
+        if not self.timeline or self.subtitle_index >= len(self.timeline): return
 
-        current_cue = self.subtitles[self.subtitle_index]
         if self.repeat_counter < max_repeats - 1:
             self.repeat_counter += 1
             logging.info(f"Repeating subtitle #{self.subtitle_index + 1} (Repeat {self.repeat_counter}/{max_repeats})")
             ### UPDATED (Fix) ###: Call seek without resetting the repeat counter.
-            self._perform_seek_with_pause(int(current_cue.start.ordinal), resume_delay_ms=750,
+            self._perform_seek_with_pause(self.timeline.start(self.subtitle_index), resume_delay_ms=750,
                                           update_repeat_counter=False)
-        elif self.subtitle_index < len(self.subtitles) - 1:
+        elif self.subtitle_index < len(self.timeline) - 1:
             self.subtitle_index += 1
             self.repeat_counter = 0
             logging.info(f"Advancing to subtitle #{self.subtitle_index + 1}")
@@ -285,44 +282,38 @@ class VLCPlayerApp:
 
     def load_subtitle(self, *args):
         path = filedialog.askopenfilename(title="Select Subtitle File",
-                                          filetypes=(("SubRip files", "*.srt"), ("All files", "*.*")))
+                                          filetypes=(SUBTITLE_FILETYPES, ("All files", "*.*")))
         if not path: return
         self.subtitle_path = path
         logging.info(f"Loading subtitle: {self.subtitle_path}")
-        encodings_to_try = ['utf-8', 'utf-8-sig', 'cp1252', 'iso-8859-1', 'cp1251']
-        loaded_subs = None
-        for encoding in encodings_to_try:
-            try:
-                loaded_subs = pysrt.open(self.subtitle_path, encoding=encoding);
-                break
-            except UnicodeDecodeError:
-                continue
-            except Exception as e:
-                logging.error(f"Error parsing subtitle file: {e}", exc_info=True); messagebox.showerror(
-                    "Subtitle Error", f"Could not parse subtitle file.\nError: {e}"); return
-        if loaded_subs:
-            self.original_subtitles = loaded_subs;
+        try:
+            timeline, encoding = load_timeline(self.subtitle_path)
+            logging.info(f"Subtitle loaded: {len(timeline)} cues ({'from cache' if encoding == 'cache' else f'encoding: {encoding}'})")
+        except Exception as e:
+            logging.error(f"Error parsing subtitle file: {e}", exc_info=True); messagebox.showerror(
+                "Subtitle Error", f"Could not parse subtitle file.\nError: {e}"); return
+        if timeline:
+            self.timeline = timeline
             self.apply_settings_btn.config(state=tk.NORMAL);
             self.process_subtitles()
         else:
-            logging.error("Could not decode subtitle file with any common encodings.");
-            messagebox.showerror("Subtitle Error", "Could not decode subtitle file. Try converting to UTF-8.")
+            logging.error("Subtitle file has no cues.")
+            messagebox.showerror("Subtitle Error", "The subtitle file contains no cues.")
         self.master.focus_set()
 
     def process_subtitles(self):
-        if not self.original_subtitles: messagebox.showwarning("Warning", "No subtitles loaded."); return
+        if not self.timeline: messagebox.showwarning("Warning", "No subtitles loaded."); return
         self.cancel_all_scheduled_actions()
         logging.info("Processing subtitles with new settings...")
-        processed_subs = self.original_subtitles.copy();
         info_message = "Settings applied."
         try:
             delay_sec = float(self.sync_delay_entry.get())
-            if delay_sec != 0.0: processed_subs.shift(
-                seconds=delay_sec); info_message = f"Subtitles shifted by {delay_sec} seconds."
+            if delay_sec != 0.0: info_message = f"Subtitles shifted by {delay_sec} seconds."
         except ValueError:
             logging.error(f"Invalid delay value: '{self.sync_delay_entry.get()}'"); messagebox.showerror("Error",
                                                                                                          "Invalid delay value."); return
-        self.subtitles = processed_subs;
+        # Delay is applied lazily by the timeline lookups; the cues are left untouched
+        self.timeline.offset_ms = int(round(delay_sec * 1000))
         messagebox.showinfo("Settings Applied", info_message);
         self.is_repeating_active = True
         self.skip_subtitle_btn.config(state=tk.NORMAL);
@@ -357,17 +348,15 @@ class VLCPlayerApp:
         self.master.focus_set()
 
     def skip_subtitle(self, *args):
-        if not self.subtitles or self.subtitle_index >= len(self.subtitles) - 1: return
+        if not self.timeline or self.subtitle_index >= len(self.timeline) - 1: return
         self.subtitle_index += 1
-        next_cue = self.subtitles[self.subtitle_index]
-        self._perform_seek_with_pause(int(next_cue.start.ordinal))
+        self._perform_seek_with_pause(self.timeline.start(self.subtitle_index))
         self.master.focus_set()
 
     def previous_subtitle(self, *args):
-        if not self.subtitles or self.subtitle_index <= 0: return
+        if not self.timeline or self.subtitle_index <= 0: return
         self.subtitle_index -= 1
-        prev_cue = self.subtitles[self.subtitle_index]
-        self._perform_seek_with_pause(int(prev_cue.start.ordinal))
+        self._perform_seek_with_pause(self.timeline.start(self.subtitle_index))
         self.master.focus_set()
 
     def toggle_fullscreen(self, *args):
@@ -384,17 +373,9 @@ class VLCPlayerApp:
 
     ### UPDATED (Fix) ###: Can now selectively reset the counter.
     def update_subtitle_index_on_seek(self, time_ms, reset_counter=True):
-        if not self.subtitles: return
+        if not self.timeline: return
         self.cancel_all_scheduled_actions()
-        new_index = self.subtitle_index
-        for i, cue in enumerate(self.subtitles):
-            if cue.start.ordinal <= time_ms < cue.end.ordinal: new_index = i; break
-        else:  # This 'else' belongs to the 'for' loop, runs if no 'break'
-            for i, cue in enumerate(self.subtitles):
-                if cue.start.ordinal > time_ms: new_index = i; break
-            else:
-                new_index = len(self.subtitles) - 1 if self.subtitles else 0
-        self.subtitle_index = new_index
+        self.subtitle_index = self.timeline.index_at(time_ms, hint=self.subtitle_index)
         if reset_counter:
             self.repeat_counter = 0
 
@@ -0,0 +1,27 @@
+from subtitle_core.ass import iter_ass_cues
+from subtitle_core.backend import MpvBackend, PlayerBackend, VlcBackend
+from subtitle_core.bridge import TkBridge
+from subtitle_core.clock import PlaybackClock
+from subtitle_core.encoding import decode_subtitle_bytes, detect_encoding, read_subtitle_text
+from subtitle_core.intervals import IntervalIndex
+from subtitle_core.keyframes import KeyframeIndex, SeekPlanner, probe_keyframes
+from subtitle_core.loader import SUBTITLE_EXTENSIONS, SUBTITLE_FILETYPES, detect_format, load_timeline
+from subtitle_core.markup import parse_ass_text, parse_html_markup, to_srt_markup
+from subtitle_core.plan import RepeatPlan
+from subtitle_core.prefetch import CuePrefetcher, RangePrefetcher
+from subtitle_core.repeat import REPEAT_PRESETS, RepeatEngine, RepeatSettings, TkHost
+from subtitle_core.scheduler import CueScheduler
+from subtitle_core.simulation import SimulatedBackend, VirtualClock
+from subtitle_core.srt import format_srt, iter_srt_cues, stream_srt, write_srt
+from subtitle_core.timeline import CueTimeline
+from subtitle_core.viewmodel import ViewModel
+from subtitle_core.vtt import iter_vtt_cues
+
+__all__ = [
+    'CuePrefetcher', 'CueScheduler', 'CueTimeline', 'IntervalIndex', 'KeyframeIndex', 'MpvBackend', 'PlaybackClock',
+    'PlayerBackend', 'REPEAT_PRESETS', 'RangePrefetcher', 'RepeatEngine', 'RepeatPlan', 'RepeatSettings',
+    'SUBTITLE_EXTENSIONS', 'SUBTITLE_FILETYPES', 'SeekPlanner', 'SimulatedBackend', 'TkBridge', 'TkHost', 'ViewModel',
+    'VirtualClock', 'VlcBackend', 'decode_subtitle_bytes', 'detect_encoding', 'detect_format', 'format_srt',
+    'iter_ass_cues', 'iter_srt_cues', 'iter_vtt_cues', 'load_timeline', 'parse_ass_text', 'parse_html_markup',
+    'probe_keyframes', 'read_subtitle_text', 'stream_srt', 'to_srt_markup', 'write_srt',
+]
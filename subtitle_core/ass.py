@@ -0,0 +1,45 @@
+from subtitle_core.srt import _iter_lines
+
+# Field order of v4+ scripts, used when [Events] has no Format line
+DEFAULT_EVENT_FORMAT = ('layer', 'start', 'end', 'style', 'name',
+                        'marginl', 'marginr', 'marginv', 'effect', 'text')
+
+
+def ass_time_to_ms(value):
+    """Converts an ASS timestamp (H:MM:SS.cc) to milliseconds."""
+    hours, minutes, seconds = value.strip().split(':')
+    whole, _, fraction = seconds.partition('.')
+    return ((int(hours) * 60 + int(minutes)) * 60 + int(whole)) * 1000 + int(fraction.ljust(3, '0')[:3])
+
+
+def iter_ass_cues(source, encoding='utf-8'):
+    """
+    Lazily yields (start_ms, end_ms, text) cues from ASS/SSA data, one line at a time.
+
+    Accepts the same sources as iter_srt_cues. Only Dialogue lines of the
+    [Events] section are read, split according to its Format line; the text
+    keeps its override tags for subtitle_core.markup.parse_ass_text.
+    """
+    in_events = False
+    fields = DEFAULT_EVENT_FORMAT
+    for line in _iter_lines(source, encoding):
+        stripped = line.strip()
+        if stripped.startswith('['):
+            in_events = stripped.lower() == '[events]'
+            continue
+        if not in_events:
+            continue
+        key, _, value = stripped.partition(':')
+        key = key.lower()
+        if key == 'format':
+            fields = tuple(field.strip().lower() for field in value.split(','))
+        elif key == 'dialogue':
+            values = value.lstrip().split(',', len(fields) - 1)
+            if len(values) != len(fields):
+                continue
+            event = dict(zip(fields, values))
+            try:
+                start, end = ass_time_to_ms(event['start']), ass_time_to_ms(event['end'])
+            except (KeyError, ValueError):
+                continue
+            yield start, end, event.get('text', '')
@@ -0,0 +1,385 @@
+import pathlib
+import sys
+
+from subtitle_core.delivery import remove_subtitle_file, subtitle_digest, subtitle_file_for
+
+SEEK_TOLERANCE_MS = 500  # a VLC time report this close to the seek target, and nearer it than the pre-seek
+                         # position (a stale report can be within tolerance on short jumps), means it landed
+MPV_MIN_BACK_BYTES = 50 * 1024 * 1024  # mpv's default demuxer-max-back-bytes
+
+
+class PlayerBackend:
+    """
+    The player operations the repeat engine needs, with push-style events.
+
+    Drivers report playback to listeners added with add_listener() instead of
+    being polled. A listener may implement any of:
+
+      on_time(time_ms)            playback time advanced (possibly coarsely)
+      on_pause(paused)            the player paused or resumed
+      on_seek_complete(time_ms)   a seek landed at time_ms
+      on_loop(remaining)          an A-B loop jumped back; `remaining` loops are left
+      on_end()                    end of media
+
+    Events may arrive on the driver's own thread, so listeners must not touch
+    Tk from them directly. Times are integer milliseconds throughout.
+    `fast_seek` is True if seek(..., precise=False) really lands on a keyframe,
+    `ab_loop` if the player can loop a span by itself (set_ab_loop()).
+    """
+    name = 'backend'
+    fast_seek = False
+    ab_loop = False
+
+    def __init__(self):
+        self._listeners = []
+        self._subtitle_digest = None  # of the text last loaded with load_subtitle_text()
+
+    def add_listener(self, listener):
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _emit(self, event, *args):
+        for listener in tuple(self._listeners):
+            handler = getattr(listener, event, None)
+            if handler is not None:
+                handler(*args)
+
+    # --- Controls ---
+    def load_media(self, path):
+        raise NotImplementedError
+
+    def attach_window(self, window_id):
+        raise NotImplementedError
+
+    def play(self):
+        raise NotImplementedError
+
+    def pause(self):
+        raise NotImplementedError
+
+    def stop(self):
+        raise NotImplementedError
+
+    def seek(self, time_ms, precise=True):
+        raise NotImplementedError
+
+    def set_volume(self, volume):
+        raise NotImplementedError
+
+    def load_subtitle(self, path):
+        raise NotImplementedError
+
+    def load_subtitle_text(self, text):
+        """
+        Loads SRT `text` as the subtitle track, in place of one loaded before.
+        Unchanged text is not reloaded, so re-applying settings costs nothing.
+        """
+        digest = subtitle_digest(text)
+        if digest == self._subtitle_digest:
+            return True
+        if not self._load_subtitle_text(text, digest):
+            return False
+        self._subtitle_digest = digest
+        return True
+
+    def _load_subtitle_text(self, text, digest):
+        return self.load_subtitle(subtitle_file_for(text, digest))
+
+    def set_subtitle_delay(self, delay_ms):
+        raise NotImplementedError
+
+    def set_ab_loop(self, a_ms, b_ms, count):
+        """Has the player jump from b_ms back to a_ms `count` more times, then play on."""
+        raise NotImplementedError
+
+    def clear_ab_loop(self):
+        raise NotImplementedError
+
+    def set_cache_window(self, back_ms, ahead_ms):
+        """
+        Asks the player to keep `back_ms` of played and `ahead_ms` of upcoming media cached.
+        Ignored where there is no such cache: libVLC keeps no back buffer, and raising its
+        file-caching only lengthens the pre-buffering of every seek.
+        """
+        pass
+
+    def release(self):
+        pass
+
+    # --- State ---
+    def has_media(self):
+        raise NotImplementedError
+
+    def time_ms(self):
+        raise NotImplementedError
+
+    def duration_ms(self):
+        raise NotImplementedError
+
+    def is_paused(self):
+        raise NotImplementedError
+
+    def rate(self):
+        return 1.0
+
+    def subtitle_track_count(self):
+        """Number of subtitle tracks the player holds, or None if it cannot tell."""
+        return None
+
+
+class VlcBackend(PlayerBackend):
+    """
+    python-vlc driver. libVLC's own events are forwarded as they come: TimeChanged
+    as on_time, Playing/Paused as on_pause, EndReached as on_end. libVLC has no
+    seek-complete event, so the first time report near a pending seek target
+    stands in for one.
+    """
+    name = 'vlc'
+
+    def __init__(self, args=(), instance=None):
+        super().__init__()
+        import vlc
+        self._vlc = vlc
+        self.instance = instance or vlc.Instance(list(args))
+        self.player = self.instance.media_player_new()
+        self._seek_target = None
+        self._seek_from = None
+        self._subtitle_file = None
+        events = self.player.event_manager()
+        events.event_attach(vlc.EventType.MediaPlayerTimeChanged, self._on_time_changed)
+        events.event_attach(vlc.EventType.MediaPlayerPaused, lambda event: self._emit('on_pause', True))
+        events.event_attach(vlc.EventType.MediaPlayerPlaying, lambda event: self._emit('on_pause', False))
+        events.event_attach(vlc.EventType.MediaPlayerEndReached, lambda event: self._emit('on_end'))
+
+    def _on_time_changed(self, event):
+        time_ms = event.u.new_time
+        self._emit('on_time', time_ms)
+        target, origin = self._seek_target, self._seek_from
+        if (target is not None and abs(time_ms - target) <= SEEK_TOLERANCE_MS
+                and (origin is None or abs(time_ms - target) <= abs(time_ms - origin))):
+            self._seek_target = None
+            self._emit('on_seek_complete', time_ms)
+
+    def load_media(self, path):
+        media = self.instance.media_new_path(path)
+        self.player.set_media(media)
+        self._subtitle_digest = None
+
+    def attach_window(self, window_id):
+        if sys.platform == "win32":
+            self.player.set_hwnd(window_id)
+        elif sys.platform == "darwin":
+            self.player.set_nsobject(window_id)
+        else:
+            self.player.set_xwindow(window_id)
+
+    def play(self):
+        self.player.play()
+
+    def pause(self):
+        self.player.set_pause(1)
+
+    def stop(self):
+        self._seek_target = None
+        self.player.stop()
+
+    def seek(self, time_ms, precise=True):
+        # libVLC 3 has no fast-seek flag; set_time() always decodes up to the target
+        self._seek_from = self.player.get_time()
+        self._seek_target = max(0, int(time_ms))
+        self.player.set_time(self._seek_target)
+
+    def set_volume(self, volume):
+        self.player.audio_set_volume(int(volume))
+
+    def load_subtitle(self, path):
+        # libVLC returns a success flag here
+        if self.player.video_set_subtitle_file(path):
+            return True
+        # Newer libVLC builds drop video_set_subtitle_file in favour of slaves
+        uri = pathlib.Path(path).resolve().as_uri()
+        return self.player.add_slave(self._vlc.MediaSlaveType.subtitle, uri, True) == 0
+
+    def _load_subtitle_text(self, text, digest):
+        # libVLC only loads subtitle files: this one lives on tmpfs, named by content digest. VLC
+        # parses it whole on load and cannot drop a track, so the new one is just selected.
+        path = subtitle_file_for(text, digest)
+        if not self.load_subtitle(path):
+            return False
+        if self._subtitle_file not in (None, path):
+            remove_subtitle_file(self._subtitle_file)
+        self._subtitle_file = path
+        return True
+
+    def set_subtitle_delay(self, delay_ms):
+        return self.player.video_set_spu_delay(int(delay_ms) * 1000) == 0
+
+    def release(self):
+        self.player.stop()
+        self.player.release()
+        if self._subtitle_file is not None:
+            remove_subtitle_file(self._subtitle_file)
+            self._subtitle_file = None
+
+    def has_media(self):
+        return self.player.get_media() is not None
+
+    def time_ms(self):
+        return self.player.get_time()
+
+    def duration_ms(self):
+        return self.player.get_length()
+
+    def is_paused(self):
+        return not self.player.is_playing()
+
+    def rate(self):
+        return self.player.get_rate() or 1.0
+
+    def subtitle_track_count(self):
+        return max(0, self.player.video_get_spu_count())
+
+
+class MpvBackend(PlayerBackend):
+    """
+    python-mpv driver. Property observers push time-pos and pause changes, and
+    mpv's playback-restart event is the seek-complete signal. A-B loops use
+    mpv's own ab-loop-a/ab-loop-b/ab-loop-count, which mpv counts down itself.
+    Subtitles loaded through the backend occupy a single track, tracked by its
+    sid: loading again reloads or replaces it, and delays only set sub-delay,
+    so a long tuning session never grows mpv's track list.
+    Extra keyword arguments are passed to mpv.MPV().
+    """
+    name = 'mpv'
+    fast_seek = True
+    ab_loop = True
+
+    def __init__(self, player=None, **options):
+        super().__init__()
+        if player is None:
+            import mpv
+            player = mpv.MPV(**options)
+        self.player = player
+        self._subtitle_sid = None  # the one track added by load_subtitle() or load_subtitle_text()
+        self._subtitle_source = None  # its path or text digest
+        self.player.observe_property('time-pos', self._on_time_pos)
+        self.player.observe_property('pause', lambda name, value: self._emit('on_pause', bool(value)))
+        self.player.observe_property('eof-reached', self._on_eof_reached)
+        self.player.observe_property('ab-loop-count', self._on_ab_loop_count)
+        self.player.event_callback('playback-restart')(self._on_playback_restart)
+
+    def _on_time_pos(self, name, value):
+        if value is not None:
+            self._emit('on_time', int(value * 1000))
+
+    def _on_eof_reached(self, name, value):
+        if value:
+            self._emit('on_end')
+
+    def _on_ab_loop_count(self, name, value):
+        if isinstance(value, int):  # 'inf' when not counting down
+            self._emit('on_loop', value)
+
+    def _on_playback_restart(self, event):
+        time_pos = self.player.time_pos
+        if time_pos is not None:
+            self._emit('on_seek_complete', int(time_pos * 1000))
+
+    def load_media(self, path):
+        self.player.loadfile(path, 'replace')
+        self._subtitle_digest = None
+        self._subtitle_sid = None
+        self._subtitle_source = None
+
+    def attach_window(self, window_id):
+        self.player.wid = str(window_id)
+
+    def play(self):
+        self.player.pause = False
+
+    def pause(self):
+        self.player.pause = True
+
+    def stop(self):
+        self.player.command('stop')
+
+    def seek(self, time_ms, precise=True):
+        self.player.seek(max(0, time_ms) / 1000.0, reference='absolute',
+                         precision='exact' if precise else 'keyframes')
+
+    def set_volume(self, volume):
+        self.player.volume = int(volume)
+
+    def load_subtitle(self, path):
+        self._subtitle_digest = None
+        if self._subtitle_sid is not None and path == self._subtitle_source:
+            self.player.sub_reload(self._subtitle_sid)  # re-read in place, keeping the sid
+            return True
+        self.player.sub_add(path, 'select')
+        self._replace_subtitle_track(path)
+        return True
+
+    def _load_subtitle_text(self, text, digest):
+        # memory:// hands mpv the text itself, no file involved
+        self.player.sub_add('memory://' + text, 'select', 'Subtitles')
+        self._replace_subtitle_track(digest)
+        return True
+
+    def _replace_subtitle_track(self, source):
+        """Adopts the track just added and selected, removing the one it replaces."""
+        previous, self._subtitle_sid = self._subtitle_sid, self.player.sid
+        self._subtitle_source = source
+        if previous is not None and previous != self._subtitle_sid:
+            self.player.sub_remove(previous)
+
+    def set_subtitle_delay(self, delay_ms):
+        self.player.sub_delay = delay_ms / 1000.0
+        return True
+
+    def set_ab_loop(self, a_ms, b_ms, count):
+        self.player.ab_loop_count = count
+        self.player.ab_loop_a = max(0, a_ms) / 1000.0
+        self.player.ab_loop_b = b_ms / 1000.0
+
+    def clear_ab_loop(self):
+        self.player.ab_loop_a = 'no'
+        self.player.ab_loop_b = 'no'
+
+    def set_cache_window(self, back_ms, ahead_ms):
+        # The back buffer is sized in bytes: estimate them from the file's average bitrate, twice over
+        # for variable bitrate. demuxer-seekable-cache lets seeks inside the buffer skip the disk.
+        # cache-secs is left alone: mpv's default read-ahead is far longer than any repeat window.
+        back_bytes = MPV_MIN_BACK_BYTES
+        duration, file_size = self.player.duration, self.player.file_size
+        if duration and file_size:
+            back_bytes = max(back_bytes, int(2 * file_size * back_ms / (duration * 1000)))
+        self.player.cache = 'yes'
+        self.player.demuxer_seekable_cache = 'yes'
+        self.player.demuxer_max_back_bytes = str(back_bytes)
+
+    def release(self):
+        self.player.terminate()
+
+    def has_media(self):
+        return self.player.duration is not None
+
+    def time_ms(self):
+        time_pos = self.player.time_pos
+        return int(time_pos * 1000) if time_pos is not None else 0
+
+    def duration_ms(self):
+        duration = self.player.duration
+        return int(duration * 1000) if duration else 0
+
+    def is_paused(self):
+        return bool(self.player.pause)
+
+    def rate(self):
+        return self.player.speed or 1.0
+
+    def subtitle_track_count(self):
+        return sum(1 for track in self.player.track_list if track.get('type') == 'sub')
@@ -0,0 +1,266 @@
+"""
+Repeat-accuracy benchmark: replays subtitle files through each player's repeat
+logic on the simulated backend and reports how precisely lines are repeated.
+
+    python -m subtitle_core.benchmark [--json results.json] [files or dirs ...]
+
+Per repeat cycle it measures
+  overshoot_ms   how far playback ran past the cue end before the seek-back
+  preroll_err_ms lead-in actually replayed before the cue start, minus the
+                 variant's nominal pre-roll (negative: the pre-roll was cut)
+  cycle_ms       simulated time from the seek-back until the cue start plays again
+and per file the number of seeks and the harness' own wall time.
+"""
+import argparse
+import bisect
+import json
+import os
+import random
+import sys
+import time
+
+from subtitle_core.clock import PlaybackClock
+from subtitle_core.keyframes import KeyframeIndex, SeekPlanner
+from subtitle_core.loader import SUBTITLE_EXTENSIONS, load_timeline
+from subtitle_core.repeat import REPEAT_PRESETS, RepeatEngine
+from subtitle_core.simulation import SimulatedBackend, VirtualClock
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_DIRS = ('data', 'clean_data', 'sample')
+
+# How each player's backend behaves: libVLC reports time every ~250 ms, seeks
+# slowly and always decodes up to the target; mpv's time-pos observer fires about
+# once per frame and it can seek straight to a keyframe.
+BACKEND_PROFILES = {
+    'vlc': {'update_interval_ms': 250, 'seek_latency_ms': 150, 'fast_seek': False},
+    'mpv': {'update_interval_ms': 42, 'seek_latency_ms': 60, 'fast_seek': True},
+}
+
+# Variant script -> (repeat preset, backend profile). Each preset models its script's own
+# trigger and resume: stable_v4 waits a fixed 750 ms after the seek, beta polls every 100 ms.
+VARIANTS = {
+    'player.py': ('player', 'vlc'),
+    'via_mpv.py': ('via_mpv', 'mpv'),
+    'stable/stable_v4.py': ('stable_v4', 'vlc'),
+    'mpv_based/alpha.py': ('alpha', 'mpv'),
+    'mpv_based/beta.py': ('beta', 'mpv'),
+}
+
+METRICS = ('overshoot_ms', 'preroll_err_ms', 'cycle_ms')
+PERCENTILES = (50, 90, 99)
+
+
+def find_subtitle_files(paths):
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.lower().endswith(SUBTITLE_EXTENSIONS):
+                    found.append(os.path.join(path, name))
+        elif os.path.isfile(path):
+            found.append(path)
+    return found
+
+
+def random_stalls(duration_ms, every_ms, stall_ms, seed):
+    """Decode stalls at random media times, on average one per `every_ms`."""
+    if not every_ms:
+        return []
+    rng = random.Random(seed)
+    return [(rng.uniform(0, duration_ms), stall_ms) for _ in range(int(duration_ms // every_ms))]
+
+
+class _CycleProbe:
+    """Backend and engine listener recording what each repeat cycle did."""
+
+    def __init__(self, clock, backend, engine):
+        self.clock = clock
+        self.backend = backend
+        self.engine = engine
+        self.repeats = []  # (cue index, index into backend.seeks)
+        self.landed_at = []
+        self.resumed_at = []
+        self.ended = False
+
+    def on_repeat(self, index, count):
+        if not self.engine.settings.native_loop:
+            self.repeats.append((index, len(self.backend.seeks)))
+
+    def on_loop(self, remaining):
+        # The backend loops by itself: its seek-back follows this event
+        self.repeats.append((self.engine.index, len(self.backend.seeks)))
+
+    def on_seek_complete(self, time_ms):
+        self.landed_at.append(self.clock.time_ms)
+
+    def on_pause(self, paused):
+        if not paused:
+            self.resumed_at.append(self.clock.time_ms)
+
+    def on_end(self):
+        self.ended = True
+
+
+def _first_after(times, at):
+    i = bisect.bisect_left(times, at)
+    return times[i] if i < len(times) else None
+
+
+def run_file(timeline, preset, profile, repeats=2, stall_every_ms=0, stall_ms=400, seed=0,
+             gop_ms=0, keyframe_seeks=False, ab_loop=False):
+    """Plays `timeline` to the end with one variant; returns per-cycle samples and counters."""
+    settings = REPEAT_PRESETS[preset]
+    if ab_loop and profile == 'mpv':
+        settings = settings.copy(native_loop=True)
+    duration_ms = timeline.end(len(timeline) - 1) + 2000
+    clock = VirtualClock()
+    backend = SimulatedBackend(clock, duration_ms=duration_ms,
+                               stalls=random_stalls(duration_ms, stall_every_ms, stall_ms, seed),
+                               keyframe_interval_ms=gop_ms, **BACKEND_PROFILES[profile])
+    planner = SeekPlanner(KeyframeIndex(backend.keyframe_times(), probed=True)) if keyframe_seeks else None
+    engine = RepeatEngine(backend, clock, settings, repeats=repeats, clock=PlaybackClock(monotonic=clock.monotonic),
+                          planner=planner)
+    probe = _CycleProbe(clock, backend, engine)
+    backend.add_listener(probe)
+    engine.add_listener(probe)
+
+    started = time.perf_counter()
+    engine.set_timeline(timeline)
+    engine.play()
+    # Repeats at most double the running time; the margin covers pauses and stalls
+    clock.run_until(duration_ms * (repeats + 1) + 60000, stop=lambda: probe.ended)
+    wall_s = time.perf_counter() - started
+
+    samples = {metric: [] for metric in METRICS}
+    for index, seek_number in probe.repeats:
+        if seek_number >= len(backend.seeks):
+            continue
+        issued_at, from_ms, target_ms = backend.seeks[seek_number]
+        start_ms = timeline.start(index)
+        samples['overshoot_ms'].append(from_ms - timeline.end(index))
+        samples['preroll_err_ms'].append((start_ms - target_ms) - settings.pre_roll_ms)
+        landed_at = _first_after(probe.landed_at, issued_at)
+        if landed_at is None:
+            continue
+        playing_at = landed_at
+        if settings.pause_for_seek and not settings.native_loop:
+            resumed_at = _first_after(probe.resumed_at, issued_at)
+            if resumed_at is None:
+                continue
+            playing_at = max(landed_at, resumed_at)
+        samples['cycle_ms'].append(playing_at + max(0, start_ms - target_ms) / backend.rate() - issued_at)
+    return samples, {'cues': len(timeline), 'repeat_cycles': len(probe.repeats), 'seeks': len(backend.seeks),
+                     'fast_seeks': planner.fast_seeks if planner and backend.fast_seek else 0,
+                     'wall_s': round(wall_s, 4), 'completed': probe.ended}
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def summarize(values):
+    values = sorted(values)
+    if not values:
+        return {'count': 0}
+    summary = {'count': len(values), 'mean': round(sum(values) / len(values), 2)}
+    for pct in PERCENTILES:
+        summary[f'p{pct}'] = round(percentile(values, pct), 2)
+    summary['max'] = round(values[-1], 2)
+    return summary
+
+
+def run_benchmark(paths, variants=None, repeats=2, stall_every_ms=0, stall_ms=400, seed=0,
+                  gop_ms=0, keyframe_seeks=False, ab_loop=False):
+    files = find_subtitle_files(paths)
+    timelines = {}
+    for path in files:
+        try:
+            timeline, _ = load_timeline(path, use_cache=False)
+        except Exception as e:
+            print(f"Skipping {path}: {e}", file=sys.stderr)
+            continue
+        if timeline:
+            timelines[os.path.relpath(path, REPO_DIR)] = timeline
+
+    results = {'config': {'repeats': repeats, 'stall_every_ms': stall_every_ms, 'stall_ms': stall_ms,
+                          'seed': seed, 'gop_ms': gop_ms, 'keyframe_seeks': keyframe_seeks, 'ab_loop': ab_loop,
+                          'backend_profiles': BACKEND_PROFILES},
+               'variants': {}}
+    for variant in variants or VARIANTS:
+        preset, profile = VARIANTS[variant]
+        pooled = {metric: [] for metric in METRICS}
+        per_file = {}
+        for path, timeline in timelines.items():
+            samples, counters = run_file(timeline, preset, profile, repeats, stall_every_ms, stall_ms, seed,
+                                         gop_ms, keyframe_seeks, ab_loop)
+            for metric in METRICS:
+                pooled[metric].extend(samples[metric])
+            counters.update({metric: summarize(samples[metric]) for metric in METRICS})
+            per_file[path] = counters
+        total_cycles = sum(counters['repeat_cycles'] for counters in per_file.values())
+        total_wall_s = sum(counters['wall_s'] for counters in per_file.values())
+        results['variants'][variant] = {
+            'preset': preset,
+            'backend': profile,
+            'summary': dict({metric: summarize(pooled[metric]) for metric in METRICS},
+                            seeks=sum(counters['seeks'] for counters in per_file.values()),
+                            fast_seeks=sum(counters['fast_seeks'] for counters in per_file.values()),
+                            repeat_cycles=total_cycles,
+                            wall_s=round(total_wall_s, 4),
+                            wall_ms_per_cycle=round(total_wall_s * 1000 / total_cycles, 4) if total_cycles else None),
+            'files': per_file,
+        }
+    return results
+
+
+def format_table(results):
+    columns = ['mean'] + [f'p{pct}' for pct in PERCENTILES] + ['max']
+    lines = [f"{'variant':<22}{'metric':<16}" + ''.join(f"{name:>10}" for name in columns)]
+    for variant, result in results['variants'].items():
+        summary = result['summary']
+        for metric in METRICS:
+            stats = summary[metric]
+            cells = ''.join(f"{stats.get(name, '-'):>10}" for name in columns)
+            lines.append(f"{variant:<22}{metric:<16}{cells}")
+        lines.append(f"{'':<22}{'seeks':<16}{summary['seeks']:>10}   ({summary['fast_seeks']} fast), "
+                     f"cycles {summary['repeat_cycles']}, "
+                     f"wall {summary['wall_s']} s ({summary['wall_ms_per_cycle']} ms/cycle)")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('paths', nargs='*', help="subtitle files or directories (default: data, clean_data, sample)")
+    parser.add_argument('--variant', action='append', choices=sorted(VARIANTS), help="limit to these variants")
+    parser.add_argument('--repeats', type=int, default=2, help="times each cue is played")
+    parser.add_argument('--stall-every', type=int, default=0, metavar='MS',
+                        help="insert a decode stall on average every MS of media")
+    parser.add_argument('--stall-ms', type=int, default=400, help="length of each decode stall")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--gop', type=int, default=0, metavar='MS',
+                        help="keyframe interval of the simulated video (0: every frame is a keyframe)")
+    parser.add_argument('--keyframe-seeks', action='store_true',
+                        help="plan repeat seeks onto keyframes inside the pre-roll window")
+    parser.add_argument('--ab-loop', action='store_true',
+                        help="let the mpv variants loop cues with mpv's native A-B loop")
+    parser.add_argument('--json', metavar='PATH', help="write the full results here ('-' for stdout)")
+    args = parser.parse_args(argv)
+
+    paths = args.paths or [os.path.join(REPO_DIR, name) for name in DEFAULT_DIRS]
+    results = run_benchmark(paths, args.variant, args.repeats, args.stall_every, args.stall_ms, args.seed,
+                            args.gop, args.keyframe_seeks, args.ab_loop)
+    if args.json == '-':
+        json.dump(results, sys.stdout, indent=2)
+        return
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    print(format_table(results))
+
+
+if __name__ == "__main__":
+    main()
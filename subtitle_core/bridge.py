@@ -0,0 +1,64 @@
+from collections import deque
+
+FRAME_MS = 16  # the pump runs about once per 60 Hz frame
+
+_EMPTY = object()
+
+
+class TkBridge:
+    """
+    Carries values from player threads (mpv's event thread, polling threads)
+    to the Tk thread.
+
+    Producers call put(key, value) from any thread. Each key is a single
+    latest-value slot, so a burst of updates collapses to the newest one and
+    nothing queues up behind a busy UI. A single after() pump on the Tk thread
+    drains the slots once per `interval_ms` and calls the handler bound to each
+    key with (key, value), so the UI does at most one update per key per frame
+    however fast the player publishes. Events that must not collapse go through
+    call(func), a FIFO of callables the pump runs in order after the slots.
+    Storing and popping a dict item, and appending to and popping from a
+    deque, are single atomic operations, so neither side takes a lock and no
+    producer thread ever makes a Tcl call.
+    """
+
+    def __init__(self, widget, interval_ms=FRAME_MS):
+        self.widget = widget
+        self.interval_ms = interval_ms
+        self._handlers = {}
+        self._slots = {}
+        self._calls = deque()
+        self._pump_id = None
+
+    def bind(self, key, handler):
+        self._handlers[key] = handler
+
+    def put(self, key, value):
+        self._slots[key] = value
+
+    def call(self, func):
+        """Runs func() on the Tk thread at the next pump; callable from any thread."""
+        self._calls.append(func)
+
+    def observer(self, key=None):
+        """A python-mpv property observer putting the property's value into slot `key` (default: its name)."""
+        return lambda name, value: self.put(key or name, value)
+
+    def start(self):
+        if self._pump_id is None:
+            self._pump_id = self.widget.after(self.interval_ms, self._pump)
+
+    def stop(self):
+        if self._pump_id is not None:
+            self.widget.after_cancel(self._pump_id)
+            self._pump_id = None
+
+    def _pump(self):
+        # Re-armed first, so a failing handler cannot stop the pump
+        self._pump_id = self.widget.after(self.interval_ms, self._pump)
+        for key, handler in tuple(self._handlers.items()):
+            value = self._slots.pop(key, _EMPTY)
+            if value is not _EMPTY:
+                handler(key, value)
+        while self._calls:
+            self._calls.popleft()()
@@ -0,0 +1,95 @@
+import hashlib
+import mmap
+import os
+import struct
+from array import array
+
+from subtitle_core.timeline import CueTimeline
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".subtitle_repeater_cache")
+CACHE_MAGIC = b'SRCT'
+CACHE_VERSION = 3
+
+# magic, version, source size, source mtime (ns), source content digest, cue count, text blob length,
+# styling span count, style name blob length
+HEADER = struct.Struct('<4sIqq32sIQII')
+
+
+def content_digest(data):
+    """Digest of the raw subtitle bytes, stored in (and checked against) the cache header."""
+    return hashlib.blake2b(data, digest_size=32).digest()
+
+
+def cache_path_for(path, cache_dir=CACHE_DIR):
+    """One blob per subtitle path; size, mtime and content are checked from the header on load."""
+    name = hashlib.blake2b(os.path.abspath(path).encode('utf-8'), digest_size=16).hexdigest()
+    return os.path.join(cache_dir, name + '.bin')
+
+
+def load_cached_timeline(path, stat, digest, cache_dir=CACHE_DIR):
+    """
+    Returns the cached CueTimeline for `path`, or None on a miss.
+
+    The blob is mmapped and its arrays copied straight out of it, so a hit
+    costs no text decoding of the subtitle and no regex work. It is only
+    used if the source's size, mtime and content digest all still match.
+    """
+    blob_path = cache_path_for(path, cache_dir)
+    try:
+        with open(blob_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as blob:
+            if len(blob) < HEADER.size:
+                return None
+            (magic, version, size, mtime_ns, cached_digest, count, text_length,
+             span_count, style_length) = HEADER.unpack_from(blob)
+            if (magic != CACHE_MAGIC or version != CACHE_VERSION or size != stat.st_size
+                    or mtime_ns != stat.st_mtime_ns or cached_digest != digest):
+                return None
+            offset = HEADER.size
+            starts, ends, span_table = array('q'), array('q'), array('q')
+            item = starts.itemsize
+            if len(blob) != offset + (2 * count + 4 * span_count) * item + text_length + style_length:
+                return None
+            starts.frombytes(blob[offset:offset + count * item])
+            offset += count * item
+            ends.frombytes(blob[offset:offset + count * item])
+            offset += count * item
+            span_table.frombytes(blob[offset:offset + 4 * span_count * item])
+            offset += 4 * span_count * item
+            texts = blob[offset:offset + text_length].decode('utf-8').split('\0') if count else []
+            offset += text_length
+            style_names = blob[offset:offset + style_length].decode('utf-8').split('\0')
+            spans = [[] for _ in range(count)]
+            for i in range(0, len(span_table), 4):
+                cue, start, end, style_id = span_table[i:i + 4]
+                spans[cue].append((start, end, style_names[style_id]))
+    except (OSError, ValueError, IndexError, struct.error):
+        return None
+    return CueTimeline(starts, ends, texts, [tuple(cue_spans) for cue_spans in spans])
+
+
+def store_timeline(path, stat, digest, timeline, cache_dir=CACHE_DIR):
+    """Writes the timeline's blob atomically. A failure only costs the next load a re-parse."""
+    blob_path = cache_path_for(path, cache_dir)
+    text_blob = '\0'.join(text.replace('\0', '') for text in timeline.texts).encode('utf-8')
+    # Spans are flattened to (cue, start, end, style id) rows over a small table of style names
+    style_ids = {}
+    span_table = array('q')
+    for cue, cue_spans in enumerate(timeline.spans):
+        for start, end, style in cue_spans:
+            span_table.extend((cue, start, end, style_ids.setdefault(style, len(style_ids))))
+    style_blob = '\0'.join(style_ids).encode('utf-8')
+    temp_path = blob_path + '.tmp'
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(temp_path, 'wb') as f:
+            f.write(HEADER.pack(CACHE_MAGIC, CACHE_VERSION, stat.st_size, stat.st_mtime_ns, digest,
+                                len(timeline), len(text_blob), len(span_table) // 4, len(style_blob)))
+            f.write(timeline.starts.tobytes())
+            f.write(timeline.ends.tobytes())
+            f.write(span_table.tobytes())
+            f.write(text_blob)
+            f.write(style_blob)
+        os.replace(temp_path, blob_path)
+        return True
+    except OSError:
+        return False
@@ -0,0 +1,96 @@
+import threading
+import time
+
+RESYNC_MS = 1000  # a report this far from the prediction is a seek or a stall: jump straight to it
+SLEW = 0.5        # share of a smaller disagreement corrected per report
+
+
+class PlaybackClock:
+    """
+    Playback time interpolated between the backend's coarse time reports.
+
+    libVLC's get_time() and its TimeChanged event only move in steps of up to
+    ~250 ms on many builds. Each report is stamped with time.monotonic() and the
+    time in between is extrapolated at the playback rate. A report that
+    disagrees with the prediction pulls it part of the way back (`slew`), so
+    event jitter does not make the clock jump, or all the way if it is more
+    than `resync_ms` off, as after a seek or a decode stall. Readings never go
+    backwards except on such a resync.
+
+    After a seek or a resume the clock holds still until the backend reports
+    again, so it never runs ahead of a player that is still buffering.
+    update() may be called from the backend's event thread.
+    """
+
+    def __init__(self, rate=1.0, resync_ms=RESYNC_MS, slew=SLEW, monotonic=time.monotonic):
+        self._lock = threading.Lock()
+        self.monotonic = monotonic
+        self.rate = rate
+        self.resync_ms = resync_ms
+        self.slew = slew
+        self.paused = True
+        self.drift_ms = 0.0  # how far the last report was from the prediction
+        self._anchor_ms = 0.0
+        self._anchor_at = monotonic()
+        self._awaiting_report = True
+        self._last_report = None
+        self._last_reading = 0.0
+
+    def _predict(self, at):
+        if self.paused or self._awaiting_report:
+            return self._anchor_ms
+        return self._anchor_ms + (at - self._anchor_at) * 1000.0 * self.rate
+
+    def _anchor(self, time_ms, at):
+        self._anchor_ms = float(time_ms)
+        self._anchor_at = at
+
+    def update(self, time_ms, at=None):
+        """Feeds a time report (ms) from the backend."""
+        if time_ms is None or time_ms < 0:
+            return
+        at = self.monotonic() if at is None else at
+        with self._lock:
+            if time_ms == self._last_report:
+                return  # the coarse clock has not stepped yet
+            self._last_report = time_ms
+            predicted = self._predict(at)
+            self.drift_ms = time_ms - predicted
+            if self.paused or self._awaiting_report or abs(self.drift_ms) > self.resync_ms:
+                self._anchor(time_ms, at)
+                self._last_reading = float(time_ms)
+                self._awaiting_report = False
+            else:
+                self._anchor(predicted + self.drift_ms * self.slew, at)
+
+    def seek(self, time_ms, at=None):
+        """Re-anchors on a seek target; the clock then waits for the backend to confirm it."""
+        at = self.monotonic() if at is None else at
+        with self._lock:
+            self._anchor(time_ms, at)
+            self._last_reading = float(time_ms)
+            self._last_report = None
+            self._awaiting_report = True
+
+    def set_paused(self, paused, at=None):
+        at = self.monotonic() if at is None else at
+        with self._lock:
+            if paused == self.paused:
+                return
+            self._anchor(self._predict(at), at)
+            self.paused = paused
+            if not paused:
+                self._awaiting_report = True
+
+    def set_rate(self, rate, at=None):
+        at = self.monotonic() if at is None else at
+        with self._lock:
+            self._anchor(self._predict(at), at)
+            self.rate = rate if rate and rate > 0 else 1.0
+
+    def now_ms(self):
+        """Current interpolated playback time in ms."""
+        with self._lock:
+            reading = max(self._predict(self.monotonic()), self._last_reading)
+            self._last_reading = reading
+        return int(reading)
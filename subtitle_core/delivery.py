@@ -0,0 +1,39 @@
+import hashlib
+import os
+import tempfile
+
+# tmpfs where there is one, so handing a player subtitle text never touches the disk
+SUBTITLE_SHM_DIR = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+SUBTITLE_FILE_PREFIX = 'subtitle-repeater-'
+
+
+def subtitle_digest(text):
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def subtitle_file_for(text, digest=None, directory=SUBTITLE_SHM_DIR):
+    """
+    Path of a file holding `text`, for players that only load subtitles from
+    files. The file is named after the content digest and written atomically,
+    once: unchanged text is served from the file already there.
+    """
+    digest = digest or subtitle_digest(text)
+    path = os.path.join(directory, f"{SUBTITLE_FILE_PREFIX}{digest}.srt")
+    if not os.path.exists(path):
+        fd, temp_path = tempfile.mkstemp(prefix=SUBTITLE_FILE_PREFIX, suffix='.tmp', dir=directory)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(text)
+            os.replace(temp_path, path)
+        except OSError:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+    return path
+
+
+def remove_subtitle_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -0,0 +1,67 @@
+import codecs
+
+# Checked longest first so a UTF-32 BOM is not mistaken for UTF-16.
+BOMS = (
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+SAMPLE_SIZE = 64 * 1024
+
+
+def detect_encoding(data, sample_size=SAMPLE_SIZE):
+    """
+    Guesses the encoding of raw subtitle bytes from a BOM or a sample.
+
+    Without a BOM the sample is tried as UTF-8 (incrementally, so a character cut
+    at the sample boundary is fine). Otherwise a byte-frequency heuristic picks
+    between the single-byte code pages: Cyrillic text in cp1251 is dominated by
+    bytes 0xC0-0xFF, while Western text in cp1252 only has the odd accented letter.
+    """
+    for bom, encoding in BOMS:
+        if data.startswith(bom):
+            return encoding
+
+    sample = data[:sample_size]
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=len(sample) == len(data))
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+
+    high_letters = sum(1 for byte in sample if byte >= 0xC0)
+    ascii_letters = sum(1 for byte in sample if 0x41 <= byte <= 0x5A or 0x61 <= byte <= 0x7A)
+    if high_letters > ascii_letters:
+        return 'cp1251'
+    # cp1252 leaves a handful of bytes undefined; latin-1 maps all of them
+    try:
+        sample.decode('cp1252')
+        return 'cp1252'
+    except UnicodeDecodeError:
+        return 'iso-8859-1'
+
+
+def decode_subtitle_bytes(data):
+    """Decodes subtitle bytes once with the detected encoding. Returns (text, encoding)."""
+    encoding = detect_encoding(data)
+    try:
+        return data.decode(encoding), encoding
+    except UnicodeDecodeError:
+        pass
+    # The sample looked fine but the rest of the file does not: guess again from all of it
+    encoding = detect_encoding(data, sample_size=len(data))
+    try:
+        return data.decode(encoding), encoding
+    except UnicodeDecodeError:
+        # latin-1 maps every byte
+        return data.decode('iso-8859-1'), 'iso-8859-1'
+
+
+def read_subtitle_text(path):
+    """Reads a subtitle file in one go and decodes it once. Returns (text, encoding)."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    return decode_subtitle_bytes(data)
@@ -0,0 +1,69 @@
+class IntervalIndex:
+    """
+    Static centered interval tree over the cues of a CueTimeline.
+
+    Answers "which cues are on screen at t" in O(log n + k), so overlapping
+    cues (dialogue over a sign, two speakers) are all returned and the lookup
+    cost does not grow with the length of the file. A cue counts as active
+    from `lead_ms` before its start until its end.
+    Nodes are stored in flat lists; the tree is rebuilt only when the timeline is.
+    """
+
+    def __init__(self, timeline, lead_ms=0):
+        self.lead_ms = lead_ms
+        self._starts = [start - lead_ms for start in timeline.starts]
+        self._ends = list(timeline.ends)
+        # Per node: center, overlapping cues by ascending start, same cues by descending end, left, right
+        self._centers = []
+        self._by_start = []
+        self._by_end = []
+        self._left = []
+        self._right = []
+        # Empty or inverted cues are never on screen; dropping them also guarantees every node keeps a cue
+        self._root = self._build([i for i in range(len(self._starts)) if self._ends[i] > self._starts[i]])
+
+    def _build(self, indices):
+        if not indices:
+            return -1
+        starts, ends = self._starts, self._ends
+        points = sorted(starts[i] for i in indices)
+        center = points[len(points) // 2]
+        left, right, overlapping = [], [], []
+        for i in indices:
+            if ends[i] <= center:
+                left.append(i)
+            elif starts[i] > center:
+                right.append(i)
+            else:
+                overlapping.append(i)
+
+        node = len(self._centers)
+        self._centers.append(center)
+        self._by_start.append(sorted(overlapping, key=lambda i: starts[i]))
+        self._by_end.append(sorted(overlapping, key=lambda i: ends[i], reverse=True))
+        self._left.append(-1)
+        self._right.append(-1)
+        self._left[node] = self._build(left)
+        self._right[node] = self._build(right)
+        return node
+
+    def active_at(self, time_ms):
+        """Returns the indices of every cue active at `time_ms`, in timeline order."""
+        found = []
+        starts, ends = self._starts, self._ends
+        node = self._root
+        while node != -1:
+            if time_ms < self._centers[node]:
+                for i in self._by_start[node]:
+                    if starts[i] > time_ms:
+                        break
+                    found.append(i)
+                node = self._left[node]
+            else:
+                for i in self._by_end[node]:
+                    if ends[i] <= time_ms:
+                        break
+                    found.append(i)
+                node = self._right[node]
+        found.sort()
+        return found
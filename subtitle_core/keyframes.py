@@ -0,0 +1,231 @@
+import bisect
+import hashlib
+import os
+import shutil
+import struct
+import subprocess
+import threading
+from array import array
+
+from subtitle_core.cache import CACHE_DIR
+
+KEYFRAME_MAGIC = b'SRKF'
+KEYFRAME_VERSION = 1
+KEYFRAME_SLACK_MS = 500  # a keyframe may start the pre-roll this much earlier than asked
+PROBE_TIMEOUT_S = 120
+PROBE_BATCH = 100  # seek windows per ffprobe run, keeping the command line short
+
+# magic, version, video size, video mtime (ns), keyframe count, probed (1) or only learned (0)
+HEADER = struct.Struct('<4sIqqIB')
+
+
+def probe_keyframes(path, ffprobe=None, timeout=PROBE_TIMEOUT_S, intervals=None):
+    """
+    Lists the keyframe times (ms) of the first video stream with ffprobe, or
+    returns None if ffprobe is not installed or fails. Nothing is decoded, but
+    every packet header of the file is demuxed, which reads the whole file:
+    seconds on a local SSD, much longer on a large file or a slow or network
+    disk, competing with playback for I/O. `intervals`, a list of
+    (start_ms, end_ms), limits the probe to those spans of the file.
+    """
+    ffprobe = ffprobe or shutil.which('ffprobe')
+    if not ffprobe:
+        return None
+    command = [ffprobe, '-v', 'error', '-select_streams', 'v:0',
+               '-show_entries', 'packet=pts_time,flags', '-of', 'csv=p=0']
+    if intervals:
+        command += ['-read_intervals', ','.join(f"{max(0, start) / 1000:.3f}%{end / 1000:.3f}"
+                                                for start, end in intervals)]
+    command.append(path)
+    try:
+        output = subprocess.run(command, capture_output=True, text=True, timeout=timeout, check=True).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    times = set()
+    for line in output.splitlines():
+        pts_time, _, flags = line.partition(',')
+        if 'K' in flags:
+            try:
+                times.add(int(round(float(pts_time) * 1000)))
+            except ValueError:
+                continue
+    return sorted(times)
+
+
+def keyframe_cache_path(video_path, cache_dir=CACHE_DIR):
+    name = hashlib.blake2b(os.path.abspath(video_path).encode('utf-8'), digest_size=16).hexdigest()
+    return os.path.join(cache_dir, 'keyframes', name + '.bin')
+
+
+class KeyframeIndex:
+    """
+    Sorted keyframe times (ms) of one video.
+
+    Filled by probe_keyframes() when ffprobe is available, and otherwise learned
+    one at a time from where fast (keyframe) seeks land. `probed` is True once
+    the list is known to be complete. Writers replace `times` wholesale, so a
+    background probe never leaves readers with a half-built array.
+    """
+
+    def __init__(self, times=(), probed=False):
+        self.times = array('q', sorted(set(times)))
+        self.probed = probed
+
+    def __len__(self):
+        return len(self.times)
+
+    def add(self, time_ms):
+        times = self.times
+        i = bisect.bisect_left(times, time_ms)
+        if i == len(times) or times[i] != time_ms:
+            times = array('q', times)
+            times.insert(i, int(time_ms))
+            self.times = times
+
+    def closest_in(self, earliest_ms, latest_ms, target_ms):
+        """The keyframe in [earliest_ms, latest_ms] closest to `target_ms`, or None."""
+        times = self.times
+        lo = bisect.bisect_left(times, earliest_ms)
+        hi = bisect.bisect_right(times, latest_ms)
+        if lo >= hi:
+            return None
+        i = min(max(bisect.bisect_left(times, target_ms, lo, hi), lo), hi - 1)
+        if i > lo and abs(times[i - 1] - target_ms) <= abs(times[i] - target_ms):
+            i -= 1
+        return times[i]
+
+    @classmethod
+    def load(cls, video_path, cache_dir=CACHE_DIR):
+        """The cached index for `video_path`, or an empty one if none matches the file."""
+        try:
+            stat = os.stat(video_path)
+            with open(keyframe_cache_path(video_path, cache_dir), 'rb') as f:
+                blob = f.read()
+            magic, version, size, mtime_ns, count, probed = HEADER.unpack_from(blob)
+            if (magic == KEYFRAME_MAGIC and version == KEYFRAME_VERSION and size == stat.st_size
+                    and mtime_ns == stat.st_mtime_ns):
+                times = array('q')
+                times.frombytes(blob[HEADER.size:HEADER.size + count * times.itemsize])
+                if len(times) == count:
+                    return cls(times, bool(probed))
+        except (OSError, struct.error):
+            pass
+        return cls()
+
+    def save(self, video_path, cache_dir=CACHE_DIR):
+        """Writes the index atomically; a failure only costs the next session a re-probe."""
+        blob_path = keyframe_cache_path(video_path, cache_dir)
+        temp_path = blob_path + '.tmp'
+        times = self.times
+        try:
+            stat = os.stat(video_path)
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            with open(temp_path, 'wb') as f:
+                f.write(HEADER.pack(KEYFRAME_MAGIC, KEYFRAME_VERSION, stat.st_size, stat.st_mtime_ns,
+                                    len(times), int(self.probed)))
+                f.write(times.tobytes())
+            os.replace(temp_path, blob_path)
+            return True
+        except OSError:
+            return False
+
+
+class SeekPlanner:
+    """
+    Chooses how a repeat seeks back to its pre-roll.
+
+    A precise seek to `start - pre_roll` makes the decoder start at the
+    keyframe before it and decode forward to the target, which on long-GOP
+    files is a visible stall on every pass. If a keyframe falls inside the
+    allowed pre-roll window (after the previous cue, at most `slack_ms`
+    earlier than asked, not after the cue start) the planner seeks straight
+    to it with a fast seek, which costs no forward decoding. Otherwise it
+    falls back to the precise seek.
+
+    Keyframes come from the cache, from probe_windows() (ffprobe limited to
+    the repeats' seek windows) and from where fast seeks land. A probe of the
+    whole file reads all of it, so for_video() only runs one when asked to.
+    """
+
+    def __init__(self, keyframes=None, slack_ms=KEYFRAME_SLACK_MS):
+        self.keyframes = keyframes if keyframes is not None else KeyframeIndex()
+        self.slack_ms = slack_ms
+        self.fast_seeks = 0
+        self.precise_seeks = 0
+        self._probed_windows = set()
+        self._lock = threading.Lock()  # serializes merges into `keyframes` from probe threads
+
+    @classmethod
+    def for_video(cls, video_path, cache_dir=CACHE_DIR, probe=False, on_probed=None):
+        """
+        Planner for `video_path` from its cached keyframes. With `probe` and no
+        complete cached list, the whole file is probed with ffprobe on a background
+        thread and the result cached; `on_probed(count)` is then called from that
+        thread. Without it, use probe_windows() once the cues are known.
+        """
+        planner = cls(KeyframeIndex.load(video_path, cache_dir))
+        if probe and not planner.keyframes.probed:
+            def run_probe():
+                times = probe_keyframes(video_path)
+                if times:
+                    with planner._lock:
+                        planner.keyframes = KeyframeIndex(times, probed=True)
+                        planner.keyframes.save(video_path, cache_dir)
+                if on_probed is not None:
+                    on_probed(len(times) if times else 0)
+            threading.Thread(target=run_probe, daemon=True).start()
+        return planner
+
+    def window(self, target_ms, earliest_ms, latest_ms):
+        """The span plan() looks for a keyframe in."""
+        return max(earliest_ms, target_ms - self.slack_ms), latest_ms
+
+    def plan(self, target_ms, earliest_ms, latest_ms):
+        """Returns (seek_ms, precise) for a seek asked to land at `target_ms` within the window."""
+        keyframe = self.keyframes.closest_in(*self.window(target_ms, earliest_ms, latest_ms), target_ms)
+        if keyframe is not None:
+            self.fast_seeks += 1
+            return keyframe, False
+        self.precise_seeks += 1
+        return target_ms, True
+
+    def learn(self, time_ms):
+        """Records where a fast seek landed: by definition, a keyframe."""
+        with self._lock:
+            if not self.keyframes.probed:
+                self.keyframes.add(time_ms)
+
+    def probe_windows(self, video_path, windows, cache_dir=CACHE_DIR, on_probed=None):
+        """
+        Probes the keyframes inside `windows` ((start_ms, end_ms) spans, see window())
+        on a background thread, so only those parts of the file are read. Windows
+        already holding a keyframe, or probed before, are skipped. The keyframes
+        found are merged into the index and cached; `on_probed(count)` is then
+        called from that thread.
+        """
+        if self.keyframes.probed:
+            return
+        windows = [(start, end) for start, end in windows
+                   if end >= start and (start, end) not in self._probed_windows
+                   and self.keyframes.closest_in(start, end, start) is None]
+        if not windows:
+            return
+        self._probed_windows.update(windows)
+
+        def run_probe():
+            found = []
+            for batch in range(0, len(windows), PROBE_BATCH):
+                times = probe_keyframes(video_path, intervals=windows[batch:batch + PROBE_BATCH])
+                if times is None:
+                    break
+                found.extend(times)
+            if found:
+                with self._lock:
+                    self.keyframes = KeyframeIndex(list(self.keyframes.times) + found, self.keyframes.probed)
+                    self.keyframes.save(video_path, cache_dir)
+            if on_probed is not None:
+                on_probed(len(found))
+        threading.Thread(target=run_probe, daemon=True).start()
+
+    def save(self, video_path, cache_dir=CACHE_DIR):
+        return self.keyframes.save(video_path, cache_dir)
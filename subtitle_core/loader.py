@@ -0,0 +1,70 @@
+import os
+
+from subtitle_core.ass import iter_ass_cues
+from subtitle_core.cache import CACHE_DIR, content_digest, load_cached_timeline, store_timeline
+from subtitle_core.encoding import decode_subtitle_bytes
+from subtitle_core.markup import parse_ass_text, parse_html_markup
+from subtitle_core.srt import iter_srt_cues
+from subtitle_core.timeline import CueTimeline
+from subtitle_core.vtt import iter_vtt_cues
+
+SUBTITLE_EXTENSIONS = ('.srt', '.vtt', '.ass', '.ssa')
+SUBTITLE_FILETYPES = ("Subtitle files", " ".join('*' + ext for ext in SUBTITLE_EXTENSIONS))
+
+
+def detect_format(path, text):
+    """Returns 'srt', 'vtt' or 'ass', sniffing the text first and falling back to the extension."""
+    head = text[:1024].lstrip('\ufeff \t\r\n')
+    if head.startswith('WEBVTT'):
+        return 'vtt'
+    if head.startswith('[Script Info]') or '\n[Events]' in head:
+        return 'ass'
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.vtt':
+        return 'vtt'
+    if extension in ('.ass', '.ssa'):
+        return 'ass'
+    return 'srt'
+
+
+def iter_styled_cues(text, subtitle_format):
+    """
+    Yields (start_ms, end_ms, plain_text, spans) for decoded subtitle text.
+
+    Each format is read in a single pass by its own parser, and each cue's
+    markup is split into plain text and styling spans as it goes by.
+    """
+    lines = text.splitlines()
+    if subtitle_format == 'vtt':
+        for start, end, raw in iter_vtt_cues(lines):
+            yield (start, end) + parse_html_markup(raw, unescape=True)
+    elif subtitle_format == 'ass':
+        for start, end, raw in iter_ass_cues(lines):
+            yield (start, end) + parse_ass_text(raw)
+    else:
+        for start, end, raw in iter_srt_cues(lines):
+            yield (start, end) + parse_html_markup(raw)
+
+
+def load_timeline(path, use_cache=True, cache_dir=CACHE_DIR):
+    """
+    Loads an SRT, WebVTT or ASS/SSA file into a CueTimeline, going through the on-disk cache.
+
+    The file is read once; its digest validates the cached blob. Only on a miss
+    is it decoded and parsed, and the result is cached for the next session.
+    Returns (timeline, encoding), where encoding is 'cache' on a cache hit.
+    """
+    stat = os.stat(path)
+    with open(path, 'rb') as f:
+        data = f.read()
+    digest = content_digest(data)
+    if use_cache:
+        timeline = load_cached_timeline(path, stat, digest, cache_dir)
+        if timeline is not None:
+            return timeline, 'cache'
+
+    text, encoding = decode_subtitle_bytes(data)
+    timeline = CueTimeline.from_cues(iter_styled_cues(text, detect_format(path, text)))
+    if use_cache:
+        store_timeline(path, stat, digest, timeline, cache_dir)
+    return timeline, encoding
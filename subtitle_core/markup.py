@@ -0,0 +1,188 @@
+import html
+import re
+
+# Style names double as the Tk tag names used by the overlay renderers.
+ITALIC = 'italic'
+BOLD = 'bold'
+UNDERLINE = 'underline'
+COLOR_PREFIX = 'color_'
+
+HTML_TAG_RE = re.compile(r'<(/?)([a-zA-Z]+)([^>]*)>|<[^>]*>|\{\\[^}]*\}')
+FONT_COLOR_RE = re.compile(r'color\s*=\s*["\']?([^"\'>\s]+)', re.IGNORECASE)
+ASS_BLOCK_RE = re.compile(r'\{([^}]*)\}')
+HEX_COLOR_RE = re.compile(r'#?([0-9a-f]{6})(?:[0-9a-f]{2})?|#?([0-9a-f]{3})')  # #rrggbb[aa] or #rgb
+ASS_TAG_RE = re.compile(r'\\(?:(\d?c)&H([0-9a-fA-F]+)&?|([ibu])(\d+)|(r)[^\\]*|(p)(\d+))')
+
+# WebVTT's predefined color classes
+VTT_COLORS = {'white', 'lime', 'cyan', 'red', 'yellow', 'magenta', 'blue', 'black'}
+
+
+def color_style(color):
+    # Files write hex colors without the '#' (color="ffff00") or with an alpha byte (#rrggbbaa);
+    # both become #rrggbb so the style name is a color Tk accepts. Names are kept as they are.
+    color = color.lower()
+    hex_color = HEX_COLOR_RE.fullmatch(color)
+    if hex_color:
+        color = '#' + (hex_color.group(1) or hex_color.group(2))
+    return COLOR_PREFIX + color
+
+
+def _close(spans, open_styles, style, position):
+    start = open_styles.pop(style, None)
+    if start is not None and position > start:
+        spans.append((start, position, style))
+
+
+def parse_html_markup(text, unescape=False):
+    """
+    Splits SRT/WebVTT markup into plain text and styling spans in one pass.
+
+    Returns (plain_text, spans), each span being (start, end, style) over the
+    plain text. <i>, <b>, <u>, <font color> and WebVTT color classes (<c.red>)
+    become spans; any other tag, and ASS-style {\\an8} overrides, are dropped.
+    `unescape` decodes HTML entities, which WebVTT requires and SRT does not use.
+    """
+    parts = []
+    position = 0
+    spans = []
+    open_styles = {}
+    stack = []  # styles opened per tag, so </font> or </c> closes what its opener started
+    last = 0
+    for match in HTML_TAG_RE.finditer(text):
+        chunk = text[last:match.start()]
+        last = match.end()
+        if chunk:
+            if unescape:
+                chunk = html.unescape(chunk)
+            parts.append(chunk)
+            position += len(chunk)
+        closing, name, attributes = match.groups()
+        if not name:
+            continue
+        name = name.lower()
+        if closing:
+            for i in range(len(stack) - 1, -1, -1):
+                if stack[i][0] == name:
+                    for style in stack.pop(i)[1]:
+                        _close(spans, open_styles, style, position)
+                    break
+            continue
+        styles = []
+        if name in ('i', 'b', 'u'):
+            styles.append({'i': ITALIC, 'b': BOLD, 'u': UNDERLINE}[name])
+        elif name == 'font':
+            color = FONT_COLOR_RE.search(attributes)
+            if color:
+                styles.append(color_style(color.group(1)))
+        elif name == 'c':
+            styles.extend(color_style(cls) for cls in attributes.split('.') if cls.lower() in VTT_COLORS)
+        else:
+            continue
+        styles = [style for style in styles if style not in open_styles]
+        for style in styles:
+            open_styles[style] = position
+        stack.append((name, styles))
+    chunk = text[last:]
+    if chunk:
+        if unescape:
+            chunk = html.unescape(chunk)
+        parts.append(chunk)
+        position += len(chunk)
+    for style in list(open_styles):
+        _close(spans, open_styles, style, position)
+    spans.sort()
+    return ''.join(parts), tuple(spans)
+
+
+def _ass_color(value):
+    # ASS colors are &HAABBGGRR / &HBBGGRR
+    value = value.rjust(6, '0')[-6:]
+    return f"#{value[4:6]}{value[2:4]}{value[0:2]}".lower()
+
+
+def parse_ass_text(text):
+    """
+    Splits an ASS/SSA dialogue text into plain text and styling spans in one pass.
+
+    Handles \\i, \\b, \\u, primary \\c/\\1c colors, \\r resets and drawing mode
+    (\\p), plus the \\N, \\n and \\h escapes. Other override tags are dropped.
+    """
+    parts = []
+    position = 0
+    spans = []
+    open_styles = {}
+    drawing = False
+    last = 0
+    # The trailing empty block flushes the text after the last override block
+    for match in ASS_BLOCK_RE.finditer(text + '{}'):
+        chunk = text[last:match.start()]
+        last = match.end()
+        if chunk and not drawing:
+            chunk = chunk.replace('\\N', '\n').replace('\\n', ' ').replace('\\h', '\u00a0')
+            parts.append(chunk)
+            position += len(chunk)
+        for tag in ASS_TAG_RE.finditer(match.group(1)):
+            color_tag, color, flag, flag_value, reset, draw, draw_level = tag.groups()
+            if color_tag in ('c', '1c'):
+                for style in [s for s in open_styles if s.startswith(COLOR_PREFIX)]:
+                    _close(spans, open_styles, style, position)
+                open_styles[color_style(_ass_color(color))] = position
+            elif flag:
+                style = {'i': ITALIC, 'b': BOLD, 'u': UNDERLINE}[flag]
+                if flag_value == '0':
+                    _close(spans, open_styles, style, position)
+                elif style not in open_styles:
+                    open_styles[style] = position
+            elif reset:
+                for style in list(open_styles):
+                    _close(spans, open_styles, style, position)
+            elif draw:
+                drawing = draw_level != '0'
+    for style in list(open_styles):
+        _close(spans, open_styles, style, position)
+    spans.sort()
+    return ''.join(parts), tuple(spans)
+
+
+def styled_runs(text, spans):
+    """
+    Cuts plain text at its span boundaries into (chunk, styles) runs, `styles`
+    being the tuple of style names covering the chunk. The runs of a cue can go
+    to a Tk Text widget in a single insert(index, chunk, styles, chunk, styles, ...).
+    """
+    if not spans:
+        return ((text, ()),) if text else ()
+    cuts = sorted({0, len(text)}.union(*((start, end) for start, end, _ in spans)))
+    runs = []
+    for start, end in zip(cuts, cuts[1:]):
+        if start < end:
+            styles = tuple(style for span_start, span_end, style in spans if span_start <= start and end <= span_end)
+            runs.append((text[start:end], styles))
+    return tuple(runs)
+
+
+def to_srt_markup(text, spans):
+    """Re-emits plain text plus spans as SRT markup (<i>, <b>, <u>, <font color>)."""
+    if not spans:
+        return text
+    events = {}
+    for start, end, style in spans:
+        if style.startswith(COLOR_PREFIX):
+            opening, closing = f'<font color="{style[len(COLOR_PREFIX):]}">', '</font>'
+        else:
+            tag = {ITALIC: 'i', BOLD: 'b', UNDERLINE: 'u'}.get(style)
+            if not tag:
+                continue
+            opening, closing = f'<{tag}>', f'</{tag}>'
+        events.setdefault(start, [[], []])[1].append(opening)
+        events.setdefault(end, [[], []])[0].insert(0, closing)
+    out = []
+    last = 0
+    for position in sorted(events):
+        closings, openings = events[position]
+        out.append(text[last:position])
+        out.extend(closings)
+        out.extend(openings)
+        last = position
+    out.append(text[last:])
+    return ''.join(out)
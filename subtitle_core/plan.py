@@ -0,0 +1,115 @@
+import csv
+from array import array
+
+MERGE_MAX_GAP_MS = 500  # short cues are only merged with a neighbour starting at most this much later
+
+FIELDS = ('seek_target', 'loop_end', 'repeats', 'pause_ms', 'next_index')
+STRIDE = len(FIELDS)
+
+
+class RepeatPlan:
+    """
+    What the repeat engine does at every cue, decided once for the whole file.
+
+    One packed int64 array holds per cue:
+
+      seek_target  where a repeat seeks back to: the start minus the pre-roll,
+                   dropped or clamped where it would reach into the previous cue
+      loop_end     when a pass is over: the cue end minus end_lead_ms, extended
+                   over the cues a short cue is merged with
+      repeats      how many times the cue is played (1 for cues too short to loop)
+      pause_ms     how long playback may stay paused around the seek-back
+      next_index   the cue to move on to afterwards, past cues nested inside or
+                   merged into this one; len(plan) after the last cue
+
+    All times include the timeline's delay offset, so a plan is only valid for
+    the timeline, offset, settings and repeat count it was built from (see
+    `key`); the engine rebuilds it when any of them changes.
+    """
+    __slots__ = ('entries', 'key')
+
+    def __init__(self, entries=(), key=None):
+        self.entries = array('q', entries)
+        self.key = key
+
+    @classmethod
+    def build(cls, timeline, settings, repeats, key=None):
+        count = len(timeline) if timeline else 0
+        entries = array('q', bytes(8 * STRIDE * count))
+        pre_roll_ms = settings.pre_roll_ms
+        if not settings.pause_for_seek:
+            pause_ms = 0
+        elif settings.resume_on_seek:
+            pause_ms = settings.seek_timeout_ms
+        else:
+            pause_ms = settings.resume_delay_ms
+        repeats = max(1, repeats)
+
+        for i in range(count):
+            start_ms, end_ms = timeline.start(i), timeline.end(i)
+
+            target_ms = start_ms
+            if pre_roll_ms:
+                target_ms = start_ms - pre_roll_ms
+                if i > 0:
+                    previous_end = timeline.end(i - 1)
+                    if target_ms <= previous_end:
+                        target_ms = min(previous_end + 1, start_ms) if settings.clamp_pre_roll else start_ms
+
+            next_index = i + 1
+            # A short cue is looped together with the cues right after it, up to merge_short_ms in all
+            while (next_index < count and end_ms - start_ms < settings.merge_short_ms
+                   and timeline.start(next_index) - end_ms <= MERGE_MAX_GAP_MS):
+                end_ms = max(end_ms, timeline.end(next_index))
+                next_index += 1
+            # Cues nested inside this one were already shown on every pass
+            while next_index < count and timeline.end(next_index) <= end_ms:
+                next_index += 1
+
+            loop_end = end_ms - settings.end_lead_ms
+            base = i * STRIDE
+            entries[base] = max(0, target_ms)
+            entries[base + 1] = loop_end
+            entries[base + 2] = repeats if loop_end > start_ms else 1
+            entries[base + 3] = pause_ms
+            entries[base + 4] = next_index
+        return cls(entries, key)
+
+    def __len__(self):
+        return len(self.entries) // STRIDE
+
+    def entry(self, index):
+        """(seek_target, loop_end, repeats, pause_ms, next_index) of cue `index`."""
+        base = index * STRIDE
+        return tuple(self.entries[base:base + STRIDE])
+
+    def seek_target(self, index):
+        return self.entries[index * STRIDE]
+
+    def loop_end(self, index):
+        return self.entries[index * STRIDE + 1]
+
+    def repeats(self, index):
+        return self.entries[index * STRIDE + 2]
+
+    def pause_ms(self, index):
+        return self.entries[index * STRIDE + 3]
+
+    def next_index(self, index):
+        return self.entries[index * STRIDE + 4]
+
+    def longest_window(self):
+        """The longest span a repeat replays, from its seek target to its loop end."""
+        entries = self.entries
+        return max((entries[base + 1] - entries[base] for base in range(0, len(entries), STRIDE)), default=0)
+
+    def export(self, path):
+        """Writes the plan as CSV, one row per cue, for inspection."""
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(('cue',) + FIELDS)
+            for index in range(len(self)):
+                writer.writerow((index,) + self.entry(index))
+
+    def __repr__(self):
+        return f"RepeatPlan({len(self)} cues)"
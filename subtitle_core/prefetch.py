@@ -0,0 +1,134 @@
+import os
+import threading
+
+PREFETCH_CHUNK_BYTES = 1 << 20
+PREFETCH_MARGIN_MS = 5000  # read this much media either side: bitrate varies and seeks start at a keyframe
+CACHE_SLACK_MS = 5000  # kept behind the longest repeat window, for decoding from the keyframe before it
+DEFAULT_CACHE_WINDOW_MS = 15000  # until a timeline is known
+
+
+class RangePrefetcher:
+    """
+    Reads byte ranges of one file on a background thread so that they sit in
+    the OS page cache before the player asks for them. Only the latest request
+    is kept: moving on to another cue supersedes a prefetch still in progress.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.size = os.path.getsize(path)
+        self.prefetches = 0
+        self.bytes_read = 0
+        self._request = None
+        self._closed = False
+        self._condition = threading.Condition()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def prefetch(self, offset, length):
+        offset = max(0, min(int(offset), self.size))
+        length = min(int(length), self.size - offset)
+        if length <= 0:
+            return
+        with self._condition:
+            self._request = (offset, length)
+            self._condition.notify()
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+
+    def _run(self):
+        try:
+            f = open(self.path, 'rb', buffering=0)
+        except OSError:
+            return
+        with f:
+            while True:
+                with self._condition:
+                    while self._request is None and not self._closed:
+                        self._condition.wait()
+                    if self._closed:
+                        return
+                    offset, length = self._request
+                    self._request = None
+                try:
+                    self._read(f, offset, length)
+                except OSError:
+                    continue
+
+    def _read(self, f, offset, length):
+        f.seek(offset)
+        while length > 0:
+            if self._request is not None or self._closed:
+                return
+            chunk = f.read(min(PREFETCH_CHUNK_BYTES, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            self.bytes_read += len(chunk)
+        self.prefetches += 1
+
+
+class CuePrefetcher:
+    """
+    Keeps the media around the current and next cue resident, so repeat
+    seek-backs are served from memory rather than a slow disk or network share.
+
+    Two layers: the player's own cache is sized to hold the longest repeat
+    window behind the playback position (PlayerBackend.set_cache_window()),
+    and, as a repeat engine listener, each new cue has the byte range of the
+    following cue's window read ahead on a background thread. Byte offsets are
+    estimated from the file's average bitrate, with PREFETCH_MARGIN_MS to spare.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.prefetcher = None
+        self.window_ms = DEFAULT_CACHE_WINDOW_MS
+        self._sized = False
+        engine.add_listener(self)
+
+    def attach(self, video_path):
+        """Starts prefetching from `video_path`; call before the backend loads it."""
+        self.close()
+        try:
+            self.prefetcher = RangePrefetcher(video_path)
+        except OSError:
+            self.prefetcher = None
+        self.window_ms = DEFAULT_CACHE_WINDOW_MS
+        self._apply_window()
+
+    def close(self):
+        if self.prefetcher is not None:
+            self.prefetcher.close()
+            self.prefetcher = None
+
+    def configure(self):
+        """Sizes the cache for the engine's timeline and settings and warms the current cue."""
+        timeline = self.engine.timeline
+        window_ms = self.engine.plan.longest_window() if timeline else 0
+        self.window_ms = window_ms + CACHE_SLACK_MS if window_ms else DEFAULT_CACHE_WINDOW_MS
+        self._apply_window()
+        if timeline:
+            self._prefetch_cue(self.engine.index)
+            self._prefetch_cue(self.engine.plan.next_index(self.engine.index))
+
+    def _apply_window(self):
+        self.engine.backend.set_cache_window(self.window_ms, self.window_ms)
+        self._sized = self.engine.backend.duration_ms() > 0
+
+    def on_index_change(self, index):
+        if not self._sized:
+            self._apply_window()  # the player now knows the duration it needs for byte sizes
+        self._prefetch_cue(self.engine.plan.next_index(index))
+
+    def _prefetch_cue(self, index):
+        timeline = self.engine.timeline
+        duration_ms = self.engine.backend.duration_ms()
+        if self.prefetcher is None or not timeline or not 0 <= index < len(timeline) or duration_ms <= 0:
+            return
+        bytes_per_ms = self.prefetcher.size / duration_ms
+        start_ms = self.engine.seek_target(index) - PREFETCH_MARGIN_MS
+        end_ms = timeline.end(index) + PREFETCH_MARGIN_MS
+        self.prefetcher.prefetch(start_ms * bytes_per_ms, (end_ms - start_ms) * bytes_per_ms)
@@ -0,0 +1,472 @@
+from subtitle_core.bridge import TkBridge
+from subtitle_core.clock import PlaybackClock
+from subtitle_core.plan import RepeatPlan
+from subtitle_core.scheduler import CueScheduler
+
+DEFAULT_SEEK_TIMEOUT_MS = 1500  # resume anyway if the backend never confirms a seek
+
+
+class RepeatSettings:
+    """
+    The knobs in which the players' repeat logic differs.
+
+    pre_roll_ms      seek this far before the cue start on a repeat
+    clamp_pre_roll   on a collision with the previous cue, clamp the pre-roll to
+                     just after it instead of dropping it
+    end_lead_ms      treat the cue as finished this early
+    pause_for_seek   pause around the seek-back, resuming once the seek lands
+    resume_on_seek   resume on the backend's seek-complete event, or after
+                     seek_timeout_ms if none comes; when off, resume after a
+                     fixed resume_delay_ms as the player scripts used to
+    seek_on_advance  seek to the next cue's start after the last pass too
+    native_loop      let a backend that can (mpv's ab-loop) loop the cue by
+                     itself; Python then only steps in to advance to the next cue
+    merge_short_ms   loop a cue shorter than this together with the cues
+                     right after it (see RepeatPlan); 0 disables merging
+    poll_ms          instead of one timer for the cue end, check the last time
+                     the backend reported every poll_ms, as beta.py's poll loop
+                     does; 0 uses the precise timer
+    """
+
+    def __init__(self, pre_roll_ms=0, clamp_pre_roll=False, end_lead_ms=0, pause_for_seek=True,
+                 resume_delay_ms=100, seek_on_advance=False, resume_on_seek=True,
+                 seek_timeout_ms=DEFAULT_SEEK_TIMEOUT_MS, native_loop=False, merge_short_ms=0, poll_ms=0):
+        self.pre_roll_ms = pre_roll_ms
+        self.clamp_pre_roll = clamp_pre_roll
+        self.end_lead_ms = end_lead_ms
+        self.pause_for_seek = pause_for_seek
+        self.resume_delay_ms = resume_delay_ms
+        self.seek_on_advance = seek_on_advance
+        self.resume_on_seek = resume_on_seek
+        self.seek_timeout_ms = seek_timeout_ms
+        self.native_loop = native_loop
+        self.merge_short_ms = merge_short_ms
+        self.poll_ms = poll_ms
+
+    def copy(self, **changes):
+        """A copy with some settings changed, e.g. REPEAT_PRESETS['alpha'].copy(native_loop=True)."""
+        return RepeatSettings(**dict(vars(self), **changes))
+
+    def __repr__(self):
+        fields = ', '.join(f"{name}={value!r}" for name, value in vars(self).items())
+        return f"RepeatSettings({fields})"
+
+
+# The repeat behaviour of each player script, so they can share one engine
+REPEAT_PRESETS = {
+    'player': RepeatSettings(pre_roll_ms=500, resume_delay_ms=1500),
+    'via_mpv': RepeatSettings(pre_roll_ms=500, resume_delay_ms=100),
+    'alpha': RepeatSettings(pre_roll_ms=300, clamp_pre_roll=True, resume_delay_ms=100),
+    'stable_v4': RepeatSettings(resume_delay_ms=750, resume_on_seek=False),
+    'v5': RepeatSettings(end_lead_ms=50, resume_delay_ms=250, seek_on_advance=True),
+    'beta': RepeatSettings(end_lead_ms=30, pause_for_seek=False, resume_delay_ms=0, poll_ms=100),
+}
+
+
+class TkHost:
+    """
+    Runs the engine's timers and backend events on the Tk thread.
+
+    Backend events arrive on the player's own thread (libVLC's or mpv's event
+    thread), which must never call into Tcl: tkinter blocks it until the Tk
+    thread answers, raises if the mainloop is not running, and can deadlock
+    with a release() that joins that thread. post() therefore only queues the
+    call on a TkBridge, whose Tk-side pump runs it. Pass the app's own bridge
+    to share its pump; otherwise the host starts one of its own.
+    """
+
+    def __init__(self, widget, bridge=None):
+        self.widget = widget
+        if bridge is None:
+            bridge = TkBridge(widget)
+            bridge.start()
+        self.bridge = bridge
+
+    def after(self, delay_ms, func):
+        return self.widget.after(delay_ms, func)
+
+    def after_cancel(self, timer_id):
+        self.widget.after_cancel(timer_id)
+
+    def post(self, func):
+        self.bridge.call(func)
+
+
+class RepeatEngine:
+    """
+    Backend-independent subtitle repeat logic.
+
+    Each cue is played `repeats` times: when playback reaches its end the
+    engine seeks back (with the configured pre-roll), and after the last pass
+    it moves on to the next cue. Timing runs on a PlaybackClock fed by the
+    backend's time events and one CueScheduler timer, so the same engine
+    drives VLC, mpv or a simulated backend unchanged.
+
+    `host` supplies after(), after_cancel() and a thread-safe post(); all
+    engine state is only touched on the host's thread. The engine's pause
+    state is the one it commands; backend pause events are only passed on.
+    Listeners added with add_listener() may implement on_index_change(index),
+    on_repeat(index, count), on_resume(seek_latency_ms, timed_out),
+    on_pause(paused) and on_end().
+    `repeats` is an int or a callable returning one (e.g. reading a spinbox).
+    With a SeekPlanner as `planner`, seek-backs land on a keyframe inside the
+    pre-roll window where there is one (see subtitle_core.keyframes).
+    Per-cue decisions come from `plan`, a RepeatPlan rebuilt whenever the
+    timeline, its delay, the settings object or the repeat count changes.
+    """
+
+    def __init__(self, backend, host, settings=None, repeats=1, clock=None, planner=None):
+        self.backend = backend
+        self.host = host
+        self.settings = settings or RepeatSettings()
+        self.repeats = repeats
+        self.clock = clock or PlaybackClock()
+        self.planner = planner
+        self.timeline = None
+        self.index = 0
+        self.counter = 0
+        self.active = False
+        self.paused = True
+        self.seek_count = 0
+        self.resume_timer_id = None
+        self.poll_timer_id = None
+        self.last_seek_latency_ms = None
+        self._resume_from_ms = None
+        self._awaiting_seek = False
+        self._fast_seek_in_flight = False
+        self._seek_started_at = None
+        self._reported_ms = None
+        self._poll_target_ms = None
+        self._plan = None
+        self._loop_key = None  # (cue, plan) the backend's A-B loop is programmed for
+        self._loop_set = False
+        self._loops_left = 0
+        self._listeners = []
+        self.scheduler = CueScheduler(host.after, host.after_cancel, self.clock.now_ms, self._on_cue_end,
+                                      rate=backend.rate)
+        backend.add_listener(self)
+
+    def add_listener(self, listener):
+        self._listeners.append(listener)
+
+    def _notify(self, event, *args):
+        for listener in tuple(self._listeners):
+            handler = getattr(listener, event, None)
+            if handler is not None:
+                handler(*args)
+
+    # --- Backend events (any thread) ---
+    def on_time(self, time_ms):
+        self._reported_ms = time_ms
+        self.clock.update(time_ms)
+
+    def on_seek_complete(self, time_ms):
+        # Re-anchor outright: the jump may be backwards, e.g. an A-B loop the player made by itself
+        self._reported_ms = time_ms
+        self.clock.seek(time_ms)
+        self.clock.update(time_ms)
+        if self._awaiting_seek or self._fast_seek_in_flight:
+            self.host.post(lambda: self._on_seek_landed(time_ms))
+
+    def on_pause(self, paused):
+        self.host.post(lambda: self._notify('on_pause', paused))
+
+    def on_loop(self, remaining):
+        self.host.post(lambda: self._on_native_loop(remaining))
+
+    def on_end(self):
+        self.host.post(self._on_media_end)
+
+    # --- Controls (host thread) ---
+    def repeat_count(self):
+        try:
+            count = int(self.repeats() if callable(self.repeats) else self.repeats)
+        except (ValueError, TypeError, RuntimeError):
+            count = 1
+        return max(1, count)
+
+    def now_ms(self):
+        return self.clock.now_ms()
+
+    @property
+    def plan(self):
+        timeline = self.timeline
+        key = (timeline, timeline.offset_ms if timeline else 0, self.settings, self.repeat_count())
+        plan = self._plan
+        if plan is None or plan.key != key:
+            plan = self._plan = RepeatPlan.build(timeline, self.settings, key[3], key)
+        return plan
+
+    def set_settings(self, settings):
+        """Switches settings (e.g. native looping on or off) without losing the position."""
+        self.cancel()
+        self._clear_loop()
+        self.settings = settings
+        self.arm()
+
+    def set_timeline(self, timeline):
+        """Starts repeating over `timeline` (or stops, for None) from the current position."""
+        self.timeline = timeline
+        self.active = bool(timeline)
+        self._reindex(self.backend.time_ms() if self.paused else self.clock.now_ms(), force=True)
+        self.arm()
+
+    def refresh(self):
+        """Re-applies the timeline after its delay changed."""
+        self._reindex(self.backend.time_ms() if self.paused else self.clock.now_ms())
+        self.arm()
+
+    def play(self):
+        self.cancel()
+        if self.paused:
+            # Playback may have been moved while paused
+            self._reindex(self.backend.time_ms())
+        self.paused = False
+        self.backend.play()
+        self.clock.set_rate(self.backend.rate())
+        self.clock.set_paused(False)
+        self.arm()
+
+    def pause(self):
+        self.cancel()
+        self.paused = True
+        self.backend.pause()
+        self.clock.set_paused(True)
+
+    def toggle(self):
+        if self.paused:
+            self.play()
+        else:
+            self.pause()
+
+    def stop(self):
+        self.cancel()
+        self.paused = True
+        self.backend.stop()
+        self.clock.set_paused(True)
+        self.clock.seek(0)
+        self.index = 0
+        self.counter = 0
+
+    def seek(self, time_ms, precise=True):
+        """
+        User seek: jumps to `time_ms` and repeats from whichever cue is there.
+        A fast (keyframe) seek also teaches the planner where a keyframe is.
+        """
+        self.cancel()
+        self._seek(time_ms, precise)
+        self._reindex(time_ms, force=True)
+        self.arm(time_ms)
+
+    def skip(self, step=1):
+        """Jumps to the start of the cue `step` away from the current one and plays."""
+        if not self.timeline:
+            return
+        index = self.index + step
+        if not 0 <= index < len(self.timeline):
+            return
+        self.cancel()
+        self._set_index(index)
+        self.counter = 0
+        start_ms = max(0, self.timeline.start(index))
+        self._seek(start_ms)
+        if self.paused:
+            self.paused = False
+            self.backend.play()
+            self.clock.set_paused(False)
+        self.arm(start_ms)
+
+    def cancel(self):
+        """Cancels the pending repeat and any pending resume."""
+        self._disarm()
+        self._awaiting_seek = False
+        self._loop_key = None
+        if self.resume_timer_id is not None:
+            self.host.after_cancel(self.resume_timer_id)
+            self.resume_timer_id = None
+
+    def arm(self, time_ms=None):
+        """
+        Arms the single repeat timer for the end of the current cue, if repeating.
+        With native looping the backend's A-B loop is (re)programmed instead, and
+        the timer is only armed for the last pass, to advance to the next cue.
+        """
+        if (not self.active or self.resume_timer_id is not None
+                or not self.timeline or not 0 <= self.index < len(self.timeline)):
+            self._disarm()
+            self._clear_loop()
+            return
+        if self.settings.native_loop and self.backend.ab_loop:
+            self._program_loop()
+            if self._loops_left:
+                self._disarm()
+                return
+        if self.paused:
+            self._disarm()
+            return
+        target_ms = self.plan.loop_end(self.index)
+        if not self.settings.poll_ms:
+            self.scheduler.arm(target_ms, time_ms)
+            return
+        self.scheduler.cancel()
+        self._poll_target_ms = target_ms
+        if self.poll_timer_id is None:
+            self.poll_timer_id = self.host.after(self.settings.poll_ms, self._poll)
+
+    def _disarm(self):
+        self.scheduler.cancel()
+        self._poll_target_ms = None
+        if self.poll_timer_id is not None:
+            self.host.after_cancel(self.poll_timer_id)
+            self.poll_timer_id = None
+
+    def _poll(self):
+        # A fixed cadence against the reported time, like a script polling the player, so the
+        # cue end is noticed up to poll_ms (plus the report interval) late
+        self.poll_timer_id = None
+        if self._poll_target_ms is None:
+            return
+        if self._reported_ms is not None and self._reported_ms >= self._poll_target_ms:
+            self._poll_target_ms = None
+            self._on_cue_end()
+        if self._poll_target_ms is not None and self.poll_timer_id is None:
+            self.poll_timer_id = self.host.after(self.settings.poll_ms, self._poll)
+
+    # --- Native (backend) looping ---
+    def _program_loop(self):
+        plan = self.plan
+        key = (self.index, plan)
+        if key == self._loop_key:
+            return
+        self._loop_key = key
+        self._loops_left = max(0, plan.repeats(self.index) - 1 - self.counter)
+        if self._loops_left:
+            self.backend.set_ab_loop(plan.seek_target(self.index), plan.loop_end(self.index), self._loops_left)
+            self._loop_set = True
+        else:
+            self._clear_loop()
+
+    def _clear_loop(self):
+        self._loop_key = None
+        self._loops_left = 0
+        if self._loop_set:
+            self._loop_set = False
+            self.backend.clear_ab_loop()
+
+    def _on_native_loop(self, remaining):
+        if self._loop_key is None or remaining >= self._loops_left:
+            return  # the echo of our own programming, or a loop we no longer own
+        self.counter += self._loops_left - remaining
+        self._loops_left = remaining
+        self._notify('on_repeat', self.index, self.counter)
+        if not remaining:
+            self.arm()  # last pass: wake up at its end to move on
+
+    # --- Repeat cycle ---
+    def seek_target(self, index):
+        """Where a repeat of cue `index` seeks to: its start minus the pre-roll, if that is free."""
+        return self.plan.seek_target(index)
+
+    def seek_window(self, index):
+        """The span a repeat of cue `index` may start from: after the previous cue, up to its start."""
+        earliest_ms = self.timeline.end(index - 1) + 1 if index > 0 else 0
+        return max(0, earliest_ms), max(0, self.timeline.start(index))
+
+    def probe_keyframes(self, video_path, on_probed=None):
+        """Has the planner probe the keyframes in the seek window of every cue that repeats."""
+        if self.planner is None or not self.timeline:
+            return
+        plan = self.plan
+        windows = [self.planner.window(plan.seek_target(index), *self.seek_window(index))
+                   for index in range(len(plan)) if plan.repeats(index) > 1]
+        self.planner.probe_windows(video_path, windows, on_probed=on_probed)
+
+    def plan_seek(self, index):
+        """Returns (seek_ms, precise) for a repeat of cue `index`."""
+        target_ms = self.seek_target(index)
+        if self.planner is None:
+            return target_ms, True
+        earliest_ms, latest_ms = self.seek_window(index)
+        return self.planner.plan(target_ms, earliest_ms, latest_ms)
+
+    def _on_cue_end(self):
+        if self.paused or not self.active or not self.timeline or not 0 <= self.index < len(self.timeline):
+            return
+        plan = self.plan
+        if self.counter < plan.repeats(self.index) - 1:
+            self.counter += 1
+            self._notify('on_repeat', self.index, self.counter)
+            self._seek_and_resume(*self.plan_seek(self.index))
+            return
+
+        index = plan.next_index(self.index)
+        if index >= len(plan):
+            return
+        self._set_index(index)
+        self.counter = 0
+        if self.settings.seek_on_advance:
+            self._seek_and_resume(max(0, self.timeline.start(index)))
+        else:
+            self.arm()
+
+    def _seek_and_resume(self, target_ms, precise=True):
+        if not self.settings.pause_for_seek:
+            self._seek(target_ms, precise)
+            self.arm(target_ms)
+            return
+        self.backend.pause()
+        self.clock.set_paused(True)
+        self._resume_from_ms = target_ms
+        self._awaiting_seek = self.settings.resume_on_seek
+        self._seek_started_at = self.clock.monotonic()
+        self._seek(target_ms, precise)
+        self.resume_timer_id = self.host.after(self.plan.pause_ms(self.index), self._resume)
+
+    def _on_seek_landed(self, time_ms):
+        if self._fast_seek_in_flight:
+            self._fast_seek_in_flight = False
+            if self.planner is not None:
+                self.planner.learn(time_ms)
+        if not self._awaiting_seek or self.resume_timer_id is None:
+            return  # a late confirmation of a seek already given up on
+        self.host.after_cancel(self.resume_timer_id)
+        self._resume()
+
+    def _resume(self):
+        self.resume_timer_id = None
+        timed_out = self._awaiting_seek
+        self._awaiting_seek = False
+        self.last_seek_latency_ms = (self.clock.monotonic() - self._seek_started_at) * 1000.0
+        self._notify('on_resume', self.last_seek_latency_ms, timed_out)
+        if self.paused:
+            return
+        self.backend.play()
+        self.clock.set_paused(False)
+        self.arm(self._resume_from_ms)
+
+    def _seek(self, time_ms, precise=True):
+        self.seek_count += 1
+        self._fast_seek_in_flight = not precise and self.backend.fast_seek
+        self.backend.seek(time_ms, precise=precise)
+        self.clock.seek(time_ms)
+
+    def _set_index(self, index):
+        if index != self.index:
+            self.index = index
+            self._notify('on_index_change', index)
+
+    def _reindex(self, time_ms, force=False):
+        if not self.timeline:
+            self.index = 0
+            self.counter = 0
+            return
+        index = self.timeline.index_at(time_ms, hint=self.index)
+        if force or index != self.index:
+            self.counter = 0
+        self._set_index(index)
+
+    def _on_media_end(self):
+        self.cancel()
+        self.paused = True
+        self.clock.set_paused(True)
+        self._notify('on_end')
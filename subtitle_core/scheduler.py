@@ -0,0 +1,71 @@
+DEFAULT_SLACK_MS = 15
+DEFAULT_MAX_WAIT_MS = 5000
+
+
+class CueScheduler:
+    """
+    Calls `callback()` once playback reaches a target time, using a single timer.
+
+    Rather than polling the player every few ms, the wait until the target is
+    computed once from the playback time and rate and one `after()` timer is
+    set. The app re-arms it only when playback changes: a seek, pause/play, a
+    rate change or a new subtitle delay. When the timer fires the playback
+    time is read again, and if playback fell behind (buffering, a slow seek)
+    the remainder is waited out instead of firing early. Waits are capped at
+    `max_wait_ms`, so long gaps between cues are still re-checked now and then.
+
+    `after(delay_ms, func)` / `after_cancel(timer_id)` are Tk's (or anything
+    with the same signatures), `now_ms()` returns the playback time and
+    `rate()`, if given, the playback speed.
+    """
+
+    def __init__(self, after, after_cancel, now_ms, callback, rate=None,
+                 slack_ms=DEFAULT_SLACK_MS, max_wait_ms=DEFAULT_MAX_WAIT_MS):
+        self.after = after
+        self.after_cancel = after_cancel
+        self.now_ms = now_ms
+        self.callback = callback
+        self.rate = rate
+        self.slack_ms = slack_ms
+        self.max_wait_ms = max_wait_ms
+        self.target_ms = None
+        self.timer_id = None
+
+    @property
+    def armed(self):
+        return self.timer_id is not None
+
+    def arm(self, target_ms, now_ms=None):
+        """
+        (Re)arms the timer for playback time `target_ms`. Pass `now_ms` when the
+        playback time is known better than the player reports it, e.g. right
+        after a seek the player may still report the old position.
+        """
+        self.cancel()
+        self.target_ms = target_ms
+        self._schedule(self.now_ms() if now_ms is None else now_ms)
+
+    def cancel(self):
+        if self.timer_id is not None:
+            self.after_cancel(self.timer_id)
+            self.timer_id = None
+        self.target_ms = None
+
+    def _playback_rate(self):
+        rate = self.rate() if self.rate else 1.0
+        return rate if rate and rate > 0 else 1.0
+
+    def _schedule(self, now_ms):
+        wait_ms = (self.target_ms - now_ms) / self._playback_rate()
+        self.timer_id = self.after(max(1, int(min(wait_ms, self.max_wait_ms))), self._fire)
+
+    def _fire(self):
+        self.timer_id = None
+        if self.target_ms is None:
+            return
+        now_ms = self.now_ms()
+        if (self.target_ms - now_ms) / self._playback_rate() > self.slack_ms:
+            self._schedule(now_ms)
+            return
+        self.target_ms = None
+        self.callback()
@@ -0,0 +1,299 @@
+import heapq
+import itertools
+
+from subtitle_core.backend import PlayerBackend
+
+
+class VirtualClock:
+    """
+    Discrete-event time source standing in for Tk's event loop.
+
+    Implements the host interface the repeat engine expects (after(),
+    after_cancel(), post()) plus monotonic() for PlaybackClock. Nothing ever
+    sleeps: run_until() jumps straight from one due timer to the next, so an
+    hour of playback is simulated in well under a second and every run with
+    the same inputs fires the same timers at the same virtual times.
+    """
+
+    def __init__(self, start_ms=0.0):
+        self.time_ms = float(start_ms)
+        self._timers = []
+        self._cancelled = set()
+        self._ids = itertools.count(1)
+
+    def monotonic(self):
+        return self.time_ms / 1000.0
+
+    def after(self, delay_ms, func):
+        timer_id = next(self._ids)
+        heapq.heappush(self._timers, (self.time_ms + max(0, delay_ms), timer_id, func))
+        return timer_id
+
+    def after_cancel(self, timer_id):
+        self._cancelled.add(timer_id)
+
+    def post(self, func):
+        self.after(0, func)
+
+    def pending(self):
+        return len(self._timers) - len(self._cancelled)
+
+    def run_until(self, time_ms, stop=None):
+        """
+        Fires every timer due up to virtual time `time_ms`, in order, then sets the
+        clock to it. `stop()`, if given, is checked after each timer; returns True
+        if it ended the run early.
+        """
+        while self._timers and self._timers[0][0] <= time_ms:
+            due_ms, timer_id, func = heapq.heappop(self._timers)
+            if timer_id in self._cancelled:
+                self._cancelled.discard(timer_id)
+                continue
+            self.time_ms = max(self.time_ms, due_ms)
+            func()
+            if stop is not None and stop():
+                return True
+        self.time_ms = max(self.time_ms, float(time_ms))
+        return False
+
+    def run_for(self, duration_ms, stop=None):
+        return self.run_until(self.time_ms + duration_ms, stop)
+
+
+class SimulatedBackend(PlayerBackend):
+    """
+    Plays a virtual media file on a VirtualClock, with no window or codecs.
+
+    The knobs mirror what makes real players hard to time:
+
+      update_interval_ms  time events arrive this often (libVLC: ~250 ms)
+      seek_latency_ms     a seek lands this long after it is issued; playback
+                          is frozen at the old position until then, as VLC's
+                          get_time() keeps reporting it
+      stalls              (media_ms, stall_ms) pairs: playback freezes for
+                          stall_ms each time it crosses media_ms, as on a
+                          decode or network stall
+      keyframe_interval_ms
+                          GOP length; 0 means every frame is a keyframe
+      decode_speed        how much faster than real time the decoder runs: a
+                          precise seek also costs decoding from the keyframe
+                          before the target up to it, a fast seek lands on
+                          that keyframe instead
+      fast_seek           whether fast seeks exist at all; without them (as
+                          with libVLC) every seek is precise
+
+    A-B loops behave like mpv's: reaching B with loops left seeks back to A.
+
+    Every seek is recorded in `seeks` as (issued_at_ms, from_ms, target_ms) for
+    measurements. Events are delivered through the clock, i.e. after the call
+    that caused them returns, as with a real player's event thread.
+    """
+    name = 'simulated'
+    ab_loop = True
+
+    def __init__(self, clock=None, duration_ms=3600000, update_interval_ms=250, seek_latency_ms=0,
+                 stalls=(), rate=1.0, keyframe_interval_ms=0, decode_speed=4.0, fast_seek=True):
+        super().__init__()
+        self.clock = clock or VirtualClock()
+        self.media_duration_ms = duration_ms
+        self.update_interval_ms = update_interval_ms
+        self.seek_latency_ms = seek_latency_ms
+        self.stalls = sorted(stalls)
+        self.keyframe_interval_ms = keyframe_interval_ms
+        self.decode_speed = decode_speed
+        self.fast_seek = fast_seek
+        self.playback_rate = rate
+        self.loaded = True
+        self.paused = True
+        self.seeks = []
+        self._position_ms = 0.0
+        self._anchor_at = self.clock.time_ms
+        self._stalled_until = None
+        self._pending_seek = None
+        self._tick_id = None
+        self._stall_id = None
+        self._seek_id = None
+        self._loop_id = None
+        self._ab_loop = None  # [a_ms, b_ms, loops left]
+        self.cache_window = None  # (back_ms, ahead_ms)
+
+    # --- Virtual playback ---
+    def _running(self):
+        return (not self.paused and self._pending_seek is None
+                and (self._stalled_until is None or self._stalled_until <= self.clock.time_ms))
+
+    def _advance(self):
+        """Brings the position up to the clock's current time."""
+        now = self.clock.time_ms
+        if self._stalled_until is not None:
+            if self._stalled_until > now:
+                self._anchor_at = now
+                return
+            self._anchor_at = max(self._anchor_at, self._stalled_until)
+            self._stalled_until = None
+        if self._running():
+            self._position_ms = min(self.media_duration_ms,
+                                    self._position_ms + (now - self._anchor_at) * self.playback_rate)
+        self._anchor_at = now
+
+    def _reschedule(self):
+        """Re-arms the time-update tick and the next stall for the current state."""
+        for timer_id in (self._tick_id, self._stall_id, self._loop_id):
+            if timer_id is not None:
+                self.clock.after_cancel(timer_id)
+        self._tick_id = self._stall_id = self._loop_id = None
+        if self.paused or self._pending_seek is not None:
+            return
+        self._tick_id = self.clock.after(self.update_interval_ms, self._on_tick)
+        stalled_ms = max(0, self._stalled_until - self.clock.time_ms) if self._stalled_until is not None else 0
+        for stall_at, stall_ms in self.stalls:
+            if stall_at > self._position_ms:
+                delay = (stall_at - self._position_ms) / self.playback_rate + stalled_ms
+                self._stall_id = self.clock.after(delay, lambda at=stall_at, ms=stall_ms: self._on_stall(at, ms))
+                break
+        if self._ab_loop and self._ab_loop[2] > 0 and self._position_ms < self._ab_loop[1]:
+            delay = (self._ab_loop[1] - self._position_ms) / self.playback_rate + stalled_ms
+            self._loop_id = self.clock.after(delay, self._on_loop_point)
+
+    def _on_tick(self):
+        self._tick_id = None
+        self._advance()
+        if self._position_ms >= self.media_duration_ms:
+            self.paused = True
+            self._reschedule()
+            self._emit('on_end')
+            return
+        self._emit('on_time', int(self._position_ms))
+        self._tick_id = self.clock.after(self.update_interval_ms, self._on_tick)
+
+    def _on_stall(self, stall_at, stall_ms):
+        self._stall_id = None
+        self._advance()
+        self._position_ms = max(self._position_ms, float(stall_at))
+        self._stalled_until = self.clock.time_ms + stall_ms
+        self._reschedule()
+
+    def _on_loop_point(self):
+        self._loop_id = None
+        self._advance()
+        self._ab_loop[2] -= 1
+        self._emit('on_loop', self._ab_loop[2])
+        self.seek(self._ab_loop[0])
+
+    def _on_seek_landed(self):
+        self._seek_id = None
+        target_ms = self._pending_seek
+        self._pending_seek = None
+        self._position_ms = float(target_ms)
+        self._stalled_until = None
+        self._anchor_at = self.clock.time_ms
+        self._reschedule()
+        self._emit('on_time', target_ms)
+        self._emit('on_seek_complete', target_ms)
+
+    # --- Controls ---
+    def load_media(self, path):
+        self.loaded = True
+
+    def attach_window(self, window_id):
+        pass
+
+    def play(self):
+        if not self.paused:
+            return
+        self._advance()
+        self.paused = False
+        self._anchor_at = self.clock.time_ms
+        self._reschedule()
+        self.clock.post(lambda: self._emit('on_pause', False))
+
+    def pause(self):
+        if self.paused:
+            return
+        self._advance()
+        self.paused = True
+        self._reschedule()
+        self.clock.post(lambda: self._emit('on_pause', True))
+
+    def stop(self):
+        self.pause()
+        self._cancel_seek()
+        self._position_ms = 0.0
+
+    def _cancel_seek(self):
+        if self._seek_id is not None:
+            self.clock.after_cancel(self._seek_id)
+            self._seek_id = None
+        self._pending_seek = None
+
+    def keyframe_before(self, time_ms):
+        if not self.keyframe_interval_ms:
+            return time_ms
+        return time_ms - time_ms % self.keyframe_interval_ms
+
+    def keyframe_times(self):
+        if not self.keyframe_interval_ms:
+            return []
+        return list(range(0, int(self.media_duration_ms) + 1, self.keyframe_interval_ms))
+
+    def seek(self, time_ms, precise=True):
+        self._advance()
+        target_ms = int(min(max(0, time_ms), self.media_duration_ms))
+        keyframe_ms = self.keyframe_before(target_ms)
+        latency_ms = self.seek_latency_ms
+        if precise or not self.fast_seek:
+            latency_ms += (target_ms - keyframe_ms) / self.decode_speed
+        else:
+            target_ms = keyframe_ms
+        self.seeks.append((self.clock.time_ms, int(self._position_ms), target_ms))
+        # A newer seek supersedes one still in flight
+        self._cancel_seek()
+        self._pending_seek = target_ms
+        self._reschedule()
+        self._seek_id = self.clock.after(latency_ms, self._on_seek_landed)
+
+    def set_volume(self, volume):
+        pass
+
+    def load_subtitle(self, path):
+        return True
+
+    def _load_subtitle_text(self, text, digest):
+        return True
+
+    def set_subtitle_delay(self, delay_ms):
+        return True
+
+    def set_ab_loop(self, a_ms, b_ms, count):
+        self._advance()
+        self._ab_loop = [max(0, a_ms), b_ms, count]
+        self._reschedule()
+
+    def clear_ab_loop(self):
+        self._advance()
+        self._ab_loop = None
+        self._reschedule()
+
+    def set_cache_window(self, back_ms, ahead_ms):
+        self.cache_window = (back_ms, ahead_ms)
+
+    # --- State ---
+    def position_ms(self):
+        """The true playback position, as opposed to the last reported one."""
+        self._advance()
+        return self._position_ms
+
+    def has_media(self):
+        return self.loaded
+
+    def time_ms(self):
+        return int(self.position_ms())
+
+    def duration_ms(self):
+        return self.media_duration_ms
+
+    def is_paused(self):
+        return self.paused
+
+    def rate(self):
+        return self.playback_rate
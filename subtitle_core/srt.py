@@ -0,0 +1,153 @@
+import re
+import threading
+
+from subtitle_core.encoding import SAMPLE_SIZE, detect_encoding
+from subtitle_core.markup import to_srt_markup
+
+TIMING_RE = re.compile(
+    r'(\d+):(\d{1,2}):(\d{1,2})[,.](\d{1,3})\s*-->\s*(\d+):(\d{1,2}):(\d{1,2})[,.](\d{1,3})')
+
+
+def timing_to_ms(hours, minutes, seconds, fraction):
+    """Converts the captured pieces of an SRT timestamp to milliseconds."""
+    return ((int(hours) * 60 + int(minutes)) * 60 + int(seconds)) * 1000 + int(fraction.ljust(3, '0'))
+
+
+def _iter_lines(source, encoding):
+    if hasattr(source, 'readline'):
+        # File objects and mmaps: pull one line at a time, never the whole file
+        def read_lines():
+            while True:
+                line = source.readline()
+                if not line:
+                    return
+                yield line
+        lines = read_lines()
+    else:
+        lines = iter(source)
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode(encoding, errors='replace')
+        yield line.rstrip('\r\n')
+
+
+def iter_srt_cues(source, encoding='utf-8'):
+    """
+    Lazily yields (start_ms, end_ms, text) cues from SRT data, one line at a time.
+
+    `source` may be a text or binary file object, an mmap, or any iterable of
+    lines; bytes are decoded with `encoding`. Cues are recognised by their
+    timing line alone, so CRLF endings, missing or wrong index numbers, extra
+    blank lines and a missing blank line between cues are all tolerated.
+    """
+    cue = None        # [start_ms, end_ms, text lines] being filled
+    held = []         # lines seen after a blank line, not yet known to be text or an index
+    for line in _iter_lines(source, encoding):
+        match = TIMING_RE.search(line)
+        if match:
+            # A bare number right before the timing line is the next cue's index
+            if held and held[-1].strip().isdigit():
+                held.pop()
+            elif not held and cue and cue[2] and cue[2][-1].strip().isdigit():
+                cue[2].pop()
+            if cue:
+                cue[2].extend(held)
+                yield cue[0], cue[1], '\n'.join(cue[2]).strip('\n')
+            groups = match.groups()
+            cue = [timing_to_ms(*groups[:4]), timing_to_ms(*groups[4:]), []]
+            held = []
+        elif cue is None:
+            continue  # BOM, index or junk before the first cue
+        elif not line.strip():
+            if cue[2] or held:
+                held.append('')
+        elif held:
+            held.append(line)
+        else:
+            cue[2].append(line)
+    if cue:
+        # Trailing blank lines carry no text
+        while held and not held[-1]:
+            held.pop()
+        cue[2].extend(held)
+        yield cue[0], cue[1], '\n'.join(cue[2]).strip('\n')
+
+
+def open_srt(path):
+    """
+    Opens an SRT file for streaming as text, with the encoding detected from its
+    first bytes only. Returns (file object, encoding).
+    """
+    with open(path, 'rb') as f:
+        head = f.read(SAMPLE_SIZE + 1)
+    encoding = detect_encoding(head, sample_size=SAMPLE_SIZE)
+    # The encoding was judged on the sample only; undecodable bytes further on are replaced
+    return open(path, 'r', encoding=encoding, errors='replace'), encoding
+
+
+def stream_srt(path, on_cues, first_batch=64, batch_size=512):
+    """
+    Parses an SRT file and hands the cues to `on_cues(list_of_cues)` in batches.
+
+    The first `first_batch` cues are delivered synchronously so playback can
+    start right away; the rest of the file is parsed on a daemon thread. The
+    callback runs on that thread, so it must only extend data, never touch Tk.
+    Returns (encoding, thread); thread is None when the first batch was the whole file.
+    """
+    f, encoding = open_srt(path)
+    cues = iter_srt_cues(f)
+    batch = []
+    for cue in cues:
+        batch.append(cue)
+        if len(batch) >= first_batch:
+            break
+    else:
+        f.close()
+        on_cues(batch)
+        return encoding, None
+    on_cues(batch)
+
+    def fill_rest():
+        with f:
+            rest = []
+            for cue in cues:
+                rest.append(cue)
+                if len(rest) >= batch_size:
+                    on_cues(rest)
+                    rest = []
+            if rest:
+                on_cues(rest)
+
+    thread = threading.Thread(target=fill_rest, daemon=True)
+    thread.start()
+    return encoding, thread
+
+
+def format_srt_time(time_ms):
+    """Formats milliseconds as an SRT timestamp (HH:MM:SS,mmm); negative times clamp to zero."""
+    hours, rest = divmod(max(0, int(time_ms)), 3600000)
+    minutes, rest = divmod(rest, 60000)
+    seconds, millis = divmod(rest, 1000)
+    return f"{hours:02}:{minutes:02}:{seconds:02},{millis:03}"
+
+
+def iter_srt_blocks(timeline):
+    """
+    Yields the timeline's cues (without the delay offset) as SRT blocks.
+    Styling spans are written back as SRT tags, whatever format the cues came from.
+    """
+    cues = zip(timeline.starts, timeline.ends, timeline.texts, timeline.spans)
+    for number, (start, end, text, spans) in enumerate(cues, 1):
+        text = to_srt_markup(text, spans)
+        yield f"{number}\n{format_srt_time(start)} --> {format_srt_time(end)}\n{text}\n\n"
+
+
+def format_srt(timeline):
+    """The timeline as SRT text, for handing to a player without a file."""
+    return ''.join(iter_srt_blocks(timeline))
+
+
+def write_srt(timeline, path):
+    """Writes the timeline's cues (without the delay offset) to `path` as UTF-8 SRT."""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.writelines(iter_srt_blocks(timeline))
@@ -0,0 +1,113 @@
+from array import array
+from bisect import bisect_right
+from itertools import accumulate
+
+from subtitle_core.intervals import IntervalIndex
+
+
+class CueTimeline:
+    """
+    Compact, array-backed view of a subtitle track.
+
+    Cue boundaries live in two contiguous integer-millisecond arrays and the
+    cue texts in a parallel side-table, so the players' per-tick lookups never
+    touch pysrt objects or their computed `ordinal` properties. Texts are plain;
+    styling lives in a second side-table, `spans`, holding per cue a tuple of
+    (start, end, style) character ranges (see subtitle_core.markup).
+    Cues are kept sorted by start time; `max_ends` holds the running maximum
+    of `ends` so overlapping cues can still be located by binary search.
+
+    A subtitle delay is kept as a single `offset_ms` applied lazily by every
+    lookup, so changing it is O(1) and never touches the arrays. The raw
+    arrays are unshifted; use `start()`/`end()` for playback times.
+    """
+    __slots__ = ('starts', 'ends', 'texts', 'spans', 'max_ends', 'offset_ms', '_interval_indexes')
+
+    def __init__(self, starts=(), ends=(), texts=(), spans=None):
+        self.starts = array('q', starts)
+        self.ends = array('q', ends)
+        self.texts = list(texts)
+        self.spans = list(spans) if spans is not None else [()] * len(self.texts)
+        if not (len(self.starts) == len(self.ends) == len(self.texts) == len(self.spans)):
+            raise ValueError("starts, ends, texts and spans must have the same length")
+        self.max_ends = array('q', accumulate(self.ends, max))
+        self.offset_ms = 0
+        self._interval_indexes = {}
+
+    @classmethod
+    def from_cues(cls, cues):
+        """Builds a timeline from an iterable of (start_ms, end_ms, text[, spans]) tuples."""
+        ordered = sorted(cues, key=lambda cue: cue[0])
+        return cls((int(c[0]) for c in ordered), (int(c[1]) for c in ordered), (c[2] for c in ordered),
+                   (c[3] if len(c) > 3 else () for c in ordered))
+
+    def __len__(self):
+        return len(self.starts)
+
+    def without_empty(self):
+        """A copy holding only the cues that end after they start, for players that loop cues."""
+        keep = [i for i in range(len(self.starts)) if self.ends[i] > self.starts[i]]
+        timeline = CueTimeline((self.starts[i] for i in keep), (self.ends[i] for i in keep),
+                               (self.texts[i] for i in keep), [self.spans[i] for i in keep])
+        timeline.offset_ms = self.offset_ms
+        return timeline
+
+    def start(self, index):
+        """Playback time in ms at which cue `index` starts, delay included."""
+        return self.starts[index] + self.offset_ms
+
+    def end(self, index):
+        """Playback time in ms at which cue `index` ends, delay included."""
+        return self.ends[index] + self.offset_ms
+
+    def contains(self, index, time_ms):
+        """True if playback time `time_ms` falls inside cue `index`."""
+        time_ms -= self.offset_ms
+        return self.starts[index] <= time_ms < self.ends[index]
+
+    def index_at(self, time_ms, hint=None, lead_ms=0):
+        """
+        Returns the index of the first cue active at `time_ms`, else of the next
+        cue to start, else of the last cue. Returns None for an empty timeline.
+
+        A cue counts as active from `lead_ms` before its start until its end.
+        `hint` is the previously returned index: sequential playback is answered
+        from it or its successor without searching, anything else by bisection.
+        """
+        count = len(self.starts)
+        if not count:
+            return None
+        time_ms -= self.offset_ms
+        if hint is not None:
+            for i in (hint, hint + 1):
+                if (0 <= i < count and self.starts[i] <= time_ms + lead_ms and time_ms < self.ends[i]
+                        and (i == 0 or self.max_ends[i - 1] <= time_ms)):
+                    return i
+        first_active = bisect_right(self.max_ends, time_ms)
+        last_started = bisect_right(self.starts, time_ms + lead_ms) - 1
+        if first_active <= last_started:
+            return first_active
+        return min(last_started + 1, count - 1)
+
+    def next_change(self, time_ms, lead_ms=0):
+        """
+        Returns the next playback time after `time_ms` at which the set of active
+        cues changes (a cue starts, counting `lead_ms`, or an active one ends),
+        or None if nothing changes any more.
+        """
+        raw_ms = time_ms - self.offset_ms
+        candidates = [self.ends[i] for i in self.active_at(time_ms, lead_ms)]
+        next_start = bisect_right(self.starts, raw_ms + lead_ms)
+        if next_start < len(self.starts):
+            candidates.append(self.starts[next_start] - lead_ms)
+        return min(candidates) + self.offset_ms if candidates else None
+
+    def active_at(self, time_ms, lead_ms=0):
+        """
+        Returns the indices of all cues active at `time_ms`, overlapping ones
+        included. The interval index for each `lead_ms` is built on first use.
+        """
+        index = self._interval_indexes.get(lead_ms)
+        if index is None:
+            index = self._interval_indexes[lead_ms] = IntervalIndex(self, lead_ms)
+        return index.active_at(time_ms - self.offset_ms)
@@ -0,0 +1,55 @@
+import time
+
+LABEL_HZ = 10
+SLIDER_HZ = 30
+
+_UNSET = object()
+
+
+class ViewModel:
+    """
+    The state the player UI shows, kept in Python and pushed to Tk only when
+    it changed.
+
+    Each field is bound with add() to the setter that pushes it to its widget
+    (one Tcl call) and an optional maximum rate. The UI loop set()s fields
+    freely, which is a plain assignment; flush() then calls the setter of each
+    field whose value differs from what the widget shows, unless it was pushed
+    less than 1/max_hz ago, in which case the newest value goes out on a later
+    flush. `tcl_calls` counts the setter calls plus any recorded with
+    record_calls(), for calls_per_minute().
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.tcl_calls = 0
+        self.started_at = clock()
+        self._fields = {}  # name -> [setter, min interval (s), wanted, shown, shown at]
+
+    def add(self, name, setter, max_hz=None):
+        self._fields[name] = [setter, 1.0 / max_hz if max_hz else 0.0, _UNSET, _UNSET, float('-inf')]
+
+    def set(self, name, value):
+        self._fields[name][2] = value
+
+    def invalidate(self, name):
+        """Forgets what the widget shows, e.g. after the user moved it, so the next flush pushes again."""
+        self._fields[name][3] = _UNSET
+
+    def flush(self):
+        now = self.clock()
+        for field in self._fields.values():
+            setter, interval, wanted, shown, shown_at = field
+            if wanted is _UNSET or wanted == shown or now - shown_at < interval:
+                continue
+            setter(wanted)
+            field[3] = wanted
+            field[4] = now
+            self.tcl_calls += 1
+
+    def record_calls(self, count=1):
+        self.tcl_calls += count
+
+    def calls_per_minute(self):
+        elapsed = self.clock() - self.started_at
+        return self.tcl_calls * 60.0 / elapsed if elapsed > 0 else 0.0
@@ -0,0 +1,48 @@
+import re
+
+from subtitle_core.srt import _iter_lines
+
+# Hours are optional in WebVTT timestamps; cue settings may follow the end time
+VTT_TIMING_RE = re.compile(
+    r'(?:(\d+):)?(\d{1,2}):(\d{1,2})[.,](\d{1,3})\s*-->\s*(?:(\d+):)?(\d{1,2}):(\d{1,2})[.,](\d{1,3})')
+
+
+def _vtt_ms(hours, minutes, seconds, fraction):
+    return ((int(hours or 0) * 60 + int(minutes)) * 60 + int(seconds)) * 1000 + int(fraction.ljust(3, '0'))
+
+
+def iter_vtt_cues(source, encoding='utf-8'):
+    """
+    Lazily yields (start_ms, end_ms, text) cues from WebVTT data, one line at a time.
+
+    Accepts the same sources as iter_srt_cues. The WEBVTT header and NOTE,
+    STYLE and REGION blocks are skipped, as are cue identifiers; the text is
+    returned with its markup untouched.
+    """
+    cue = None
+    in_block = False  # inside a header/NOTE/STYLE/REGION block, which runs to the next blank line
+    previous_blank = True
+    for line in _iter_lines(source, encoding):
+        stripped = line.strip()
+        if not stripped:
+            if cue:
+                yield cue[0], cue[1], '\n'.join(cue[2])
+                cue = None
+            in_block = False
+            previous_blank = True
+            continue
+        if cue:
+            cue[2].append(line)
+        elif in_block:
+            pass
+        elif previous_blank and stripped.lstrip('\ufeff').startswith(('WEBVTT', 'NOTE', 'STYLE', 'REGION')):
+            in_block = True
+        else:
+            match = VTT_TIMING_RE.search(line)
+            if match:
+                groups = match.groups()
+                cue = [_vtt_ms(*groups[:4]), _vtt_ms(*groups[4:]), []]
+            # Anything else outside a cue is its identifier
+        previous_blank = False
+    if cue:
+        yield cue[0], cue[1], '\n'.join(cue[2])
@@ -0,0 +1,75 @@
+import io
+
+from subtitle_core import iter_ass_cues, iter_srt_cues, iter_vtt_cues, stream_srt
+from subtitle_core.loader import iter_styled_cues
+
+
+def test_srt_tolerates_bom_crlf_and_stray_blank_lines():
+    data = ("\ufeff1\r\n00:00:01,000 --> 00:00:02,000\r\nHello\r\n\r\n\r\n\r\n"
+            "2\r\n00:00:03,000 --> 00:00:04,500\r\nWorld\r\nagain\r\n\r\n\r\n")
+    assert list(iter_srt_cues(io.StringIO(data))) == [(1000, 2000, 'Hello'), (3000, 4500, 'World\nagain')]
+
+
+def test_srt_tolerates_missing_indexes_and_separators():
+    data = ("00:00:01,000 --> 00:00:02,000\nfirst\n"
+            "7\n00:00:03,000 --> 00:00:04,000\nsecond\n"
+            "00:00:05,000 --> 00:00:06,000\nthird\n")
+    assert [text for _, _, text in iter_srt_cues(data.splitlines())] == ['first', 'second', 'third']
+
+
+def test_srt_keeps_a_blank_line_inside_a_cue():
+    data = "1\n00:00:01,000 --> 00:00:02,000\nline one\n\nline two\n\n2\n00:00:03,000 --> 00:00:04,000\nnext\n"
+    assert [text for _, _, text in iter_srt_cues(data.splitlines())] == ['line one\n\nline two', 'next']
+
+
+def test_srt_timestamps_with_short_fractions_and_dots():
+    data = "1\n00:00:01,5 --> 00:00:02.25\ntext\n\n2\n1:02:03,004 --> 1:02:04,000\nlate\n"
+    assert [(start, end) for start, end, _ in iter_srt_cues(data.splitlines())] == [(1500, 2250),
+                                                                                     (3723004, 3724000)]
+
+
+def test_srt_decodes_bytes_with_the_given_encoding():
+    data = "1\n00:00:01,000 --> 00:00:02,000\nça va\n".encode('cp1252')
+    assert list(iter_srt_cues(io.BytesIO(data), encoding='cp1252')) == [(1000, 2000, 'ça va')]
+
+
+def test_stream_srt_delivers_every_cue_in_order(tmp_path):
+    path = tmp_path / 'many.srt'
+    path.write_text(''.join(f"{i + 1}\n00:00:{i // 10:02d},{i % 10}00 --> 00:00:{i // 10:02d},{i % 10}50\ncue {i}\n\n"
+                            for i in range(100)), encoding='utf-8')
+    batches = []
+    encoding, thread = stream_srt(str(path), batches.append, first_batch=10, batch_size=30)
+    assert len(batches[0]) == 10
+    thread.join(5)
+    cues = [cue for batch in batches for cue in batch]
+    assert [text for _, _, text in cues] == [f"cue {i}" for i in range(100)]
+    assert encoding
+
+
+def test_vtt_skips_header_notes_styles_and_identifiers():
+    data = ("\ufeffWEBVTT - title\n\nNOTE a comment\nspanning lines\n\nSTYLE\n::cue { color: red }\n\n"
+            "intro\n00:01.500 --> 00:02.000 align:start position:10%\n<c.yellow>Hi</c> &amp; bye\n\n"
+            "01:00:00.000 --> 01:00:01.5\nlast\n")
+    assert list(iter_vtt_cues(data.splitlines())) == [(1500, 2000, '<c.yellow>Hi</c> &amp; bye'),
+                                                      (3600000, 3601500, 'last')]
+
+
+def test_vtt_styled_cues_unescape_entities_and_keep_spans():
+    data = "WEBVTT\n\n00:00.000 --> 00:01.000\n<i>a</i> &lt;b&gt;\n"
+    assert list(iter_styled_cues(data, 'vtt')) == [(0, 1000, 'a <b>', ((0, 1, 'italic'),))]
+
+
+def test_ass_follows_the_format_line_and_keeps_commas_in_text():
+    data = ("[Script Info]\nTitle: x\n\n[Events]\n"
+            "Format: Layer, Style, Start, End, Name, MarginL, MarginR, MarginV, Effect, Text\n"
+            "Comment: 0,Default,0:00:00.00,0:00:09.00,,0,0,0,,ignored\n"
+            "Dialogue: 0,Default,0:00:01.50,0:00:02.05,,0,0,0,,Hello, world\n"
+            "Dialogue: 0,Default,1:02:03.4,1:02:04.456,,0,0,0,,{\\i1}late{\\i0}\n")
+    assert list(iter_ass_cues(data.splitlines())) == [(1500, 2050, 'Hello, world'),
+                                                      (3723400, 3724456, '{\\i1}late{\\i0}')]
+
+
+def test_ass_skips_malformed_dialogue_lines():
+    data = ("[Events]\nDialogue: 0,bad,0:00:02.00,,0,0,0,,x\nDialogue: 0\n"
+            "Dialogue: 0,0:00:01.00,0:00:02.00,Default,,0,0,0,,ok\n")
+    assert list(iter_ass_cues(data.splitlines())) == [(1000, 2000, 'ok')]
@@ -0,0 +1,62 @@
+from subtitle_core import CueTimeline, RepeatPlan, RepeatSettings
+
+
+def timeline_of(*cues):
+    return CueTimeline.from_cues((start, end, f"cue {i}") for i, (start, end) in enumerate(cues))
+
+
+def test_pre_roll_reaching_into_previous_cue_is_clamped_after_it():
+    timeline = timeline_of((0, 1000), (1200, 2000), (5000, 6000))
+    plan = RepeatPlan.build(timeline, RepeatSettings(pre_roll_ms=500, clamp_pre_roll=True), 3)
+    assert plan.seek_target(0) == 0
+    assert plan.seek_target(1) == 1001
+    assert plan.seek_target(2) == 4500
+
+
+def test_pre_roll_reaching_into_previous_cue_is_dropped_without_clamping():
+    timeline = timeline_of((0, 1000), (1200, 2000), (5000, 6000))
+    plan = RepeatPlan.build(timeline, RepeatSettings(pre_roll_ms=500), 3)
+    assert plan.seek_target(1) == 1200
+    assert plan.seek_target(2) == 4500
+
+
+def test_short_cue_is_merged_with_the_cues_right_after_it():
+    timeline = timeline_of((0, 300), (400, 1000), (3000, 4000))
+    plan = RepeatPlan.build(timeline, RepeatSettings(merge_short_ms=500), 2)
+    assert plan.loop_end(0) == 1000
+    assert plan.next_index(0) == 2
+    assert plan.repeats(0) == 2
+
+
+def test_short_cue_is_not_merged_across_a_long_gap():
+    timeline = timeline_of((0, 300), (900, 1500))
+    plan = RepeatPlan.build(timeline, RepeatSettings(merge_short_ms=500), 2)
+    assert plan.loop_end(0) == 300
+    assert plan.next_index(0) == 1
+
+
+def test_next_index_skips_nested_cues():
+    timeline = timeline_of((0, 5000), (1000, 2000), (6000, 7000))
+    plan = RepeatPlan.build(timeline, RepeatSettings(), 2)
+    assert plan.next_index(0) == 2
+    assert plan.next_index(1) == 2
+
+
+def test_next_index_skips_a_nested_last_cue():
+    timeline = timeline_of((0, 5000), (1000, 2000))
+    plan = RepeatPlan.build(timeline, RepeatSettings(), 2)
+    assert plan.next_index(0) == len(plan)
+
+
+def test_times_include_the_timeline_offset():
+    timeline = timeline_of((1000, 2000))
+    timeline.offset_ms = 250
+    plan = RepeatPlan.build(timeline, RepeatSettings(pre_roll_ms=500, end_lead_ms=50), 2)
+    assert plan.entry(0)[:2] == (750, 2200)
+
+
+def test_cue_shorter_than_end_lead_is_played_once():
+    timeline = timeline_of((0, 40), (1000, 2000))
+    plan = RepeatPlan.build(timeline, RepeatSettings(end_lead_ms=50), 3)
+    assert plan.repeats(0) == 1
+    assert plan.repeats(1) == 3
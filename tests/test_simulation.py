@@ -0,0 +1,83 @@
+import pytest
+
+from subtitle_core import (REPEAT_PRESETS, CueTimeline, PlaybackClock, RepeatEngine, SimulatedBackend,
+                           VirtualClock)
+from subtitle_core.benchmark import BACKEND_PROFILES
+
+# (repeat preset, backend profile) of player.py and via_mpv.py
+VARIANTS = [('player', 'vlc'), ('via_mpv', 'mpv')]
+CUES = 10
+REPEATS = 3
+
+
+class _Recorder:
+    """Engine and backend listener noting each repeat's seek and the end of the media."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.repeats = []  # (cue index, pass, index into backend.seeks)
+        self.latencies = []
+        self.ended = False
+
+    def on_repeat(self, index, count):
+        self.repeats.append((index, count, len(self.backend.seeks)))
+
+    def on_resume(self, seek_latency_ms, timed_out):
+        self.latencies.append(seek_latency_ms)
+
+    def on_end(self):
+        self.ended = True
+
+
+def play_through(preset, profile, stalls=()):
+    timeline = CueTimeline.from_cues((i * 3000 + 1000, i * 3000 + 2500, f"cue {i}") for i in range(CUES))
+    clock = VirtualClock()
+    backend = SimulatedBackend(clock, duration_ms=CUES * 3000 + 2000, stalls=stalls, **BACKEND_PROFILES[profile])
+    engine = RepeatEngine(backend, clock, REPEAT_PRESETS[preset], repeats=REPEATS,
+                          clock=PlaybackClock(monotonic=clock.monotonic))
+    recorder = _Recorder(backend)
+    engine.add_listener(recorder)
+    backend.add_listener(recorder)
+    engine.set_timeline(timeline)
+    engine.play()
+    clock.run_until(600000, stop=lambda: recorder.ended)
+    overshoots = [backend.seeks[seek][1] - timeline.end(index) for index, _, seek in recorder.repeats]
+    return recorder, overshoots
+
+
+@pytest.mark.parametrize('preset, profile', VARIANTS)
+def test_every_cue_is_repeated_the_requested_number_of_times(preset, profile):
+    recorder, _ = play_through(preset, profile)
+    assert recorder.ended
+    assert [(index, count) for index, count, _ in recorder.repeats] == [
+        (index, count) for index in range(CUES) for count in range(1, REPEATS)]
+
+
+@pytest.mark.parametrize('preset, profile', VARIANTS)
+def test_repeat_seeks_leave_at_the_cue_end(preset, profile):
+    _, overshoots = play_through(preset, profile)
+    assert overshoots and all(0 <= overshoot <= 1 for overshoot in overshoots)
+
+
+@pytest.mark.parametrize('preset, profile', VARIANTS)
+def test_stalls_keep_overshoot_within_one_time_update(preset, profile):
+    stalls = [(i * 3000 + 1800, 400) for i in range(CUES)]
+    recorder, overshoots = play_through(preset, profile, stalls)
+    assert recorder.ended
+    assert len(recorder.repeats) == CUES * (REPEATS - 1)
+    bound = BACKEND_PROFILES[profile]['update_interval_ms']
+    assert all(abs(overshoot) <= bound for overshoot in overshoots)
+
+
+def test_stable_v4_resumes_after_its_fixed_delay():
+    recorder, _ = play_through('stable_v4', 'vlc')
+    assert recorder.ended
+    assert recorder.latencies and {round(latency) for latency in recorder.latencies} == {750}
+
+
+def test_beta_notices_the_cue_end_only_when_it_polls():
+    _, overshoots = play_through('beta', 'mpv')
+    lead_ms = REPEAT_PRESETS['beta'].end_lead_ms
+    poll_ms = REPEAT_PRESETS['beta'].poll_ms + BACKEND_PROFILES['mpv']['update_interval_ms']
+    assert all(-lead_ms <= overshoot <= poll_ms for overshoot in overshoots)
+    assert max(overshoots) > 0
@@ -0,0 +1,89 @@
+from subtitle_core import CueTimeline
+
+
+def timeline_of(*cues):
+    return CueTimeline.from_cues((start, end, f"cue {i}") for i, (start, end) in enumerate(cues))
+
+
+def test_without_empty_drops_zero_length_and_inverted_cues():
+    timeline = timeline_of((0, 1000), (2000, 2000), (2500, 2400), (3000, 4000))
+    timeline.offset_ms = 100
+    kept = timeline.without_empty()
+    assert list(zip(kept.starts, kept.ends)) == [(0, 1000), (3000, 4000)]
+    assert kept.texts == ['cue 0', 'cue 3']
+    assert kept.offset_ms == 100
+
+
+def test_lookup_with_slack_never_lands_on_a_zero_length_cue():
+    # beta.py looks cues up 50 ms early with 100 ms of lead; an empty cue must not be found and looped
+    timeline = timeline_of((0, 1000), (1990, 1990), (3000, 4000)).without_empty()
+    index = timeline.index_at(2000 - 50, lead_ms=100)
+    assert timeline.end(index) > timeline.start(index)
+
+
+def test_index_at_finds_active_cue_else_next_else_last():
+    timeline = timeline_of((1000, 2000), (3000, 4000))
+    assert timeline.index_at(1500) == 0
+    assert timeline.index_at(0) == 0
+    assert timeline.index_at(2500) == 1
+    assert timeline.index_at(9000) == 1
+    assert CueTimeline().index_at(0) is None
+
+
+def test_index_at_counts_lead_before_the_start():
+    timeline = timeline_of((1000, 2000), (3000, 4000))
+    assert timeline.index_at(2900) == 1
+    assert timeline.index_at(1900, lead_ms=200) == 0
+    assert timeline.index_at(2850, lead_ms=200) == 1
+
+
+def test_index_at_prefers_the_first_of_overlapping_cues():
+    timeline = timeline_of((0, 5000), (1000, 2000), (3000, 4000))
+    assert timeline.index_at(1500) == 0
+    assert timeline.index_at(3500) == 0
+    assert timeline.index_at(4500) == 0
+    assert timeline.index_at(5500) == 2
+
+
+def test_hint_fast_path_agrees_with_bisection():
+    timeline = timeline_of((0, 900), (1000, 2000), (1500, 2500), (2500, 2500), (3000, 6000), (4000, 5000),
+                           (7000, 8000))
+    for time_ms in range(-500, 9000, 50):
+        expected = timeline.index_at(time_ms)
+        for hint in range(-1, len(timeline) + 1):
+            assert timeline.index_at(time_ms, hint=hint) == expected, (time_ms, hint)
+
+
+def test_active_at_returns_every_overlapping_cue():
+    timeline = timeline_of((0, 5000), (1000, 2000), (1500, 3000), (6000, 7000))
+    assert sorted(timeline.active_at(1700)) == [0, 1, 2]
+    assert sorted(timeline.active_at(2500)) == [0, 2]
+    assert timeline.active_at(5500) == []
+    assert sorted(timeline.active_at(5900, lead_ms=200)) == [3]
+
+
+def test_active_at_and_contains_treat_the_end_as_exclusive():
+    timeline = timeline_of((1000, 2000), (2000, 2000), (2000, 3000))
+    assert sorted(timeline.active_at(2000)) == [2]
+    assert not timeline.contains(0, 2000)
+    assert not timeline.contains(1, 2000)
+
+
+def test_next_change_in_a_cue_a_gap_and_past_the_end():
+    timeline = timeline_of((0, 1000), (1500, 2000), (1800, 2600))
+    assert timeline.next_change(500) == 1000
+    assert timeline.next_change(1200) == 1500
+    assert timeline.next_change(1200, lead_ms=100) == 1400
+    assert timeline.next_change(1600) == 1800
+    assert timeline.next_change(1900) == 2000
+    assert timeline.next_change(3000) is None
+
+
+def test_lookups_apply_the_offset():
+    timeline = timeline_of((1000, 2000), (3000, 4000))
+    timeline.offset_ms = 500
+    assert (timeline.start(0), timeline.end(0)) == (1500, 2500)
+    assert timeline.index_at(1200) == 0
+    assert timeline.contains(0, 2400)
+    assert sorted(timeline.active_at(3600)) == [1]
+    assert timeline.next_change(2600) == 3500
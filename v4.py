@@ -5,6 +5,8 @@ import pysrt
 import os
 import sys
 
+SEEK_TIMEOUT_MS = 1500  # resume anyway if VLC never reports the seek target
+
 
 class SubtitleRepeaterApp:
     def __init__(self, root):
@@ -39,6 +41,7 @@ class SubtitleRepeaterApp:
         self.is_user_seeking = False
         self.is_system_seeking = False
         self.seek_target_time = 0
+        self.seek_id = 0
 
         # --- UI Setup ---
         self.create_widgets()
@@ -126,9 +129,19 @@ class SubtitleRepeaterApp:
             return
         self.is_system_seeking = True
         self.seek_target_time = time_ms
+        self.seek_id += 1
         self.player.pause()
         self.event_manager.event_attach(vlc.EventType.MediaPlayerTimeChanged, self.on_seek_complete)
         self.player.set_time(time_ms)
+        # Without a timeout a seek VLC never reports would stall update_ui for good
+        self.root.after(SEEK_TIMEOUT_MS, self.on_seek_timeout, self.seek_id)
+
+    def on_seek_timeout(self, seek_id):
+        if self.is_system_seeking and seek_id == self.seek_id:
+            self.is_system_seeking = False
+            self.event_manager.event_detach(vlc.EventType.MediaPlayerTimeChanged)
+            if not self.is_paused_by_user:
+                self.player.play()
 
     def on_seek_complete(self, event):
         """
@@ -3,9 +3,9 @@ import sys
 import time
 import json
 import argparse
-from collections import deque
+from collections import OrderedDict, deque
 from dataclasses import dataclass
-from typing import Optional, List, Tuple, Deque
+from typing import Optional, List, Tuple, Deque, Dict
 
 import pygame
 from pygame.locals import *
@@ -15,9 +15,12 @@ import pysubs2
 DEFAULT_REPEAT_COUNT = 3
 FONT_SIZE = 24
 TEXT_COLOR = (255, 255, 255)  # White
+REPEAT_COLOR = (255, 200, 200)
 BACKGROUND_COLOR = (0, 0, 0, 180)  # Semi-transparent black
 MARGIN = 20
+LINE_SPACING = 5
 MAX_SUBTITLE_LINES = 2
+SURFACE_CACHE_SIZE = 32  # rendered subtitle panels kept; repeats keep re-showing the same few cues
 
 
 @dataclass
@@ -27,6 +30,30 @@ class SubtitleEvent:
     text: str
     repeat_count: int = 0
     times_shown: int = 0
+    cue_id: int = -1
+
+
+class SurfaceCache:
+    """Least-recently-used cache of rendered surfaces."""
+
+    def __init__(self, capacity: int = SURFACE_CACHE_SIZE):
+        self.capacity = capacity
+        self._entries: "OrderedDict[tuple, Tuple[pygame.Surface, Tuple[int, int]]]" = OrderedDict()
+
+    def get(self, key: tuple) -> Optional[Tuple[pygame.Surface, Tuple[int, int]]]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: tuple, entry: Tuple[pygame.Surface, Tuple[int, int]]):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
 
 
 class SubtitleRepeater:
@@ -42,10 +69,17 @@ class SubtitleRepeater:
         # Initialize video player
         self.video_size = (1280, 720)  # Default size, will be updated
         self.screen = pygame.display.set_mode(self.video_size, pygame.RESIZABLE)
-        self.video_surface = pygame.Surface(self.video_size).convert()
+        self._reset_background()
 
         # Initialize font
         self.font = pygame.font.SysFont("Arial", FONT_SIZE)
+        # Subtitle panels (background plus lines) keyed by (cue id, window size), and the last
+        # rendered surface of each single-line text (status bar, repeat indicator) with its string
+        self.panel_cache = SurfaceCache()
+        self.text_surfaces: Dict[str, Tuple[str, pygame.Surface]] = {}
+        # What the screen currently shows, so a frame only redraws and pushes the areas that changed
+        self.drawn_state: Optional[tuple] = None
+        self.drawn_rects: List[pygame.Rect] = []
 
         # Load subtitles
         self.subtitle_events = self._load_subtitles()
@@ -71,7 +105,8 @@ class SubtitleRepeater:
                 events.append(SubtitleEvent(
                     start=line.start / 1000.0,  # Convert to seconds
                     end=line.end / 1000.0,
-                    text=line.text.replace("\\N", "\n")  # Convert newlines
+                    text=line.text.replace("\\N", "\n"),  # Convert newlines
+                    cue_id=len(events)
                 ))
 
         return events
@@ -102,48 +137,88 @@ class SubtitleRepeater:
             if self.current_subtitle.times_shown == 0:  # Only increment if not already repeating
                 self.current_subtitle.repeat_count = min(self.current_subtitle.repeat_count + 1, 10)
 
-    def _draw_subtitles(self):
-        """Render subtitles on the screen"""
+    def _reset_background(self):
+        """Rebuilds the background for the window size and schedules a full redraw"""
+        # Placeholder for video frame - in a real app this would be the actual video
+        self.video_surface = pygame.Surface(self.video_size).convert()
+        self.video_surface.fill((30, 30, 30))
+        self.needs_full_redraw = True
+
+    def _render_panel(self, subtitle: SubtitleEvent) -> Tuple[pygame.Surface, Tuple[int, int]]:
+        """The cue's background panel with its lines drawn in, and where it goes; rendered once per window size"""
+        key = (subtitle.cue_id, self.video_size)
+        entry = self.panel_cache.get(key)
+        if entry is None:
+            lines = [self.font.render(line, True, TEXT_COLOR)
+                     for line in subtitle.text.split('\n')[:MAX_SUBTITLE_LINES]]
+            max_width = max(line.get_width() for line in lines)
+            total_height = sum(line.get_height() for line in lines) + (len(lines) - 1) * LINE_SPACING
+
+            panel = pygame.Surface((max_width + 2 * MARGIN, total_height + 2 * MARGIN), pygame.SRCALPHA)
+            panel.fill(BACKGROUND_COLOR)
+            y_offset = MARGIN
+            for line in lines:
+                panel.blit(line, ((panel.get_width() - line.get_width()) // 2, y_offset))
+                y_offset += line.get_height() + LINE_SPACING
+            position = ((self.video_size[0] - panel.get_width()) // 2,
+                        self.video_size[1] - panel.get_height() - MARGIN)
+            entry = (panel.convert_alpha(), position)
+            self.panel_cache.put(key, entry)
+        return entry
+
+    def _render_text(self, slot: str, text: str, color: Tuple[int, int, int]) -> pygame.Surface:
+        """Renders a single-line text, reusing the last surface of `slot` while its string is unchanged"""
+        cached = self.text_surfaces.get(slot)
+        if cached is None or cached[0] != text:
+            cached = self.text_surfaces[slot] = (text, self.font.render(text, True, color))
+        return cached[1]
+
+    def _repeat_text(self) -> Optional[str]:
+        if self.current_subtitle and self.current_subtitle.repeat_count > 0:
+            return f"Repeats left: {self.current_subtitle.repeat_count - self.current_subtitle.times_shown}"
+        return None
+
+    def _status_text(self) -> str:
+        return f"Time: {self.video_position:.1f}s | Speed: {self.playback_speed:.1f}x | {'Playing' if self.playing else 'Paused'}"
+
+    def _draw_subtitles(self) -> List[pygame.Rect]:
+        """Render subtitles on the screen, returning the areas drawn"""
         if not self.current_subtitle:
-            return
+            return []
 
-        # Split text into lines
-        lines = self.current_subtitle.text.split('\n')[:MAX_SUBTITLE_LINES]
-
-        # Calculate text dimensions
-        line_heights = []
-        max_width = 0
-        for line in lines:
-            text_surface = self.font.render(line, True, TEXT_COLOR)
-            line_heights.append(text_surface.get_height())
-            max_width = max(max_width, text_surface.get_width())
-
-        total_height = sum((line_heights) + (len(lines) - 1) * 5)  # 5px padding between lines
-
-        # Calculate background position
-        bg_width = max_width + 2 * MARGIN
-        bg_height = total_height + 2 * MARGIN
-        bg_x = (self.video_size[0] - bg_width) // 2
-        bg_y = self.video_size[1] - bg_height - MARGIN
-
-        # Draw background
-        bg_surface = pygame.Surface((bg_width, bg_height), pygame.SRCALPHA)
-        bg_surface.fill(BACKGROUND_COLOR)
-        self.screen.blit(bg_surface, (bg_x, bg_y))
-
-        # Draw text lines
-        y_offset = bg_y + MARGIN
-        for i, line in enumerate(lines):
-            text_surface = self.font.render(line, True, TEXT_COLOR)
-        text_x = (self.video_size[0] - text_surface.get_width()) // 2
-        self.screen.blit(text_surface, (text_x, y_offset))
-        y_offset += line_heights[i] + 5
+        panel, (bg_x, bg_y) = self._render_panel(self.current_subtitle)
+        rects = [self.screen.blit(panel, (bg_x, bg_y))]
 
         # Draw repeat indicator
-        if self.current_subtitle.repeat_count > 0:
-            repeat_text = f"Repeats left: {self.current_subtitle.repeat_count - self.current_subtitle.times_shown}"
-        repeat_surface = self.font.render(repeat_text, True, (255, 200, 200))
-        self.screen.blit(repeat_surface, (bg_x + 10, bg_y + 10))
+        repeat_text = self._repeat_text()
+        if repeat_text:
+            rects.append(self.screen.blit(self._render_text('repeat', repeat_text, REPEAT_COLOR), (bg_x + 10, bg_y + 10)))
+        return rects
+
+    def _redraw(self):
+        """Redraws the subtitle panel, repeat indicator and status bar if any of them changed,
+        and pushes only their old and new areas to the display"""
+        status_text = self._status_text()
+        state = (self.current_subtitle.cue_id if self.current_subtitle else None, self._repeat_text(), status_text)
+        if state == self.drawn_state and not self.needs_full_redraw:
+            return
+        self.drawn_state = state
+
+        if self.needs_full_redraw:
+            self.screen.blit(self.video_surface, (0, 0))
+        else:
+            for rect in self.drawn_rects:
+                self.screen.blit(self.video_surface, rect, rect)  # erase the previous overlay
+
+        rects = self._draw_subtitles()
+        rects.append(self.screen.blit(self._render_text('status', status_text, TEXT_COLOR), (10, 10)))
+
+        if self.needs_full_redraw:
+            pygame.display.flip()
+            self.needs_full_redraw = False
+        else:
+            pygame.display.update(self.drawn_rects + rects)
+        self.drawn_rects = rects
 
     def _update_video_position(self):
         """Update the current video position based on playback state"""
@@ -163,13 +238,17 @@ class SubtitleRepeater:
 
         running = True
         while running:
-            # Handle events
-            for event in pygame.event.get():
+            # Handle events; while paused nothing changes on its own, so sleep until the next one
+            events = pygame.event.get() if self.playing else [pygame.event.wait()]
+            for event in events:
                 if event.type == QUIT:
                     running = False
                 elif event.type == KEYDOWN:
                     if event.key == K_SPACE:
                         self.playing = not self.playing
+                        if self.playing:
+                            # The paused loop slept in event.wait(), so the pause must not count as playback
+                            self.last_frame_time = time.time()
                     elif event.key == K_ESCAPE:
                         running = False
                     elif event.key == K_LEFT:
@@ -183,6 +262,10 @@ class SubtitleRepeater:
                 elif event.type == VIDEORESIZE:
                     self.video_size = event.size
                     self.screen = pygame.display.set_mode(self.video_size, pygame.RESIZABLE)
+                    self.panel_cache.clear()  # panels are placed for the old size
+                    self._reset_background()
+                elif event.type == VIDEOEXPOSE:
+                    self.needs_full_redraw = True
 
             # Update video position
             self._update_video_position()
@@ -206,23 +289,11 @@ class SubtitleRepeater:
                     # Reset to start of subtitle for repeat
                     self.video_position = self.current_subtitle.start
 
-            # Draw everything
-            self.screen.fill((0, 0, 0))
+            # Draw what changed
+            self._redraw()
 
-            # Placeholder for video frame - in a real app this would be the actual video
-            self.video_surface.fill((30, 30, 30))
-            self.screen.blit(self.video_surface, (0, 0))
-
-            # Draw subtitles
-            self._draw_subtitles()
-
-            # Draw UI elements
-            status_text = f"Time: {self.video_position:.1f}s | Speed: {self.playback_speed:.1f}x | {'Playing' if self.playing else 'Paused'}"
-            status_surface = self.font.render(status_text, True, (255, 255, 255))
-            self.screen.blit(status_surface, (10, 10))
-
-            pygame.display.flip()
-            self.clock.tick(60)  # Cap at 60 FPS
+            if self.playing:
+                self.clock.tick(60)  # Cap at 60 FPS
 
         pygame.quit()
         sys.exit()
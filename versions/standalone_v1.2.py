@@ -1,13 +1,15 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox
 import vlc
-import pysrt
 import os
 import sys
 import logging
 import subprocess
 import time
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from subtitle_core import SUBTITLE_FILETYPES, CueScheduler, load_timeline
+
 # --- Setup Logging ---
 log_file_path = os.path.join(os.path.expanduser("~"), "subtitle_repeater.log")
 logging.basicConfig(
@@ -35,15 +37,14 @@ class VLCControllerApp:
         # --- State Variables ---
         self.video_path = None
         self.subtitle_path = None
-        self.subtitles = None
-        self.original_subtitles = None
+        self.timeline = None
         self.subtitle_index = 0
         self.repeat_counter = 0
         self.is_paused = True
         self.is_repeating_active = False
         self.is_slider_dragging = False
-        self.repeat_timer_id = None
         self.resume_timer_id = None
+        self.next_subtitle_change_ms = None
         self.last_current_time_str = ""
         self.last_duration_time_str = ""
         self.currently_displayed_subtitle_index = None
@@ -56,6 +57,11 @@ class VLCControllerApp:
             self.vlc_instance = vlc.Instance("--no-xlib" if sys.platform.startswith('linux') else "")
             self.player = self.vlc_instance.media_player_new()
             logging.info("VLC instance created successfully.")
+            # Single timers for the next cue boundaries, re-armed on playback changes instead of polled
+            self.repeat_scheduler = CueScheduler(self.master.after, self.master.after_cancel,
+                                                 self.player.get_time, self.handle_repeat, rate=self.player.get_rate)
+            self.subtitle_scheduler = CueScheduler(self.master.after, self.master.after_cancel,
+                                                   self.player.get_time, self.on_subtitle_change, rate=self.player.get_rate)
         except Exception as e:
             logging.error(f"Failed to initialize VLC: {e}", exc_info=True)
             messagebox.showerror("VLC Error", f"Could not initialize VLC. Is it installed?\nError: {e}")
@@ -161,8 +167,10 @@ class VLCControllerApp:
     def seek(self):
         if not self.player.get_media() or self.player.get_length() <= 0: return
         pos = self.progress_slider.get()
+        time_ms = int(self.player.get_length() * (pos / 1000.0))
         self.player.set_position(pos / 1000.0)
-        self.update_subtitle_index_on_seek(self.player.get_time(), reset_counter=True)
+        self.update_subtitle_index_on_seek(time_ms, reset_counter=True)
+        self.arm_subtitle_timers(time_ms)
 
     def update_ui(self):
         try:
@@ -175,51 +183,71 @@ class VLCControllerApp:
                 duration_str = self.ms_to_time_str(self.player.get_length())
                 if duration_str != self.last_duration_time_str: self.duration_label.config(
                     text=duration_str); self.last_duration_time_str = duration_str
-                self.update_tkinter_subtitle(current_time)
-                if self.is_repeating_active and not self.is_paused and self.repeat_timer_id is None:
-                    if self.subtitles and self.subtitle_index < len(self.subtitles):
-                        current_cue = self.subtitles[self.subtitle_index]
-                        if current_cue.start.ordinal <= current_time < current_cue.end.ordinal:
-                            time_until_end = int(current_cue.end.ordinal) - current_time
-                            self.repeat_timer_id = self.master.after(time_until_end, self.handle_repeat)
-            self.master.after(20, self.update_ui)
+            # Display only; the subtitle label and repeats are driven by their schedulers
+            self.master.after(250, self.update_ui)
         except tk.TclError:
             logging.info("TclError caught, likely window closed.")
         except Exception as e:
             logging.error(f"Unexpected error in UI loop: {e}", exc_info=True)
 
+    def arm_subtitle_timers(self, time_ms=None):
+        """
+        Redraws the subtitle label for `time_ms` and arms one timer for the next label change
+        and one for the end of the current cue. Called on play, seek, repeat and advance
+        instead of polling; while paused both timers stay off.
+        """
+        if time_ms is None: time_ms = self.player.get_time()
+        self.update_tkinter_subtitle(time_ms)
+        if self.is_paused or not self.timeline:
+            self.repeat_scheduler.cancel(); self.subtitle_scheduler.cancel()
+            return
+        self.next_subtitle_change_ms = self.timeline.next_change(time_ms)
+        if self.next_subtitle_change_ms is None: self.subtitle_scheduler.cancel()
+        else: self.subtitle_scheduler.arm(self.next_subtitle_change_ms, time_ms)
+        if self.is_repeating_active and self.subtitle_index < len(self.timeline):
+            self.repeat_scheduler.arm(self.timeline.end(self.subtitle_index), time_ms)
+        else:
+            self.repeat_scheduler.cancel()
+
+    def on_subtitle_change(self):
+        time_ms = max(self.player.get_time(), self.next_subtitle_change_ms or 0)
+        self.update_tkinter_subtitle(time_ms)
+        self.next_subtitle_change_ms = self.timeline.next_change(time_ms) if self.timeline else None
+        if self.next_subtitle_change_ms is not None and not self.is_paused:
+            self.subtitle_scheduler.arm(self.next_subtitle_change_ms, time_ms)
+
     def update_tkinter_subtitle(self, current_time_ms):
-        if not self.subtitles: return
-        active_index = None
-        for i, cue in enumerate(self.subtitles):
-            if cue.start.ordinal <= current_time_ms < cue.end.ordinal: active_index = i; break
+        if not self.timeline: return
+        active = self.timeline.active_at(current_time_ms)
+        active_index = active[0] if active else None
         if active_index != self.currently_displayed_subtitle_index:
-            new_text = self.subtitles[active_index].text if active_index is not None else ""
+            new_text = self.timeline.texts[active_index] if active_index is not None else ""
             self.subtitle_display_label.config(text=new_text)
             self.currently_displayed_subtitle_index = active_index
 
     def handle_repeat(self):
-        self.repeat_timer_id = None
         if self.is_paused or not self.is_repeating_active: return
         try:
             max_repeats = int(self.repeat_count.get())
         except (ValueError, tk.TclError):
             max_repeats = 1
 
-        if not self.subtitles or self.subtitle_index >= len(self.subtitles): return
+        if not self.timeline or self.subtitle_index >= len(self.timeline): return
 
-        current_cue = self.subtitles[self.subtitle_index]
         if self.repeat_counter < max_repeats - 1:
             self.repeat_counter += 1
             logging.info(f"Repeating subtitle #{self.subtitle_index + 1} (Repeat {self.repeat_counter}/{max_repeats})")
-            self.player.set_time(int(current_cue.start.ordinal))
-        elif self.subtitle_index < len(self.subtitles) - 1:
+            start_ms = self.timeline.start(self.subtitle_index)
+            self.player.set_time(int(start_ms))
+            self.arm_subtitle_timers(start_ms)
+        elif self.subtitle_index < len(self.timeline) - 1:
             self.subtitle_index += 1
             self.repeat_counter = 0
             logging.info(f"Advancing to subtitle #{self.subtitle_index + 1}")
+            self.arm_subtitle_timers()
 
     def cancel_all_scheduled_actions(self):
-        if self.repeat_timer_id: self.master.after_cancel(self.repeat_timer_id); self.repeat_timer_id = None
+        self.repeat_scheduler.cancel(); self.subtitle_scheduler.cancel()
         if self.resume_timer_id: self.master.after_cancel(self.resume_timer_id); self.resume_timer_id = None
 
     def load_video(self, *args):
@@ -250,34 +278,34 @@ class VLCControllerApp:
 
     def load_subtitle(self, *args):
         path = filedialog.askopenfilename(title="Select Subtitle File",
-                                          filetypes=(("SubRip files", "*.srt"), ("All files", "*.*")))
+                                          filetypes=(SUBTITLE_FILETYPES, ("All files", "*.*")))
         if not path: return
         self.subtitle_path = path
         logging.info(f"Loading subtitle: {self.subtitle_path}")
-        encodings_to_try = ['utf-8', 'utf-8-sig', 'cp1252', 'iso-8859-1', 'cp1251']
-        loaded_subs = None
-        for encoding in encodings_to_try:
-            try:
-                loaded_subs = pysrt.open(self.subtitle_path, encoding=encoding);
-                break
-            except Exception:
-                continue
-        if loaded_subs:
-            self.original_subtitles = loaded_subs;
+        loaded_timeline = None
+        error = None
+        try:
+            loaded_timeline, encoding = load_timeline(self.subtitle_path)
+        except Exception as e:
+            error = e
+            logging.error(f"Error parsing subtitle file: {e}", exc_info=True)
+        if loaded_timeline:
+            self.timeline = loaded_timeline
             self.process_subtitles()
         else:
-            logging.error("Could not decode subtitle file with any common encodings.");
-            messagebox.showerror("Subtitle Error", "Could not decode subtitle file. Try converting to UTF-8.")
+            reason = f"Error: {error}" if error else "The file contains no cues."
+            logging.error(f"Could not parse subtitle file or it has no cues. {reason}")
+            messagebox.showerror("Subtitle Error", f"Could not parse the subtitle file, or it has no cues.\n{reason}")
         self.master.focus_set()
 
     def process_subtitles(self):
-        if not self.original_subtitles: messagebox.showwarning("Warning", "No subtitles loaded."); return
+        if not self.timeline: messagebox.showwarning("Warning", "No subtitles loaded."); return
         self.cancel_all_scheduled_actions()
-        self.subtitles = self.original_subtitles.copy()
         self.is_repeating_active = True
         self.skip_subtitle_btn.config(state=tk.NORMAL);
         self.prev_subtitle_btn.config(state=tk.NORMAL)
         self.update_subtitle_index_on_seek(self.player.get_time(), reset_counter=True)
+        self.arm_subtitle_timers()
         self.master.focus_set()
 
     def play_pause(self, *args):
@@ -291,6 +319,7 @@ class VLCControllerApp:
             self.player.play();
             self.play_pause_btn.config(text="❚❚");
             self.is_paused = False
+            self.arm_subtitle_timers()
         self.master.focus_set()
 
     def stop(self, *args):
@@ -309,31 +338,26 @@ class VLCControllerApp:
         self.master.focus_set()
 
     def skip_subtitle(self, *args):
-        if not self.subtitles or self.subtitle_index >= len(self.subtitles) - 1: return
+        if not self.timeline or self.subtitle_index >= len(self.timeline) - 1: return
         self.subtitle_index += 1
-        next_cue = self.subtitles[self.subtitle_index]
-        self.player.set_time(int(next_cue.start.ordinal))
+        self.player.set_time(int(self.timeline.start(self.subtitle_index)))
+        self.arm_subtitle_timers(self.timeline.start(self.subtitle_index))
         self.master.focus_set()
 
     def previous_subtitle(self, *args):
-        if not self.subtitles or self.subtitle_index <= 0: return
+        if not self.timeline or self.subtitle_index <= 0: return
         self.subtitle_index -= 1
-        prev_cue = self.subtitles[self.subtitle_index]
-        self.player.set_time(int(prev_cue.start.ordinal))
+        self.player.set_time(int(self.timeline.start(self.subtitle_index)))
+        self.arm_subtitle_timers(self.timeline.start(self.subtitle_index))
         self.master.focus_set()
 
     def set_volume(self, value):
         self.player.audio_set_volume(int(value))
 
     def update_subtitle_index_on_seek(self, time_ms, reset_counter=True):
-        if not self.subtitles: return
+        if not self.timeline: return
         self.cancel_all_scheduled_actions()
-        new_index = 0
-        for i, cue in enumerate(self.subtitles):
-            if cue.start.ordinal <= time_ms < cue.end.ordinal:
-                new_index = i
-                break
-        self.subtitle_index = new_index
+        self.subtitle_index = self.timeline.index_at(time_ms, hint=self.subtitle_index)
         if reset_counter:
             self.repeat_counter = 0
 
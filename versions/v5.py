@@ -1,13 +1,16 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 import vlc
-import pysrt
 import os
 import sys
 import logging
-import re
+import time
 from functools import partial
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from subtitle_core import SUBTITLE_EXTENSIONS, SUBTITLE_FILETYPES, CueScheduler, PlaybackClock, load_timeline
+from subtitle_core.markup import COLOR_PREFIX, styled_runs
+
 # --- Setup Logging ---
 log_file_path = os.path.join(os.path.expanduser("~"), "subtitle_repeater.log")
 logging.basicConfig(
@@ -18,6 +21,11 @@ logging.basicConfig(
     ]
 )
 
+SEEK_TIMEOUT_MS = 1500     # resume anyway if VLC never reports the seek target
+SEEK_TOLERANCE_MS = 500    # a time report this close to the seek target (and closer to it than to
+                           # the pre-seek position) means the seek landed
+SEEK_POLL_MS = 16          # how often the Tk thread checks for a landed seek while one is pending
+
 # Set VLC plugin path for Windows (if not in PATH)
 if sys.platform == "win32" and not os.environ.get('VLC_PLUGIN_PATH'):
     vlc_install_path = r"C:\Program Files\VideoLAN\VLC"
@@ -43,19 +51,26 @@ class VLCPlayerApp:
         # --- State Variables ---
         self.video_path = None
         self.subtitle_path = None
-        self.subtitles = None
-        self.original_subtitles = None
+        self.timeline = None
         self.subtitle_index = 0
         self.repeat_counter = 0
         self.is_paused = True
         self.is_repeating_active = False
         self.is_fullscreen = False
         self.is_slider_dragging = False
-        self.repeat_timer_id = None
         self.resume_timer_id = None
+        self.pending_resume = None
+        self.seek_target_ms = None
+        self.seek_from_ms = None
+        self.seek_landed = False  # set on libVLC's thread, picked up by _poll_seek on the Tk thread
+        self.seek_poll_id = None
+        self.next_subtitle_change_ms = None
         self.last_current_time_str = ""
         self.last_duration_time_str = ""
-        self.currently_displayed_subtitle_index = None
+        self.currently_displayed_subtitle_indices = None
+        self.active_subtitle_indices = ()
+        self.cue_runs = []  # per cue, its (text, styles) runs for the overlay, built at load time
+        self.overlay_styles = set()  # Tk tags already configured on the overlay
 
         # --- Spinbox Variable ---
         self.repeat_count_var = tk.StringVar(value="1") # Use StringVar for Spinbox
@@ -108,6 +123,14 @@ class VLCPlayerApp:
             self.vlc_instance = vlc.Instance(vlc_args)
             self.player = self.vlc_instance.media_player_new()
             logging.info("VLC instance and player created successfully.")
+            # get_time() only moves in coarse steps; the clock interpolates between VLC's time events
+            self.clock = PlaybackClock()
+            self.player.event_manager().event_attach(vlc.EventType.MediaPlayerTimeChanged, self._on_vlc_time_changed)
+            # Single timers for the next cue boundaries, re-armed on playback changes instead of polled
+            self.repeat_scheduler = CueScheduler(self.master.after, self.master.after_cancel,
+                                                 self.clock.now_ms, self.handle_repeat, rate=self.player.get_rate)
+            self.subtitle_scheduler = CueScheduler(self.master.after, self.master.after_cancel,
+                                                   self.clock.now_ms, self.on_subtitle_change, rate=self.player.get_rate)
         except Exception as e:
             logging.error(f"Failed to initialize VLC: {e}", exc_info=True)
             messagebox.showerror("VLC Error", f"Could not initialize VLC. Is it installed and in your PATH?\nError: {e}")
@@ -174,6 +197,7 @@ class VLCPlayerApp:
         )
         self.subtitle_display_text.tag_configure("italic", font=("Helvetica", 18, "italic"))
         self.subtitle_display_text.tag_configure("bold", font=("Helvetica", 18, "bold"))
+        self.subtitle_display_text.tag_configure("underline", underline=True)
         self.subtitle_display_text.tag_configure("color_red", foreground="red")
         self.subtitle_display_text.pack(pady=5, padx=10, fill=tk.X)
         self.subtitle_display_label = self.subtitle_display_text # For compatibility with existing code
@@ -286,6 +310,7 @@ class VLCPlayerApp:
         # Pause playback immediately when slider is grabbed
         if self.player.is_playing():
             self.player.pause()
+            self.clock.set_paused(True)
             self.is_paused_before_drag = False # Remember if it was playing
         else:
             self.is_paused_before_drag = True
@@ -301,26 +326,28 @@ class VLCPlayerApp:
 
     def on_slider_release(self, event):
         self.is_slider_dragging = False
-        self.seek()
+        time_ms = self.seek()
         self.master.focus_set()
         # Resume playback if it was playing before drag
         if not self.is_paused_before_drag:
             self.player.play()
+            self.clock.set_paused(False)
             self.play_pause_btn.config(text="❚❚") # Update button icon
             self.is_paused = False
+            self.arm_subtitle_timers(time_ms)
 
 
     def seek(self):
-        if not self.player.get_media() or self.player.get_length() <= 0: return
+        if not self.player.get_media() or self.player.get_length() <= 0: return None
         pos = self.progress_slider.get()
         time_ms = int(self.player.get_length() * (pos / 1000.0))
         self._perform_seek_with_pause(time_ms)
+        return time_ms
 
-    def _perform_seek_with_pause(self, target_time_ms, resume_delay_ms=250, update_repeat_counter=True):
+    def _perform_seek_with_pause(self, target_time_ms, update_repeat_counter=True):
         """
-        Pauses, seeks, waits, then resumes. Can selectively reset the repeat counter.
-        Increased efficiency: Uses is_playing() and only pauses if actually playing.
-        Reduced resume_delay_ms for snappier response.
+        Pauses, seeks, and resumes as soon as VLC reports the target time (or after
+        SEEK_TIMEOUT_MS if it never does). Can selectively reset the repeat counter.
         """
         if not self.player.get_media(): return
         was_playing = self.player.is_playing()
@@ -331,30 +358,62 @@ class VLCPlayerApp:
 
         if was_playing:
             self.player.pause() # Pause instantly
+            self.clock.set_paused(True)
             self.play_pause_btn.config(text="▶") # Update button icon
             self.is_paused = True # Update internal state
 
-        # Perform the seek
-        self.player.set_time(max(0, target_time_ms))
+        # Perform the seek; _on_vlc_time_changed watches for it to land
+        seek_started_at = time.monotonic()
+        self.seek_landed = False
+        self.seek_from_ms = self.player.get_time()
+        self.seek_target_ms = max(0, target_time_ms)
+        self.player.set_time(self.seek_target_ms)
+        self.clock.seek(self.seek_target_ms)
 
         # Update subtitle index (this is crucial for accurate display after seek)
         self.update_subtitle_index_on_seek(target_time_ms, reset_counter=update_repeat_counter)
+        self.arm_subtitle_timers(target_time_ms)
 
-        def delayed_resume():
+        def resume(timed_out):
             self.resume_timer_id = None
-            # Only resume if it was playing and no new pause/seek occurred
-            if was_playing and self.player.get_state() == vlc.State.Paused and not self.is_paused:
+            self.pending_resume = None
+            self.seek_target_ms = None
+            latency_ms = (time.monotonic() - seek_started_at) * 1000
+            if timed_out:
+                logging.warning(f"No seek confirmation from VLC after {latency_ms:.0f} ms; resuming anyway.")
+            else:
+                logging.info(f"Seek landed after {latency_ms:.0f} ms.")
+            # Only resume if it was playing; a new pause or seek would have cancelled this
+            if was_playing and self.player.get_state() == vlc.State.Paused:
                 self.player.play()
+                self.clock.set_paused(False)
                 self.play_pause_btn.config(text="❚❚") # Update button icon
                 self.is_paused = False # Update internal state
+                self.arm_subtitle_timers(target_time_ms)
             elif was_playing and self.player.get_state() == vlc.State.Playing:
                 # If player already playing due to other events, just ensure button is correct
                 self.play_pause_btn.config(text="❚❚")
 
-        # Schedule the resume after a short delay to allow VLC to stabilize
-        self.resume_timer_id = self.master.after(resume_delay_ms, delayed_resume)
-        logging.info(f"Seek initiated, resume scheduled for {resume_delay_ms}ms.")
+        self.pending_resume = resume
+        self.resume_timer_id = self.master.after(SEEK_TIMEOUT_MS, partial(resume, True))
+        self.seek_poll_id = self.master.after(SEEK_POLL_MS, self._poll_seek)
+
+    def _poll_seek(self):
+        """Tk-side tick while a seek is pending: picks up the flag _on_vlc_time_changed sets."""
+        self.seek_poll_id = None
+        if self.pending_resume is None:
+            return
+        if self.seek_landed:
+            self._on_seek_landed()
+        else:
+            self.seek_poll_id = self.master.after(SEEK_POLL_MS, self._poll_seek)
 
+    def _on_seek_landed(self):
+        """Runs on the Tk thread once VLC has reported the seek target."""
+        if self.pending_resume is None or self.resume_timer_id is None:
+            return  # the seek was cancelled or already timed out
+        self.master.after_cancel(self.resume_timer_id)
+        self.pending_resume(False)
 
     def update_ui(self):
         """
@@ -388,29 +447,6 @@ class VLCPlayerApp:
                 if self.is_fullscreen != self.master.attributes('-fullscreen'):
                     self.is_fullscreen = self.master.attributes('-fullscreen')
                     self.update_fullscreen_button()
-
-                # Update subtitle display
-                self.update_tkinter_subtitle(current_time)
-
-                # Handle repeat logic
-                if self.is_repeating_active and not self.is_paused and self.repeat_timer_id is None:
-                    if self.subtitles and 0 <= self.subtitle_index < len(self.subtitles):
-                        current_cue = self.subtitles[self.subtitle_index]
-                        # Ensure we are within the current subtitle's time range to schedule repeat
-                        if current_cue.start.ordinal <= current_time < current_cue.end.ordinal:
-                            time_until_end = int(current_cue.end.ordinal) - current_time
-                            # Schedule repeat slightly before end to avoid flicker/gap
-                            delay_before_end = min(200, time_until_end - 50) # Repeat 50ms before end, or earlier
-                            if delay_before_end > 0:
-                                self.repeat_timer_id = self.master.after(delay_before_end, self.handle_repeat)
-                            else:
-                                # If too close to end, trigger repeat almost immediately
-                                self.master.after(1, self.handle_repeat)
-                        elif current_time >= current_cue.end.ordinal and self.repeat_counter == 0:
-                            # If we've passed the current subtitle and haven't repeated yet,
-                            # it might be a case where repeat was activated mid-subtitle.
-                            # Force a handle_repeat to advance if not repeating.
-                            self.master.after(1, self.handle_repeat)
             else:
                 # If no media, ensure UI reflects stopped state
                 if not self.is_slider_dragging:
@@ -418,88 +454,120 @@ class VLCPlayerApp:
                 if self.player.get_state() == vlc.State.Ended:
                     self.stop() # Automatically stop when video ends
 
-            self.master.after(50, self.update_ui) # Increased interval for performance
+            # Display only; the overlay and repeats are driven by their schedulers
+            self.master.after(250, self.update_ui)
         except tk.TclError:
             logging.info("TclError caught, likely window closed.")
         except Exception as e:
             logging.error(f"Unexpected error in UI loop: {e}", exc_info=True)
 
+    def _on_vlc_time_changed(self, event):
+        """
+        Runs on libVLC's event thread: feeds the clock and flags a landed seek for _poll_seek.
+        Never touches Tk. A stale report from before the seek can lie within SEEK_TOLERANCE_MS
+        of the target when the jump is short, so it must also be nearer the target than the
+        position the seek started from.
+        """
+        time_ms = event.u.new_time
+        self.clock.update(time_ms)
+        target_ms, from_ms = self.seek_target_ms, self.seek_from_ms
+        if (target_ms is not None and abs(time_ms - target_ms) <= SEEK_TOLERANCE_MS
+                and (from_ms is None or abs(time_ms - target_ms) <= abs(time_ms - from_ms))):
+            self.seek_target_ms = None
+            self.seek_landed = True
+
+    def arm_subtitle_timers(self, time_ms=None):
+        """
+        Redraws the overlay for `time_ms` (default: the playback clock) and arms one timer
+        for the next overlay change and one for the repeat, 50ms before the current cue ends.
+        Called whenever playback changes (play, seek, repeat resume, new delay) instead of
+        polling; while paused both timers stay off.
+        """
+        if time_ms is None:
+            time_ms = self.clock.now_ms()
+        self.update_tkinter_subtitle(time_ms)
+        if self.is_paused or not self.timeline:
+            self.repeat_scheduler.cancel()
+            self.subtitle_scheduler.cancel()
+            return
+
+        self.next_subtitle_change_ms = self.timeline.next_change(time_ms, lead_ms=50)
+        if self.next_subtitle_change_ms is None:
+            self.subtitle_scheduler.cancel()
+        else:
+            self.subtitle_scheduler.arm(self.next_subtitle_change_ms, time_ms)
+
+        if (self.is_repeating_active and self.resume_timer_id is None
+                and 0 <= self.subtitle_index < len(self.timeline)):
+            # Repeat slightly before the end to avoid flicker/gap
+            self.repeat_scheduler.arm(self.timeline.end(self.subtitle_index) - 50, time_ms)
+        else:
+            self.repeat_scheduler.cancel()
+
+    def on_subtitle_change(self):
+        """Overlay timer: the active cues just changed. Never trust an older time than the boundary."""
+        time_ms = self.clock.now_ms()
+        if self.next_subtitle_change_ms is not None:
+            time_ms = max(time_ms, self.next_subtitle_change_ms)
+        self.update_tkinter_subtitle(time_ms)
+        self.next_subtitle_change_ms = self.timeline.next_change(time_ms, lead_ms=50) if self.timeline else None
+        if self.next_subtitle_change_ms is not None and not self.is_paused:
+            self.subtitle_scheduler.arm(self.next_subtitle_change_ms, time_ms)
+
     def update_tkinter_subtitle(self, current_time_ms):
         """
-        Updates the Tkinter Text widget with the current subtitle, applying basic HTML-like styles.
-        Only updates if the active subtitle index has changed or if the text itself needs refresh.
+        Updates the Tkinter Text widget with every active subtitle, applying basic HTML-like styles.
+        Overlapping cues are shown one per line. Only updates if the set of active cues has changed.
         """
-        if not self.subtitles:
+        if not self.timeline:
             if self.subtitle_display_text.get("1.0", tk.END).strip():
                 self.subtitle_display_text.config(state=tk.NORMAL)
                 self.subtitle_display_text.delete("1.0", tk.END)
                 self.subtitle_display_text.config(state=tk.DISABLED)
-                self.currently_displayed_subtitle_index = None
+                self.currently_displayed_subtitle_indices = None
             return
 
-        active_index = None
-        for i, cue in enumerate(self.subtitles):
-            # Give a small buffer (e.g., 50ms) to ensure subtitle is displayed even if timing is slightly off
-            if cue.start.ordinal <= current_time_ms + 50 and current_time_ms < cue.end.ordinal:
-                active_index = i
-                break
-
-        if active_index != self.currently_displayed_subtitle_index:
+        # Every cue on screen, overlapping ones included. Give a small buffer (e.g., 50ms)
+        # to ensure subtitle is displayed even if timing is slightly off
+        active_indices = tuple(self.timeline.active_at(current_time_ms, lead_ms=50))
+        self.active_subtitle_indices = active_indices
+
+        if active_indices != self.currently_displayed_subtitle_indices:
+            self.currently_displayed_subtitle_indices = active_indices
+            # The runs and their tags were prepared at load time: one delete and one insert, no parsing
+            insert_args = []
+            for line_number, active_index in enumerate(active_indices):
+                if line_number:
+                    insert_args.extend(("\n", ()))
+                for run in self.cue_runs[active_index]:
+                    insert_args.extend(run)
             self.subtitle_display_text.config(state=tk.NORMAL)
             self.subtitle_display_text.delete("1.0", tk.END)
-            self.currently_displayed_subtitle_index = active_index
-
-            if active_index is not None:
-                new_text = self.subtitles[active_index].text
-                # Process for basic HTML-like tags (<i>, <b>, <font color="...>)
-                processed_text_parts = []
-                current_tags = []
-
-                # Regex to find tags and their content
-                # Groups: 1=opening tag, 2=closing tag, 3=content between tags
-                # This is a simplified regex, more robust parsing might be needed for complex cases
-                parts = re.split(r'(<[^>]+>)(.*?)(</[^>]+>)', new_text, flags=re.IGNORECASE)
-
-                for part in parts:
-                    if not part:
-                        continue
-
-                    lower_part = part.lower()
-                    if lower_part.startswith('<i'):
-                        current_tags.append("italic")
-                    elif lower_part.startswith('</i'):
-                        if "italic" in current_tags: current_tags.remove("italic")
-                    elif lower_part.startswith('<b'):
-                        current_tags.append("bold")
-                    elif lower_part.startswith('</b'):
-                        if "bold" in current_tags: current_tags.remove("bold")
-                    elif lower_part.startswith('<font color='):
-                        match = re.search(r'color=["\']?([^"\'>]+)', lower_part)
-                        if match:
-                            color = match.group(1)
-                            tag_name = f"color_{color}"
-                            self.subtitle_display_text.tag_configure(tag_name, foreground=color)
-                            current_tags.append(tag_name)
-                    elif lower_part.startswith('</font'):
-                        # Remove the last added color tag
-                        for tag in reversed(current_tags):
-                            if tag.startswith("color_"):
-                                current_tags.remove(tag)
-                                break
-                    else:
-                        # This is the actual text content
-                        clean_text = re.sub(r'<[^>]+>', '', part) # Remove any unhandled tags
-                        self.subtitle_display_text.insert(tk.END, clean_text, current_tags)
+            if insert_args:
+                self.subtitle_display_text.insert(tk.END, *insert_args)
             self.subtitle_display_text.config(state=tk.DISABLED)
 
+    def prepare_overlay_runs(self):
+        """Cuts every cue into styled runs once, configuring a Tk tag the first time each color appears."""
+        self.cue_runs = [styled_runs(text, spans) for text, spans in zip(self.timeline.texts, self.timeline.spans)]
+        for spans in self.timeline.spans:
+            for _, _, style in spans:
+                if style not in self.overlay_styles:
+                    self.overlay_styles.add(style)
+                    if style.startswith(COLOR_PREFIX):
+                        try:
+                            self.subtitle_display_text.tag_configure(style, foreground=style[len(COLOR_PREFIX):])
+                        except tk.TclError:
+                            # A color Tk does not know: the tag stays unstyled rather than failing the load
+                            logging.warning(f"Ignoring unknown subtitle color '{style[len(COLOR_PREFIX):]}'.")
+        self.currently_displayed_subtitle_indices = None
+
 
     def handle_repeat(self):
         """
         Manages the repetition of a subtitle line.
         More robust handling of edge cases and ensures flicker-free repeats.
         """
-        self.repeat_timer_id = None # Clear timer immediately to prevent multiple triggers
-
         if self.is_paused or not self.is_repeating_active:
             logging.info("Repeat skipped: Player paused or repeating not active.")
             return
@@ -512,28 +580,30 @@ class VLCPlayerApp:
             max_repeats = 1
             logging.warning("Invalid repeat count, defaulting to 1.")
 
-        if not self.subtitles or not (0 <= self.subtitle_index < len(self.subtitles)):
+        if not self.timeline or not (0 <= self.subtitle_index < len(self.timeline)):
             logging.info("No subtitles or current subtitle index out of bounds, cannot repeat.")
             return
 
-        current_cue = self.subtitles[self.subtitle_index]
-
         if self.repeat_counter < max_repeats - 1:
             self.repeat_counter += 1
             logging.info(f"Repeating subtitle #{self.subtitle_index + 1} (Repeat {self.repeat_counter}/{max_repeats})")
-            # Seek to start of current cue without resetting the repeat counter
-            # Use a slightly longer delay for seek to ensure VLC has time to process
-            self._perform_seek_with_pause(int(current_cue.start.ordinal), resume_delay_ms=250,
+            # Seek to start of current cue without resetting the repeat counter;
+            # playback resumes once VLC reports the seek has landed
+            self._perform_seek_with_pause(self.timeline.start(self.subtitle_index),
                                           update_repeat_counter=False)
         else:
             # All repeats done, advance to next subtitle
-            if self.subtitle_index < len(self.subtitles) - 1:
+            if self.subtitle_index < len(self.timeline) - 1:
+                # Cues nested inside the one just repeated were already shown on every pass
+                repeated_end = self.timeline.end(self.subtitle_index)
                 self.subtitle_index += 1
+                while (self.subtitle_index < len(self.timeline) - 1
+                       and self.timeline.end(self.subtitle_index) <= repeated_end):
+                    self.subtitle_index += 1
                 self.repeat_counter = 0 # Reset for the new subtitle
                 logging.info(f"Advancing to subtitle #{self.subtitle_index + 1}")
-                next_cue = self.subtitles[self.subtitle_index]
                 # Seek to start of next cue, resetting repeat counter
-                self._perform_seek_with_pause(int(next_cue.start.ordinal), resume_delay_ms=250,
+                self._perform_seek_with_pause(self.timeline.start(self.subtitle_index),
                                               update_repeat_counter=True)
             else:
                 # End of subtitles, stop repeating
@@ -543,11 +613,16 @@ class VLCPlayerApp:
 
 
     def cancel_all_scheduled_actions(self):
-        """Cancels any pending after() calls for repeats or resumes."""
-        if self.repeat_timer_id:
-            self.master.after_cancel(self.repeat_timer_id)
-            self.repeat_timer_id = None
+        """Cancels any pending after() calls for repeats, overlay updates or resumes."""
+        if self.repeat_scheduler.armed:
+            self.repeat_scheduler.cancel()
             logging.debug("Cancelled repeat timer.")
+        self.subtitle_scheduler.cancel()
+        self.seek_target_ms = None
+        self.pending_resume = None
+        if self.seek_poll_id:
+            self.master.after_cancel(self.seek_poll_id)
+            self.seek_poll_id = None
         if self.resume_timer_id:
             self.master.after_cancel(self.resume_timer_id)
             self.resume_timer_id = None
@@ -585,74 +660,71 @@ class VLCPlayerApp:
             self.master.focus_set()
 
     def auto_load_subtitle_for_video(self, video_path):
-        """Attempts to find and load a .srt subtitle file with the same base name."""
+        """Attempts to find and load a subtitle file (.srt, .vtt, .ass, .ssa) with the same base name."""
         base_name, _ = os.path.splitext(video_path)
-        potential_sub_path = base_name + ".srt"
-        if os.path.exists(potential_sub_path):
-            logging.info(f"Attempting to auto-load subtitle: {potential_sub_path}")
-            self.load_subtitle(potential_sub_path)
-        else:
-            logging.info("No matching subtitle file found for auto-load.")
+        for extension in SUBTITLE_EXTENSIONS:
+            potential_sub_path = base_name + extension
+            if os.path.exists(potential_sub_path):
+                logging.info(f"Attempting to auto-load subtitle: {potential_sub_path}")
+                self.load_subtitle(potential_sub_path)
+                return
+        logging.info("No matching subtitle file found for auto-load.")
 
 
     def load_subtitle(self, path=None, *args):
         if not path:
             path = filedialog.askopenfilename(title="Select Subtitle File",
-                                              filetypes=(("SubRip files", "*.srt"), ("All files", "*.*")))
+                                              filetypes=(SUBTITLE_FILETYPES, ("All files", "*.*")))
         if not path: return
         self.subtitle_path = path
         logging.info(f"Loading subtitle: {self.subtitle_path}")
-        encodings_to_try = ['utf-8', 'utf-8-sig', 'cp1252', 'iso-8859-1', 'cp1251']
-        loaded_subs = None
-        for encoding in encodings_to_try:
-            try:
-                loaded_subs = pysrt.open(self.subtitle_path, encoding=encoding)
-                logging.info(f"Subtitle loaded successfully with encoding: {encoding}")
-                break
-            except UnicodeDecodeError:
-                logging.debug(f"Failed to load subtitle with encoding: {encoding}")
-                continue
-            except Exception as e:
-                logging.error(f"Error parsing subtitle file with encoding {encoding}: {e}", exc_info=True)
-                messagebox.showerror("Subtitle Error", f"Could not parse subtitle file.\nError: {e}")
-                return
+        try:
+            timeline, encoding = load_timeline(self.subtitle_path)
+            logging.info(f"Subtitle loaded successfully: {len(timeline)} cues ({'from cache' if encoding == 'cache' else f'encoding: {encoding}'})")
+        except Exception as e:
+            logging.error(f"Error parsing subtitle file: {e}", exc_info=True)
+            messagebox.showerror("Subtitle Error", f"Could not parse subtitle file.\nError: {e}")
+            return
 
-        if loaded_subs:
-            self.original_subtitles = loaded_subs
+        if timeline:
+            self.timeline = timeline
+            self.prepare_overlay_runs()
             self.apply_settings_btn.config(state=tk.NORMAL)
             self.process_subtitles() # Process immediately after loading
             self.skip_subtitle_btn.config(state=tk.NORMAL)
             self.prev_subtitle_btn.config(state=tk.NORMAL)
         else:
-            logging.error("Could not decode subtitle file with any common encodings.")
-            messagebox.showerror("Subtitle Error", "Could not decode subtitle file. Try converting to UTF-8.")
+            logging.error("Subtitle file has no cues.")
+            messagebox.showerror("Subtitle Error", "The subtitle file contains no cues.")
         self.master.focus_set()
 
     def process_subtitles(self):
-        """Applies delay and activates repeating."""
-        if not self.original_subtitles:
+        """
+        Applies delay and activates repeating.
+        The delay is stored as the timeline offset and applied at lookup time; the cues are never copied.
+        """
+        if not self.timeline:
             messagebox.showwarning("Warning", "No subtitles loaded.")
             return
 
         self.cancel_all_scheduled_actions()
         logging.info("Processing subtitles with new settings...")
-        processed_subs = self.original_subtitles.copy()
         info_message = "Settings applied."
 
         try:
             delay_sec = float(self.sync_delay_entry.get())
             if delay_sec != 0.0:
-                processed_subs.shift(seconds=delay_sec)
                 info_message = f"Subtitles shifted by {delay_sec} seconds."
         except ValueError:
             logging.error(f"Invalid delay value: '{self.sync_delay_entry.get()}'")
             messagebox.showerror("Error", "Invalid delay value. Please enter a number.")
             return
 
-        self.subtitles = processed_subs
+        self.timeline.offset_ms = int(round(delay_sec * 1000))
         messagebox.showinfo("Settings Applied", info_message)
         self.is_repeating_active = True
         self.update_subtitle_index_on_seek(self.player.get_time(), reset_counter=True)
+        self.arm_subtitle_timers()
         self.master.focus_set()
 
     def play_pause(self, *args):
@@ -664,6 +736,7 @@ class VLCPlayerApp:
 
         if self.player.is_playing():
             self.player.pause()
+            self.clock.set_paused(True)
             self.play_pause_btn.config(text="▶")
             self.is_paused = True
             logging.info("Video paused.")
@@ -671,8 +744,11 @@ class VLCPlayerApp:
             if self.is_paused: # Only update index if we were truly paused and about to play
                 self.update_subtitle_index_on_seek(self.player.get_time(), reset_counter=True)
             self.player.play()
+            self.clock.set_rate(self.player.get_rate())
+            self.clock.set_paused(False)
             self.play_pause_btn.config(text="❚❚")
             self.is_paused = False
+            self.arm_subtitle_timers()
             logging.info("Video playing.")
 
         self.master.focus_set()
@@ -681,6 +757,8 @@ class VLCPlayerApp:
         """Stops playback and resets UI to initial state."""
         self.cancel_all_scheduled_actions()
         self.player.stop()
+        self.clock.set_paused(True)
+        self.clock.seek(0)
         self.play_pause_btn.config(text="▶")
         self.is_paused = True
         self.progress_slider.set(0)
@@ -693,28 +771,27 @@ class VLCPlayerApp:
         self.subtitle_display_text.config(state=tk.NORMAL)
         self.subtitle_display_text.delete("1.0", tk.END)
         self.subtitle_display_text.config(state=tk.DISABLED)
-        self.currently_displayed_subtitle_index = None
+        self.currently_displayed_subtitle_indices = None
         self.master.title("Subtitle Repeater")
         logging.info("Video stopped.")
         self.master.focus_set()
 
     def skip_subtitle(self, *args):
-        if not self.subtitles: return
+        if not self.timeline: return
         self.cancel_all_scheduled_actions() # Stop any active repeats/resumes
 
-        if self.subtitle_index < len(self.subtitles) - 1:
+        if self.subtitle_index < len(self.timeline) - 1:
             self.subtitle_index += 1
             logging.info(f"Skipping to subtitle #{self.subtitle_index + 1}")
         else:
             logging.info("Already at the last subtitle.")
             return # Already at the last subtitle, do nothing
 
-        next_cue = self.subtitles[self.subtitle_index]
-        self._perform_seek_with_pause(int(next_cue.start.ordinal))
+        self._perform_seek_with_pause(self.timeline.start(self.subtitle_index))
         self.master.focus_set()
 
     def previous_subtitle(self, *args):
-        if not self.subtitles: return
+        if not self.timeline: return
         self.cancel_all_scheduled_actions() # Stop any active repeats/resumes
 
         if self.subtitle_index > 0:
@@ -724,8 +801,7 @@ class VLCPlayerApp:
             logging.info("Already at the first subtitle.")
             return # Already at the first subtitle, do nothing
 
-        prev_cue = self.subtitles[self.subtitle_index]
-        self._perform_seek_with_pause(int(prev_cue.start.ordinal))
+        self._perform_seek_with_pause(self.timeline.start(self.subtitle_index))
         self.master.focus_set()
 
     def toggle_fullscreen(self, *args, force_off=False):
@@ -751,36 +827,20 @@ class VLCPlayerApp:
         This is crucial for ensuring the correct subtitle is processed and displayed
         after any seek operation (user seek, previous/next subtitle, or repeat).
         """
-        if not self.subtitles:
+        if not self.timeline:
             self.subtitle_index = 0
             if reset_counter: self.repeat_counter = 0
-            self.currently_displayed_subtitle_index = None # Reset displayed subtitle state
+            self.currently_displayed_subtitle_indices = None # Reset displayed subtitle state
             return
 
-        new_index = 0
-        found_cue = False
-        for i, cue in enumerate(self.subtitles):
-            # Check if current time falls within or immediately after a subtitle
-            if cue.start.ordinal <= time_ms + 50 and current_time_ms < cue.end.ordinal:
-                new_index = i
-                found_cue = True
-                break
-            elif time_ms < cue.start.ordinal:
-                # If we've passed the current time, this is the next logical subtitle
-                new_index = i
-                found_cue = True
-                break
-
-        if not found_cue:
-            # If no subtitle found before or at current time, assume it's past all subtitles
-            new_index = len(self.subtitles) - 1 if self.subtitles else 0
-
+        # Active cue (with a 50ms lead), else the next one to start, else the last one
+        new_index = self.timeline.index_at(time_ms, hint=self.subtitle_index, lead_ms=50)
 
         if new_index != self.subtitle_index:
             self.subtitle_index = new_index
             logging.info(f"Subtitle index updated to {self.subtitle_index + 1} based on seek to {self.ms_to_time_str(time_ms)}.")
             # Force subtitle display update if index changes, even if time is still in it.
-            self.currently_displayed_subtitle_index = None # Invalidate cache to force update
+            self.currently_displayed_subtitle_indices = None # Invalidate cache to force update
 
         if reset_counter:
             self.repeat_counter = 0
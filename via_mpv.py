@@ -4,11 +4,11 @@ os.environ["PATH"] += os.pathsep + custom_path
 
 import tkinter as tk
 from tkinter import filedialog, messagebox
-import mpv
-import pysrt
 import sys
 import logging
-from tkinter import TclError
+
+from subtitle_core import (REPEAT_PRESETS, SUBTITLE_FILETYPES, CuePrefetcher, MpvBackend, RepeatEngine, SeekPlanner,
+                           TkBridge, TkHost, format_srt, load_timeline)
 
 # --- Setup Logging ---
 log_file_path = os.path.join(os.path.expanduser("~"), "subtitle_repeater_mpv.log")
@@ -49,16 +49,8 @@ class MPVPlayerApp:
 
         # State variables...
         self.video_path = None
-        self.subtitles = None
-        self.original_subtitles = None
-        self.temp_sub_path = None
-        self.subtitle_index = 0
-        self.repeat_counter = 0
-        self.is_repeating_active = False
+        self.timeline = None
         self.is_slider_dragging = False
-        self.is_handling_repeat = False
-        self.repeat_timer_id = None
-        self.resume_timer_id = None
 
         self.create_widgets()
 
@@ -72,7 +64,8 @@ class MPVPlayerApp:
             player_opts = {'wid': str(self.video_frame.winfo_id()), 'log_handler': mpv_log_handler,
                            'input_default_bindings': False, 'input_vo_keyboard': False, 'ytdl': False,
                            'hwdec': 'auto-safe'}
-            self.player = mpv.MPV(**player_opts)
+            self.backend = MpvBackend(**player_opts)
+            self.player = self.backend.player
             logging.info("MPV instance created successfully.")
         except Exception as e:
             logging.error(f"Failed to initialize MPV: {e}", exc_info=True)
@@ -81,24 +74,24 @@ class MPVPlayerApp:
             master.destroy()
             return
 
-        # Observers setup...
-        self.player.observe_property('time-pos', self._on_time_pos_change)
-        self.player.observe_property('duration', self._on_duration_change)
-        self.player.observe_property('pause', self._on_pause_change)
-        self.player.observe_property('fullscreen', self._on_fullscreen_change)
+        # mpv calls observers and engine events on its own thread: they only fill the bridge's
+        # latest-value slots and call queue, which one Tk pump drains per frame
+        self.bridge = TkBridge(self.master)
+        # Repeats are run by the shared engine on the backend's events; these observers only update the UI
+        self.engine = RepeatEngine(self.backend, TkHost(self.master, self.bridge), REPEAT_PRESETS['via_mpv'],
+                                   repeats=lambda: self.repeat_count.get())
+        self.engine.add_listener(self)
+        # Sizes mpv's back buffer to the longest repeat and reads the next cue's bytes ahead
+        self.prefetcher = CuePrefetcher(self.engine)
+        for name, handler in (('time-pos', self._on_time_pos_change), ('duration', self._on_duration_change),
+                              ('pause', self._on_pause_change), ('fullscreen', self._on_fullscreen_change)):
+            self.bridge.bind(name, handler)
+            self.player.observe_property(name, self.bridge.observer())
+        self.bridge.start()
 
         self.master.bind('<Key>', self.handle_keypress)
         self.master.focus_set()
 
-        try:
-            temp_dir = os.path.dirname(sys.executable) if getattr(sys, 'frozen', False) else os.getcwd()
-            self.temp_sub_path = os.path.join(temp_dir, "temp_subs_mpv.srt")
-        except Exception as e:
-            logging.error(f"Could not determine temp directory: {e}", exc_info=True)
-            messagebox.showerror("Startup Error", "Could not create a path for temporary files.")
-            master.destroy()
-            return
-
     def create_widgets(self):
         # UI Setup...
         self.video_frame = tk.Frame(self.master, bg="black")
@@ -162,6 +155,10 @@ class MPVPlayerApp:
         repeat_label.pack(side=tk.LEFT)
         self.repeat_count = tk.Spinbox(repeat_frame, from_=1, to=5, width=5, justify=tk.CENTER, font=self.font_normal)
         self.repeat_count.pack(side=tk.LEFT, padx=0)
+        self.ab_loop_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(repeat_frame, text="A-B loop", variable=self.ab_loop_var, command=self.toggle_ab_loop,
+                       fg=self.TEXT_COLOR, bg=self.FRAME_COLOR, selectcolor=self.BUTTON_COLOR,
+                       activebackground=self.FRAME_COLOR, font=self.font_normal).pack(side=tk.LEFT, padx=(5, 0))
         advanced_frame = tk.LabelFrame(self.master, text="Subtitle Settings", fg=self.TEXT_COLOR, bg=self.FRAME_COLOR,
                                        padx=10, pady=10, font=self.font_label)
         advanced_frame.pack(fill=tk.X, padx=10, pady=(5, 10))
@@ -178,92 +175,31 @@ class MPVPlayerApp:
                                             activeforeground=self.TEXT_COLOR)
         self.apply_settings_btn.grid(row=0, column=2, sticky="e", padx=(20, 0))
 
-    # --- THE FIX IS IN THESE TWO FUNCTIONS ---
-
     def _on_time_pos_change(self, name, value):
         if value is None: return
         current_time_sec = value
-        current_time_ms = int(current_time_sec * 1000)
 
         if not self.is_slider_dragging:
             if self.player.duration:
                 self.progress_slider.set(int((current_time_sec / self.player.duration) * 1000))
         self.time_label.config(text=self.sec_to_time_str(current_time_sec))
 
-        # Check if we should schedule a repeat, but DO NOT lock the UI yet.
-        if self.is_repeating_active and not self.player.pause and not self.is_handling_repeat:
-            if self.subtitles and 0 <= self.subtitle_index < len(self.subtitles):
-                current_cue = self.subtitles[self.subtitle_index]
-                if current_cue.start.ordinal <= current_time_ms < current_cue.end.ordinal:
-                    # The lock is REMOVED from here. We only schedule the event.
-                    time_until_end_ms = current_cue.end.ordinal - current_time_ms
-                    try:
-                        delay_ms = int(max(1, time_until_end_ms))
-                        # We schedule handle_repeat, but do not set is_handling_repeat to True yet.
-                        self.repeat_timer_id = self.master.after(delay_ms, self.handle_repeat)
-                        # We set the lock *inside* handle_repeat now.
-                    except (TclError, ValueError) as e:
-                        logging.error(f"Failed to set repeat timer: {e}")
-
-    def handle_repeat(self):
-        self.is_handling_repeat = True
-        self.repeat_timer_id = None
-
-        if self.player.pause or not self.is_repeating_active or not self.subtitles:
-            self.is_handling_repeat = False
-            return
+    def on_repeat(self, index, count):
+        """Engine listener: cue `index` ended and is being played again."""
+        logging.info(f"Repeating subtitle #{index + 1} ({count}/{self.engine.repeat_count() - 1}). Seeking.")
 
-        try:
-            max_repeats = int(self.repeat_count.get())
-        except (ValueError, TclError):
-            max_repeats = 1
-
-        if self.repeat_counter < max_repeats - 1:
-            self.repeat_counter += 1
-            current_cue = self.subtitles[self.subtitle_index]
-            base_start_time_ms = current_cue.start.ordinal
-            seek_time_ms = base_start_time_ms - 500 if self.subtitle_index > 0 and (base_start_time_ms - 500) > \
-                                                       self.subtitles[
-                                                           self.subtitle_index - 1].end.ordinal else base_start_time_ms
-            final_seek_time_sec = max(0, seek_time_ms / 1000.0)
-            logging.info(
-                f"Repeating subtitle #{self.subtitle_index + 1} ({self.repeat_counter}/{max_repeats - 1}). Seeking.")
-            self.player.pause = True
-            self.player.time_pos = final_seek_time_sec
-
-            def delayed_resume():
-                self.resume_timer_id = None
-                if self.player and self.player.pause:
-                    self.player.pause = False
-                self.is_handling_repeat = False
-
-            # Using a short delay for responsiveness
-            self.resume_timer_id = self.master.after(100, delayed_resume)
+    def on_resume(self, seek_latency_ms, timed_out):
+        if timed_out:
+            logging.warning(f"No seek confirmation from mpv after {seek_latency_ms:.0f} ms; resuming anyway.")
         else:
-            # --- THE FIX IS HERE ---
-            # First, move to the next subtitle if one exists.
-            if self.subtitle_index < len(self.subtitles) - 1:
-                self.subtitle_index += 1
-
-            # Second, ALWAYS reset the counter for the *next* cycle,
-            # regardless of what happened above.
-            self.repeat_counter = 0
-
-            # Finally, unlock the handler.
-            self.is_handling_repeat = False
-
+            logging.info(f"Seek landed after {seek_latency_ms:.0f} ms; resuming.")
 
     def play_pause(self, *args):
-        # This guard is still useful for the brief moment handle_repeat is active
-        if self.is_handling_repeat:
+        # Ignored while a repeat's seek-back is landing
+        if self.engine.resume_timer_id is not None:
             return
 
-        # This will now correctly cancel any PENDING repeat timer before pausing
-        self.reset_repeat_state()
-        self.player.pause = not self.player.pause
-
-        if not self.player.pause and self.player.time_pos:
-            self.update_subtitle_index_on_seek(int(self.player.time_pos * 1000))
+        self.engine.toggle()
         self.master.focus_set()
 
     def start_session(self):
@@ -276,7 +212,7 @@ class MPVPlayerApp:
             logging.info("Video selection cancelled.")
             return
         subtitle_path = filedialog.askopenfilename(title="Step 2: Select Subtitle File",
-                                                   filetypes=(("SubRip files", "*.srt"), ("All files", "*.*")))
+                                                   filetypes=(SUBTITLE_FILETYPES, ("All files", "*.*")))
         if not subtitle_path:
             logging.info("Subtitle selection cancelled.")
             return
@@ -284,8 +220,13 @@ class MPVPlayerApp:
         self.video_path = video_path
         logging.info(f"Loading video: {self.video_path}")
         try:
-            self.player.pause = True
-            self.player.loadfile(self.video_path, 'replace')
+            self.engine.pause()
+            self.prefetcher.attach(self.video_path)
+            self.backend.load_media(self.video_path)
+            # Repeats seek straight onto a keyframe when one falls inside the pre-roll window;
+            # keyframes come from ffprobe when installed, else are learned from slider seeks
+            self.engine.planner = SeekPlanner.for_video(self.video_path)
+            self._probe_keyframes()
             self.master.title(f"Subtitle Repeater - {os.path.basename(self.video_path)}")
         except Exception as e:
             logging.error(f"Error loading video '{self.video_path}': {e}", exc_info=True)
@@ -300,7 +241,6 @@ class MPVPlayerApp:
         self.prev_subtitle_btn.config(state=tk.NORMAL)
         self.skip_subtitle_btn.config(state=tk.NORMAL)
         self.apply_settings_btn.config(state=tk.NORMAL)
-        self.is_repeating_active = True
 
         logging.info("Session loaded successfully. Ready for playback.")
         self.master.focus_set()
@@ -308,57 +248,62 @@ class MPVPlayerApp:
     def load_and_process_subtitles(self, path):
         """Helper to load subtitle file and apply initial settings."""
         logging.info(f"Loading subtitle: {path}")
-        encodings_to_try = ['utf-8', 'utf-8-sig', 'cp1252', 'iso-8859-1', 'cp1251']
-        loaded_subs = None
-        for encoding in encodings_to_try:
-            try:
-                loaded_subs = pysrt.open(path, encoding=encoding)
-                logging.info(f"Successfully loaded subtitle with encoding: {encoding}")
-                break
-            except Exception:
-                continue
-
-        if not loaded_subs:
+        timeline = None
+        try:
+            timeline, encoding = load_timeline(path)
+            logging.info(f"Successfully loaded subtitle: {len(timeline)} cues ({'from cache' if encoding == 'cache' else f'encoding: {encoding}'})")
+        except Exception as e:
+            logging.error(f"Failed to load subtitle: {e}", exc_info=True)
+
+        if not timeline:
             logging.error("Could not decode subtitle file.")
             messagebox.showerror("Subtitle Error", "Could not decode subtitle file. Please try converting it to UTF-8.")
             return False
 
-        self.original_subtitles = loaded_subs
+        self.timeline = timeline
+        self._apply_processed_subtitles_to_player()
         self.process_subtitles()
         return True
 
     def process_subtitles(self):
-        """Applies delay to subtitles and saves the temp file."""
-        if not self.original_subtitles: return
-        self.reset_repeat_state()
-        processed_subs = self.original_subtitles.copy()
+        """Applies delay as the timeline offset and mpv's sub-delay; the cues and temp file are left alone."""
+        if not self.timeline: return
+        self.cancel_all_timers()
         try:
             delay_sec = float(self.sync_delay_entry.get())
-            if delay_sec != 0.0:
-                processed_subs.shift(seconds=delay_sec)
-                logging.info(f"Applied {delay_sec}s delay to subtitles.")
         except ValueError:
             messagebox.showerror("Error", "Invalid delay value. Please enter a number.")
             return
 
-        self.subtitles = processed_subs
-        self._apply_processed_subtitles_to_player()
-        if self.player.time_pos:
-            self.update_subtitle_index_on_seek(int(self.player.time_pos * 1000))
+        self.timeline.offset_ms = int(round(delay_sec * 1000))
+        # Only sub-delay changes: the loaded track is neither re-added nor re-parsed
+        self.backend.set_subtitle_delay(self.timeline.offset_ms)
+        if delay_sec != 0.0:
+            logging.info(f"Applied {delay_sec}s delay to subtitles "
+                         f"({self.backend.subtitle_track_count()} subtitle track(s) loaded).")
+        self.engine.set_timeline(self.timeline)
+        self.prefetcher.configure()
+        self._probe_keyframes()
         self.master.focus_set()
 
+    def _probe_keyframes(self):
+        """Has ffprobe read only the repeats' seek windows of the video, not the whole file."""
+        if self.video_path:
+            self.engine.probe_keyframes(self.video_path,
+                                        on_probed=lambda count: logging.info(f"Probed {count} keyframes."))
+
     def reset_app_state(self):
         """Resets the application to its initial state before loading files."""
         logging.info("Resetting application state.")
-        self.reset_repeat_state()
-        self.player.command('stop')
+        self.engine.stop()
+        self.engine.set_timeline(None)
+        if self.engine.planner and self.video_path:
+            self.engine.planner.save(self.video_path)
+        self.engine.planner = None
+        self.prefetcher.close()
 
         self.video_path = None
-        self.subtitles = None
-        self.original_subtitles = None
-        self.subtitle_index = 0
-        self.repeat_counter = 0
-        self.is_repeating_active = False
+        self.timeline = None
 
         self.play_pause_btn.config(state=tk.DISABLED, text="Play")
         self.prev_subtitle_btn.config(state=tk.DISABLED)
@@ -379,12 +324,8 @@ class MPVPlayerApp:
     def _on_fullscreen_change(self, name, value):
         self.fullscreen_btn.config(text="Exit Fullscreen" if value else "Fullscreen")
 
-    def reset_repeat_state(self):
-        self.cancel_all_timers()
-        self.is_handling_repeat = False
-
     def on_slider_press(self, event):
-        self.reset_repeat_state()
+        self.cancel_all_timers()
         self.is_slider_dragging = True
 
     def on_slider_release(self, event):
@@ -393,47 +334,42 @@ class MPVPlayerApp:
         self.master.focus_set()
 
     def seek(self):
-        self.reset_repeat_state()
-        if not self.player.duration or self.player.duration <= 0: return
+        self.cancel_all_timers()
+        if self.backend.duration_ms() <= 0: return
         pos = self.progress_slider.get()
         seek_time_sec = self.player.duration * (pos / 1000.0)
-        self.player.time_pos = seek_time_sec
-        self.update_subtitle_index_on_seek(int(seek_time_sec * 1000))
+        self.engine.seek(int(seek_time_sec * 1000), precise=False)
         logging.info(f"Seek to {self.sec_to_time_str(seek_time_sec)} ({pos / 10}%)")
 
     def cancel_all_timers(self):
-        if self.repeat_timer_id: self.master.after_cancel(self.repeat_timer_id); self.repeat_timer_id = None
-        if self.resume_timer_id: self.master.after_cancel(self.resume_timer_id); self.resume_timer_id = None
+        self.engine.cancel()
 
     def _apply_processed_subtitles_to_player(self):
-        if not self.subtitles or not self.temp_sub_path: return False
+        """Hands mpv the cues in memory (memory://), replacing the track added before."""
+        if not self.timeline: return False
         try:
-            self.subtitles.save(self.temp_sub_path, encoding='utf-8')
             if self.video_path:
-                self.player.sub_add(self.temp_sub_path)
-                logging.info(f"Processed subtitles set from temp file: {self.temp_sub_path}")
+                self.backend.load_subtitle_text(format_srt(self.timeline))
+                logging.info("Processed subtitles set from memory.")
             return True
         except Exception as e:
-            logging.error(f"Failed to save or set temporary subtitle file: {e}", exc_info=True)
-            messagebox.showerror("File Error", f"Could not create temporary subtitle file.\nError: {e}")
+            logging.error(f"Failed to set processed subtitles: {e}", exc_info=True)
+            messagebox.showerror("Subtitle Error", f"Could not hand the subtitles to mpv.\nError: {e}")
             return False
 
     def skip_subtitle(self, *args):
-        if not self.subtitles or self.subtitle_index >= len(self.subtitles) - 1: return
-        self.reset_repeat_state()
-        self.subtitle_index += 1
-        self.repeat_counter = 0
-        self.player.time_pos = max(0, self.subtitles[self.subtitle_index].start.ordinal / 1000.0)
-        if self.player.pause: self.play_pause()
+        self.engine.skip(1)
         self.master.focus_set()
 
     def previous_subtitle(self, *args):
-        if not self.subtitles or self.subtitle_index <= 0: return
-        self.reset_repeat_state()
-        self.subtitle_index -= 1
-        self.repeat_counter = 0
-        self.player.time_pos = max(0, self.subtitles[self.subtitle_index].start.ordinal / 1000.0)
-        if self.player.pause: self.play_pause()
+        self.engine.skip(-1)
+        self.master.focus_set()
+
+    def toggle_ab_loop(self):
+        """mpv loops each cue itself with ab-loop-a/b/count; Python only advances to the next cue."""
+        native_loop = self.ab_loop_var.get()
+        self.engine.set_settings(REPEAT_PRESETS['via_mpv'].copy(native_loop=native_loop))
+        logging.info(f"mpv A-B loop repeat mode {'on' if native_loop else 'off'}.")
         self.master.focus_set()
 
     def toggle_fullscreen(self, *args):
@@ -441,17 +377,7 @@ class MPVPlayerApp:
         self.master.focus_set()
 
     def set_volume(self, value):
-        if self.player: self.player.volume = int(value)
-
-    def update_subtitle_index_on_seek(self, time_ms):
-        if not self.subtitles: return
-        self.reset_repeat_state()
-        for i, cue in enumerate(self.subtitles):
-            if cue.start.ordinal <= time_ms < cue.end.ordinal: self.subtitle_index = i; self.repeat_counter = 0; return
-        for i, cue in enumerate(self.subtitles):
-            if cue.start.ordinal > time_ms: self.subtitle_index = i; self.repeat_counter = 0; return
-        self.subtitle_index = len(self.subtitles) - 1 if self.subtitles else 0
-        self.repeat_counter = 0
+        if self.player: self.backend.set_volume(value)
 
     def sec_to_time_str(self, sec):
         if sec is None or sec < 0: sec = 0
@@ -480,12 +406,11 @@ if __name__ == "__main__":
 
     def on_closing():
         logging.info("Window closed by user. Terminating MPV.")
-        if hasattr(app, 'player') and app.player: app.player.terminate()
-        if hasattr(app, 'temp_sub_path') and app.temp_sub_path and os.path.exists(app.temp_sub_path):
-            try:
-                os.remove(app.temp_sub_path)
-            except OSError as e:
-                logging.error(f"Error removing temp file on exit: {e}")
+        if hasattr(app, 'bridge'): app.bridge.stop()
+        if hasattr(app, 'prefetcher'): app.prefetcher.close()
+        if hasattr(app, 'backend') and app.backend: app.backend.release()
+        if hasattr(app, 'engine') and app.engine.planner and app.video_path:
+            app.engine.planner.save(app.video_path)
         root.destroy()
         logging.info("================== Application Closed ==================")
 